@@ -0,0 +1,49 @@
+"""
+Benchmark of ObjectEncoder.encode_parallel against ObjectEncoder.encode
+
+This shows the number of records at which the parallel encoding starts to pay off, e.g.::
+
+    PYTHONPATH=. python3 benchmarks/encode_parallel.py compare --workers 4 --executor process
+
+"""
+import os
+import time
+from typing import Optional
+
+from gallium.cli.core import console
+from gallium.obj.encoder import ObjectEncoder
+
+from benchmarks.fixtures import generate_records
+
+
+def measure(callable, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        callable()
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+@console.simple_command
+def compare(workers: Optional[int] = None, executor: Optional[str] = None, repeat: Optional[int] = None):
+    """ Compare the serial and parallel encoding by the number of records """
+    workers = workers or os.cpu_count()
+    repeat = repeat or 3
+    encoder = ObjectEncoder.build()
+
+    print(f'{"records":>10} {"serial (s)":>12} {"parallel (s)":>12} {"speed-up":>9}')
+
+    for count in (1000, 10000, 50000, 100000, 500000):
+        records = generate_records(count)
+        serial_time = measure(lambda: encoder.encode(records), repeat)
+        parallel_time = measure(lambda: encoder.encode_parallel(records,
+                                                                workers=workers,
+                                                                threshold=0,
+                                                                executor=executor),
+                                repeat)
+        print(f'{count:>10} {serial_time:>12.4f} {parallel_time:>12.4f} {serial_time / parallel_time:>8.2f}x')
+
+
+if __name__ == '__main__':
+    console.run_with()
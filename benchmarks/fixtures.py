@@ -0,0 +1,184 @@
+"""
+Reproducible synthetic fixtures for the benchmarks
+
+All fixtures are generated from a fixed seed, so two runs (or two machines) benchmark exactly the same data.
+"""
+import datetime
+import random
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gallium.cli.core import Console
+from gallium.obj.decorator import to_string
+
+SEED = 20200101
+
+_PARAMETER_TYPES = ('str', 'int', 'Optional[int]', 'bool')
+
+
+class Status(Enum):
+    ACTIVE = 'active'
+    INACTIVE = 'inactive'
+
+
+@dataclass
+class Address:
+    street: str
+    city: str
+    postal_code: str
+
+
+@dataclass
+class Record:
+    id: int
+    name: str
+    status: Status
+    created_at: datetime.datetime
+    tags: List[str]
+    address: Address
+
+
+@dataclass
+class Node:
+    name: str
+    value: float
+    child: Optional['Node'] = None
+
+
+@dataclass
+class Profile:
+    id: int
+    name: str
+    email: str
+    age: int
+    active: bool
+    score: float
+    nickname: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+
+
+@to_string
+class Account:
+    id: int
+    name: str
+    balance: float
+    tags: List[str]
+
+    def __init__(self, id: int, name: str, balance: float, tags: List[str]):
+        self.id = id
+        self.name = name
+        self.balance = balance
+        self.tags = tags
+
+
+def generate_records(count: int) -> List[Record]:
+    """ Generate the records, e.g., for the large payloads """
+    randomizer = random.Random(SEED)
+    created_at = datetime.datetime(2021, 1, 1)
+    return [
+        Record(id=i,
+               name=f'record-{i}',
+               status=Status.ACTIVE if randomizer.random() < 0.5 else Status.INACTIVE,
+               created_at=created_at + datetime.timedelta(seconds=randomizer.randrange(86400 * 365)),
+               tags=['alpha', 'bravo', str(randomizer.randrange(1000))],
+               address=Address(street=f'{randomizer.randrange(1000)} Main St', city='Toronto', postal_code='M5V 2T6'))
+        for i in range(count)
+    ]
+
+
+def generate_wide_payload(width: int) -> Dict[str, Any]:
+    """ Generate the flat dictionary with the given number of keys and mixed values """
+    randomizer = random.Random(SEED)
+    value_factories: List[Callable[[int], Any]] = [
+        lambda i: i,
+        lambda i: randomizer.random(),
+        lambda i: f'value-{i}',
+        lambda i: i % 2 == 0,
+        lambda i: None,
+        lambda i: datetime.datetime(2021, 1, 1) + datetime.timedelta(minutes=i),
+        lambda i: Status.ACTIVE,
+    ]
+    return {f'key_{i}': value_factories[i % len(value_factories)](i) for i in range(width)}
+
+
+def generate_deep_payload(depth: int) -> Node:
+    """ Generate the chain of the nested data classes with the given depth """
+    randomizer = random.Random(SEED)
+    node = None
+    for i in range(depth):
+        node = Node(name=f'node-{i}', value=randomizer.random(), child=node)
+    return node
+
+
+def generate_profile_rows(count: int) -> List[Dict[str, Any]]:
+    """ Generate the rows for building :class:`Profile` """
+    randomizer = random.Random(SEED)
+    return [
+        dict(id=i,
+             name=f'user-{i}',
+             email=f'user-{i}@example.com',
+             age=randomizer.randrange(18, 90),
+             active=randomizer.random() < 0.5,
+             score=randomizer.random() * 100,
+             tags=['alpha', 'bravo'])
+        for i in range(count)
+    ]
+
+
+def generate_account(tag_count: int = 5) -> Account:
+    return Account(id=1, name='panda', balance=1234.5, tags=[f'tag-{i}' for i in range(tag_count)])
+
+
+def make_console(command_count: int,
+                 depth: int = 2,
+                 parameter_count: int = 3,
+                 lazy_parser: bool = False,
+                 command_functions: Optional[List[Callable]] = None) -> Tuple[Console, List[str]]:
+    """ Make the console with the synthetic commands
+
+        :param int command_count: The number of the commands
+        :param int depth: The number of the words of each command ID
+        :param int parameter_count: The number of the parameters of each command
+        :param bool lazy_parser: Flag to enable the lazy parser construction
+        :param command_functions: The functions made by :func:`make_command_functions` with the same number of the
+                                  commands and parameters, e.g., to exclude making them from the measurement
+        :return: the console and the command line arguments to invoke the last command
+    """
+    app = Console(lazy_parser=lazy_parser)
+
+    for i, command_function in enumerate(command_functions or make_command_functions(command_count, parameter_count)):
+        app.command(make_command_id(i, depth))(command_function)
+
+    return app, make_command_id(command_count - 1, depth) + make_arguments(parameter_count)
+
+
+def make_command_id(index: int, depth: int) -> List[str]:
+    # Spread the commands evenly over four groups per level.
+    return [f'group{level}-{(index >> (level * 2)) % 4}' for level in range(depth - 1)] + [f'command{index}']
+
+
+def make_command_functions(command_count: int, parameter_count: int) -> List[Callable]:
+    parameters = ', '.join(f'p{i}: {_PARAMETER_TYPES[i % len(_PARAMETER_TYPES)]}' for i in range(parameter_count))
+    namespace: Dict[str, Any] = dict(Optional=Optional)
+    exec('\n'.join(f'def command{i}({parameters}):\n    pass' for i in range(command_count)), namespace)
+    return [namespace[f'command{i}'] for i in range(command_count)]
+
+
+def make_arguments(parameter_count: int) -> List[str]:
+    positional_arguments = list()
+    optional_arguments = list()
+
+    for i in range(parameter_count):
+        parameter_type = _PARAMETER_TYPES[i % len(_PARAMETER_TYPES)]
+
+        if parameter_type == 'str':
+            positional_arguments.append(f'value{i}')
+        elif parameter_type == 'int':
+            positional_arguments.append(str(i))
+        elif parameter_type == 'Optional[int]':
+            optional_arguments.extend([f'--p{i}', str(i)])
+        else:
+            optional_arguments.append(f'--p{i}')
+
+    return positional_arguments + optional_arguments
@@ -0,0 +1,268 @@
+"""
+Benchmark suite of the hot paths of gallium
+
+The suite covers:
+
+* ``console.startup.*``: building a console and executing one command, by the number of the commands, the depth of the
+  command tree and the number of the parameters per command,
+* ``console.dispatch``: parsing and dispatching one command line with the parser tree already built,
+* ``encoder.*``: ``ObjectEncoder.encode`` on wide, deep and large payloads,
+* ``builder.*`` and ``decoder.*``: building the objects one by one and in bulk, and
+* ``stringify.*``: formatting the objects with ``stringify`` and ``@to_string``.
+
+Usage
+#####
+
+.. code-block:: shell
+
+    # Run the suite and write the results as JSON.
+    PYTHONPATH=. python3 benchmarks/suite.py run --output baseline.json
+
+    # Only run the benchmarks whose names contain "encoder".
+    PYTHONPATH=. python3 benchmarks/suite.py run --select encoder --output current.json
+
+    # Fail (exit code 1) if any benchmark is slower than the baseline by more than 10%.
+    PYTHONPATH=. python3 benchmarks/suite.py compare baseline.json current.json --threshold 0.1
+
+    # Or run and compare at once.
+    PYTHONPATH=. python3 benchmarks/suite.py run --baseline baseline.json
+
+The time of each benchmark is the median of the repeated runs, per operation. The fixtures are generated from a fixed
+seed (see :mod:`benchmarks.fixtures`).
+"""
+import contextlib
+import datetime
+import io
+import json
+import platform
+import statistics
+import sys
+import timeit
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from gallium.cli.core import console
+from gallium.obj.builder import ObjectBuilder
+from gallium.obj.decoder import ObjectDecoder
+from gallium.obj.encoder import ObjectEncoder
+from gallium.obj.utils import stringify
+
+from benchmarks.fixtures import Profile, generate_account, generate_deep_payload, generate_profile_rows, \
+    generate_records, generate_wide_payload, make_command_functions, make_console
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.1
+
+
+@dataclass
+class Benchmark:
+    """ Benchmark Case """
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+    """ Prepare the fixtures and return the function to measure """
+
+
+def define_benchmarks() -> List[Benchmark]:
+    benchmarks: List[Benchmark] = list()
+
+    def startup(command_count: int, depth: int, parameter_count: int, lazy_parser: bool = False):
+        command_functions = make_command_functions(command_count, parameter_count)
+
+        def run():
+            app, argv = make_console(command_count, depth, parameter_count, lazy_parser, command_functions)
+            app.execute(argv)
+
+        return run
+
+    for command_count in (10, 100, 1000):
+        benchmarks.append(Benchmark(f'console.startup.commands-{command_count}',
+                                    lambda command_count=command_count: startup(command_count, 2, 3)))
+        benchmarks.append(Benchmark(f'console.startup.commands-{command_count}.lazy',
+                                    lambda command_count=command_count: startup(command_count, 2, 3, True)))
+
+    for depth in (1, 3, 6):
+        benchmarks.append(Benchmark(f'console.startup.depth-{depth}', lambda depth=depth: startup(100, depth, 3)))
+
+    for parameter_count in (1, 5, 20):
+        benchmarks.append(Benchmark(f'console.startup.parameters-{parameter_count}',
+                                    lambda parameter_count=parameter_count: startup(100, 2, parameter_count)))
+
+    def dispatch():
+        app, argv = make_console(100, 2, 5)
+        batch = [' '.join(argv)] * 1000
+
+        def run():
+            # NOTE: The parser tree is built once per batch, which is amortized over the lines.
+            with contextlib.redirect_stderr(io.StringIO()):
+                app.run_batch(batch)
+
+        return run
+
+    benchmarks.append(Benchmark('console.dispatch.1000-lines', dispatch))
+
+    encoder = ObjectEncoder.build()
+
+    for name, payload_factory in (('encoder.wide-1000', lambda: generate_wide_payload(1000)),
+                                  ('encoder.deep-200', lambda: generate_deep_payload(200)),
+                                  ('encoder.large-10000', lambda: generate_records(10000))):
+        benchmarks.append(Benchmark(name,
+                                    lambda payload_factory=payload_factory: (
+                                        lambda payload=payload_factory(): encoder.encode(payload)
+                                    )))
+
+    def build_one_by_one():
+        rows = generate_profile_rows(1000)
+
+        def run():
+            for row in rows:
+                builder = ObjectBuilder(Profile)
+                for name, value in row.items():
+                    getattr(builder, name)(value)
+                builder.build()
+
+        return run
+
+    def build_with_generated_builder():
+        rows = generate_profile_rows(1000)
+        builder_class = ObjectBuilder.for_class(Profile)
+
+        def run():
+            for row in rows:
+                builder = builder_class()
+                for name, value in row.items():
+                    getattr(builder, name)(value)
+                builder.build()
+
+        return run
+
+    def build_many():
+        rows = generate_profile_rows(1000)
+        columns = {name: [row[name] for row in rows] for name in rows[0]}
+        return lambda: ObjectBuilder.build_many(Profile, columns)
+
+    def decode_many():
+        rows = generate_profile_rows(1000)
+        decoder = ObjectDecoder()
+        return lambda: list(decoder.decode_many(Profile, rows))
+
+    benchmarks.extend([
+        Benchmark('builder.one-by-one-1000', build_one_by_one),
+        Benchmark('builder.generated-1000', build_with_generated_builder),
+        Benchmark('builder.build-many-1000', build_many),
+        Benchmark('decoder.decode-many-1000', decode_many),
+    ])
+
+    def format_with_stringify():
+        account = generate_account()
+        return lambda: stringify(account)
+
+    def format_with_to_string():
+        account = generate_account()
+        return lambda: str(account)
+
+    benchmarks.extend([
+        Benchmark('stringify.stringify', format_with_stringify),
+        Benchmark('stringify.to-string', format_with_to_string),
+    ])
+
+    return benchmarks
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """ Measure the time per operation
+
+        The number of the operations per run is calibrated to take at least 0.2 seconds.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    timings = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+
+    return dict(median=statistics.median(timings),
+                min=min(timings),
+                max=max(timings),
+                number=number,
+                repeat=repeat)
+
+
+def run_benchmarks(select: Optional[str] = None, repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = dict()
+
+    for benchmark in define_benchmarks():
+        if select and select not in benchmark.name:
+            continue
+
+        results[benchmark.name] = result = measure(benchmark.setup(), repeat)
+        sys.stderr.write(f'{benchmark.name:<45} {result["median"] * 1000:12.4f} ms\n')
+
+    return dict(meta=dict(python=platform.python_version(),
+                          implementation=platform.python_implementation(),
+                          machine=platform.machine(),
+                          system=platform.system(),
+                          created_at=datetime.datetime.now().isoformat()),
+                unit='s',
+                results=results)
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """ Compare the results and return the names of the regressed benchmarks
+
+        Only the benchmarks in both results are compared.
+    """
+    regressed_names = list()
+
+    print(f'{"benchmark":<45} {"baseline (ms)":>14} {"current (ms)":>14} {"change":>9}')
+
+    for name, current_result in current['results'].items():
+        baseline_result = baseline['results'].get(name)
+
+        if baseline_result is None:
+            continue
+
+        change = current_result['median'] / baseline_result['median'] - 1
+        regressed = change > threshold
+
+        if regressed:
+            regressed_names.append(name)
+
+        print(f'{name:<45} {baseline_result["median"] * 1000:14.4f} {current_result["median"] * 1000:14.4f} '
+              f'{change * 100:+8.1f}%{" REGRESSED" if regressed else ""}')
+
+    return regressed_names
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+@console.simple_command
+def run(output: Optional[str] = None,
+        select: Optional[str] = None,
+        repeat: Optional[int] = None,
+        baseline: Optional[str] = None,
+        threshold: Optional[float] = None):
+    """ Run the benchmarks """
+    results = run_benchmarks(select, repeat or DEFAULT_REPEAT)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    elif not baseline:
+        print(json.dumps(results, indent=2))
+
+    if baseline and compare_results(load_results(baseline), results, threshold or DEFAULT_THRESHOLD):
+        sys.exit(1)
+
+
+@console.simple_command
+def compare(baseline: str, current: str, threshold: Optional[float] = None):
+    """ Compare the results against the baseline and fail if any benchmark regresses past the threshold """
+    regressed_names = compare_results(load_results(baseline), load_results(current), threshold or DEFAULT_THRESHOLD)
+
+    if regressed_names:
+        sys.stderr.write(f'{len(regressed_names)} benchmark(s) regressed: {", ".join(regressed_names)}\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    console.run_with()
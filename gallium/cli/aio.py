@@ -0,0 +1,110 @@
+"""
+This module provides the shared event loop for the asynchronous commands of :class:`gallium.cli.core.Console`.
+
+The event loop runs in a background thread, which is started on the first use, so that the commands executed from
+different threads (e.g., the batch execution) share the same loop. The number of the coroutines running on the loop
+at the same time can be limited.
+
+.. code-block:: python
+
+    @console.command(["fetch"])
+    async def fetch(url: str):
+        ...
+
+    @console.command(["tail"])
+    async def tail(path: str):
+        async for line in follow(path):
+            yield line  # Each item is written to the output as it arrives.
+
+"""
+import asyncio
+import importlib
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+LOOP_ASYNCIO = 'asyncio'
+LOOP_UVLOOP = 'uvloop'
+
+
+def get_loop_factory(name: Optional[str] = None) -> Callable[[], asyncio.AbstractEventLoop]:
+    """ Get the factory of the event loop
+
+        :param str name: Either ``asyncio`` (default) or ``uvloop``. ``uvloop`` requires the package ``uvloop``.
+    """
+    if not name or name == LOOP_ASYNCIO:
+        return asyncio.new_event_loop
+
+    if name == LOOP_UVLOOP:
+        return importlib.import_module('uvloop').new_event_loop
+
+    raise ValueError(f'Unknown event loop: {name}')
+
+
+class EventLoopRunner:
+    """ Shared Event Loop Runner """
+
+    def __init__(self,
+                 loop_factory: Optional[Callable[[], asyncio.AbstractEventLoop]] = None,
+                 concurrency: Optional[int] = None):
+        """
+        :param loop_factory: The factory of the event loop
+        :param int concurrency: The maximum number of the coroutines running at the same time (unlimited by default)
+        """
+        self.__loop_factory = loop_factory or asyncio.new_event_loop
+        self.__concurrency = concurrency
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__owner_pid: Optional[int] = None
+        self.__lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self.__lock:
+            # NOTE: The background thread does not survive the fork. A forked process needs its own loop.
+            if self.__loop is None or self.__owner_pid != os.getpid():
+                self.__loop = self.__loop_factory()
+                self.__semaphore = None
+                self.__owner_pid = os.getpid()
+                threading.Thread(target=self.__loop.run_forever, name='gallium-event-loop', daemon=True).start()
+            return self.__loop
+
+    def run(self, awaitable: Awaitable) -> Any:
+        """ Run the awaitable on the shared loop and wait for the result """
+        future = asyncio.run_coroutine_threadsafe(self.__limit(awaitable), self.loop)
+
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, iterator: AsyncIterator) -> Iterator:
+        """ Iterate the asynchronous iterator on the shared loop, yielding each item as soon as it arrives """
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if hasattr(iterator, 'aclose'):
+                self.run(iterator.aclose())
+
+    def close(self):
+        """ Stop the loop """
+        with self.__lock:
+            if self.__loop is not None and self.__owner_pid == os.getpid():
+                self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__loop = None
+
+    async def __limit(self, awaitable: Awaitable) -> Any:
+        if not self.__concurrency:
+            return await awaitable
+
+        # The semaphore is only accessed from the loop thread.
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.__concurrency)
+
+        async with self.__semaphore:
+            return await awaitable
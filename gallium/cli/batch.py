@@ -0,0 +1,321 @@
+"""
+This module provides the batch execution for :class:`gallium.cli.core.Console`, i.e., running many command lines in
+one process with the parser tree built only once.
+
+Each line of the batch file is a command line (without the program name), for example::
+
+    # Comments and blank lines are ignored.
+    set config --name alpha
+    set config --name bravo
+
+Then, run the batch with:
+
+.. code-block:: shell
+
+    python3 app.py --gallium-batch commands.txt
+    cat commands.txt | python3 app.py --gallium-batch - --gallium-jobs 8
+
+or from Python with ``console.run_batch('commands.txt', jobs=8)``.
+
+When the lines are executed concurrently (``jobs`` > 1), the output of each line is captured and written out as a
+whole, either in the order of the lines (default) or as soon as the line is completed.
+
+A failed line can be retried with ``--gallium-retries N`` (or ``retries`` of ``run_batch``), where only the output of
+the last attempt is written.
+
+:meth:`BatchRunner.run_items` runs the handler once per item instead of per command line, which is used for the
+fan-out execution (``--gallium-each``, see :meth:`gallium.cli.core.Console.run_each`).
+
+.. note:: The process pool relies on the ``fork`` start method and only works on POSIX systems.
+"""
+import io
+import multiprocessing
+import shlex
+import sys
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+EXECUTOR_THREAD = 'thread'
+EXECUTOR_PROCESS = 'process'
+
+
+@dataclass
+class BatchItemResult:
+    """ Result of one line (or item) in the batch """
+    line_number: int
+    line: str
+    exit_code: int
+    output: str = ''
+    error: str = ''
+    attempts: int = 1
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exit_code == 0
+
+
+@dataclass
+class BatchReport:
+    """ Report of the batch execution """
+    results: List[BatchItemResult] = field(default_factory=list)
+    label: str = 'batch'
+    """ The label of the lines of the report, e.g., ``each`` for :meth:`BatchRunner.run_items` """
+    unit: str = 'line'
+
+    @property
+    def failures(self) -> List[BatchItemResult]:
+        return [result for result in self.results if not result.succeeded]
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failures
+
+    def summarize(self) -> str:
+        failures = self.failures
+        lines = [f'[{self.label}] {len(self.results)} {self.unit}(s), '
+                 f'{len(self.results) - len(failures)} succeeded, '
+                 f'{len(failures)} failed']
+        lines.extend(
+            f'[{self.label}] Failed: {self.unit} {result.line_number} (exit code {result.exit_code}'
+            f'{f", {result.attempts} attempts" if result.attempts > 1 else ""}): {result.line}'
+            for result in failures
+        )
+        return '\n'.join(lines)
+
+
+class _CapturableStream:
+    """ Stream proxy which writes to the capture buffer of the current thread, if any, or the original stream """
+
+    def __init__(self, original: TextIO):
+        self.__original = original
+        self.__local = threading.local()
+
+    @property
+    def original(self) -> TextIO:
+        return self.__original
+
+    def start_capture(self):
+        self.__local.buffer = io.StringIO()
+
+    def stop_capture(self) -> str:
+        buffer: io.StringIO = self.__local.buffer
+        self.__local.buffer = None
+        return buffer.getvalue()
+
+    def write(self, data: str) -> int:
+        return (getattr(self.__local, 'buffer', None) or self.__original).write(data)
+
+    def flush(self):
+        if getattr(self.__local, 'buffer', None) is None:
+            self.__original.flush()
+
+    def __getattr__(self, item):
+        return getattr(self.__original, item)
+
+
+@contextmanager
+def _capturable_standard_streams():
+    original_stdout, original_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _CapturableStream(original_stdout), _CapturableStream(original_stderr)
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = original_stdout, original_stderr
+
+
+def _split_line(line: str) -> List[str]:
+    return shlex.split(line, comments=True)
+
+
+def _split_item(item: str) -> List[str]:
+    return [item]
+
+
+def _execute(handler: Callable[[List[str]], Any],
+             line_number: int,
+             line: str,
+             capture: bool,
+             split: Callable[[str], List[str]] = _split_line,
+             retries: int = 0) -> BatchItemResult:
+    attempts = 0
+
+    while True:
+        attempts += 1
+
+        if capture:
+            sys.stdout.start_capture()
+            sys.stderr.start_capture()
+
+        try:
+            handler(split(line))
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                sys.stderr.write(f'{e.code}\n')
+                exit_code = 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            output, error = (sys.stdout.stop_capture(), sys.stderr.stop_capture()) if capture else ('', '')
+
+        # NOTE: Only the output of the last attempt is kept.
+        if exit_code == 0 or attempts > retries:
+            return BatchItemResult(line_number=line_number,
+                                   line=line,
+                                   exit_code=exit_code,
+                                   output=output,
+                                   error=error,
+                                   attempts=attempts)
+
+
+# The handler, the function splitting the line and the number of the retries used by the forked worker processes
+_process_context: Optional[Tuple[Callable[[List[str]], Any], Callable[[str], List[str]], int]] = None
+
+
+def _execute_in_process(line_number: int, line: str) -> BatchItemResult:
+    handler, split, retries = _process_context
+    return _execute(handler, line_number, line, True, split, retries)
+
+
+class BatchRunner:
+    """ Batch Runner """
+
+    def __init__(self,
+                 handler: Callable[[List[str]], Any],
+                 jobs: Optional[int] = None,
+                 ordered: bool = True,
+                 executor: str = EXECUTOR_THREAD,
+                 verbose: bool = True,
+                 retries: int = 0):
+        """
+        :param handler: The callable executing the command line arguments (without the program name)
+        :param int jobs: The number of the concurrent workers. If not greater than 1, the lines are executed one by one.
+        :param bool ordered: Flag to write the output in the order of the lines (only applicable to the concurrent
+                             execution)
+        :param str executor: Either ``thread`` or ``process``
+        :param bool verbose: Flag to report the status of each line to the standard error
+        :param int retries: The number of the times to retry a failed line
+        """
+        if executor not in (EXECUTOR_THREAD, EXECUTOR_PROCESS):
+            raise ValueError(f'Unknown executor: {executor}')
+
+        self.__handler = handler
+        self.__jobs = jobs or 1
+        self.__ordered = ordered
+        self.__executor = executor
+        self.__verbose = verbose
+        self.__retries = retries or 0
+        self.__split: Callable[[str], List[str]] = _split_line
+
+    def run(self, source: Union[str, TextIO, Iterable[str]]) -> BatchReport:
+        """ Run the batch
+
+            :param source: The path to the batch file, ``-`` for the standard input, or an iterable of lines
+        """
+        report = BatchReport()
+        self.__split = _split_line
+
+        if isinstance(source, str):
+            if source == '-':
+                self.__run_lines(self.__enumerate(sys.stdin), report)
+            else:
+                with open(source, 'r') as f:
+                    self.__run_lines(self.__enumerate(f), report)
+        else:
+            self.__run_lines(self.__enumerate(source), report)
+
+        sys.stderr.write(report.summarize() + '\n')
+
+        return report
+
+    def run_items(self, items: Iterable[str]) -> BatchReport:
+        """ Run the handler once per item, e.g., the values of the parameter for ``--gallium-each``
+
+            Unlike :meth:`run`, the handler receives each item as it is, as the only argument. The empty items are
+            skipped and the trailing line breaks are removed, e.g., for the lines from the standard input.
+        """
+        report = BatchReport(label='each', unit='item')
+        self.__split = _split_item
+
+        self.__run_lines(((item_number, item)
+                          for item_number, item in enumerate((item.rstrip('\r\n') for item in items), start=1)
+                          if item),
+                         report)
+
+        sys.stderr.write(report.summarize() + '\n')
+
+        return report
+
+    def __run_lines(self, numbered_lines: Iterator[Tuple[int, str]], report: BatchReport):
+        if self.__jobs <= 1:
+            for line_number, line in numbered_lines:
+                self.__report(report, _execute(self.__handler, line_number, line, False, self.__split, self.__retries))
+            return
+
+        with _capturable_standard_streams():
+            for result in self.__run_concurrently(numbered_lines):
+                self.__report(report, result)
+
+    def __run_concurrently(self, numbered_lines: Iterator[Tuple[int, str]]) -> Iterator[BatchItemResult]:
+        global _process_context
+
+        window_size = self.__jobs * 4
+
+        if self.__executor == EXECUTOR_PROCESS:
+            _process_context = (self.__handler, self.__split, self.__retries)
+            executor = ProcessPoolExecutor(max_workers=self.__jobs, mp_context=multiprocessing.get_context('fork'))
+            submit = lambda line_number, line: executor.submit(_execute_in_process, line_number, line)
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.__jobs)
+            submit = lambda line_number, line: executor.submit(_execute, self.__handler, line_number, line, True,
+                                                               self.__split, self.__retries)
+
+        with executor:
+            if self.__ordered:
+                pending: deque = deque()
+                for line_number, line in numbered_lines:
+                    pending.append(submit(line_number, line))
+                    if len(pending) >= window_size:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            else:
+                running = set()
+                for line_number, line in numbered_lines:
+                    running.add(submit(line_number, line))
+                    if len(running) >= window_size:
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        yield from (future.result() for future in done)
+                yield from (future.result() for future in as_completed(running))
+
+    def __enumerate(self, lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line_number, line
+
+    def __report(self, report: BatchReport, result: BatchItemResult):
+        stdout = getattr(sys.stdout, 'original', sys.stdout)
+        stderr = getattr(sys.stderr, 'original', sys.stderr)
+
+        if result.output:
+            stdout.write(result.output)
+            stdout.flush()
+
+        if result.error:
+            stderr.write(result.error)
+
+        if self.__verbose:
+            status = 'OK' if result.succeeded else f'FAILED (exit code {result.exit_code})'
+            retried = f' after {result.attempts} attempts' if result.attempts > 1 else ''
+            stderr.write(f'[{report.label}] {report.unit.capitalize()} {result.line_number}: {status}{retried}\n')
+
+        report.results.append(result)
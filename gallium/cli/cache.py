@@ -0,0 +1,159 @@
+"""
+This module provides the persistent on-disk cache of the command graph used by :class:`gallium.cli.core.Console`.
+
+The cache is a JSON file keyed by the fingerprint of the source modules of the registered commands. The fingerprint
+is based on the paths, sizes and modification times of the modules so that the cache is invalidated automatically
+whenever any of them changes.
+
+.. note:: Set the environment variable ``GALLIUM_NO_CACHE`` to ``1`` to bypass the cache.
+"""
+import builtins
+import hashlib
+import importlib
+import importlib.machinery
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Optional, Type
+
+CACHE_FORMAT_VERSION = 2
+
+
+def get_module_origin(module_name: str) -> Optional[str]:
+    """ Get the path to the source of the module without importing it (if not already imported)
+
+        Unlike :func:`importlib.util.find_spec`, the parent packages are not imported either. The module is looked up
+        in the path-based locations (``sys.path`` and the paths of the packages) segment by segment.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return getattr(module, '__file__', None)
+
+    names = module_name.split('.')
+    search_locations: Optional[Iterable[str]] = None
+    spec = None
+
+    for depth in range(1, len(names) + 1):
+        name = '.'.join(names[:depth])
+        package = sys.modules.get(name) if depth < len(names) else None
+
+        if package is not None:
+            search_locations = getattr(package, '__path__', None)
+        else:
+            try:
+                spec = importlib.machinery.PathFinder.find_spec(name, search_locations)
+            except (ImportError, ValueError):
+                return None
+
+            if spec is None:
+                return None
+
+            search_locations = spec.submodule_search_locations
+
+        if search_locations is None and depth < len(names):
+            # The parent is not a package.
+            return None
+
+    return spec.origin if spec is not None else None
+
+
+def compute_fingerprint(module_names: Iterable[str], extra: Iterable[str] = tuple()) -> str:
+    """ Compute the fingerprint from the state of the source modules
+
+        :param module_names: The names of the modules
+        :param extra: Additional values to include in the fingerprint, e.g., the command IDs
+    """
+    digest = hashlib.sha1(str(CACHE_FORMAT_VERSION).encode())
+
+    for module_name in sorted(set(module_names)):
+        origin = get_module_origin(module_name)
+        digest.update(module_name.encode())
+
+        if origin and os.path.exists(origin):
+            stat = os.stat(origin)
+            digest.update(f'{origin}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+
+    for value in extra:
+        digest.update(value.encode())
+
+    return digest.hexdigest()
+
+
+def type_to_string(t: Type) -> str:
+    """ Get the reference to the type which can be resolved by :func:`string_to_type` """
+    if getattr(builtins, getattr(t, '__name__', ''), None) is t:
+        return t.__name__
+    return f'{t.__module__}:{t.__qualname__}'
+
+
+def string_to_type(reference: str) -> Type:
+    """ Resolve the type from the reference given by :func:`type_to_string` """
+    if ':' not in reference:
+        return getattr(builtins, reference)
+
+    module_name, qualified_name = reference.split(':', 1)
+    obj = importlib.import_module(module_name)
+    for attribute_name in qualified_name.split('.'):
+        obj = getattr(obj, attribute_name)
+    return obj
+
+
+def is_type_resolvable(t: Type) -> bool:
+    """ Check if the type can be resolved back from the reference given by :func:`type_to_string`
+
+        For example, the classes defined in a function (``<locals>`` in the qualified name) cannot be.
+    """
+    try:
+        return string_to_type(type_to_string(t)) is t
+    except (ImportError, AttributeError, ValueError):
+        return False
+
+
+def get_cache_name() -> str:
+    """ Get the name of the cache files of the app, derived from the path to the entry script """
+    script_path = os.path.abspath(sys.argv[0]) if sys.argv and sys.argv[0] else 'interactive'
+    script_name = os.path.splitext(os.path.basename(script_path))[0] or 'app'
+    return f'{script_name}-{hashlib.sha1(script_path.encode()).hexdigest()[:12]}'
+
+
+class CommandCache:
+    """ On-disk Cache of the Command Graph """
+
+    def __init__(self, cache_dir: str, name: Optional[str] = None):
+        """
+        :param str cache_dir: The path to the cache directory
+        :param str name: The name of the cache, which is derived from the entry script by default.
+        """
+        self.__path = os.path.join(cache_dir, f'{name or get_cache_name()}.json')
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def load(self, fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        """ Load the cached command entries
+
+            :return: the command entries, keyed by the command IDs, or an empty dictionary if the cache does not exist
+                     or is stale.
+        """
+        try:
+            with open(self.__path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+        if data.get('fingerprint') != fingerprint:
+            return dict()
+
+        return data.get('commands') or dict()
+
+    def save(self, fingerprint: str, commands: Dict[str, Dict[str, Any]]):
+        """ Save the command entries atomically """
+        temporary_path = f'{self.__path}.{os.getpid()}.tmp'
+
+        os.makedirs(os.path.dirname(self.__path), exist_ok=True)
+
+        with open(temporary_path, 'w') as f:
+            json.dump(dict(fingerprint=fingerprint, commands=commands), f)
+
+        os.replace(temporary_path, self.__path)
@@ -0,0 +1,130 @@
+"""
+This module provides the thin client of the console server (see :mod:`gallium.cli.daemon`).
+
+The client only depends on the standard library. It forwards the command line arguments, the environment variables
+and the current working directory to the server, together with its standard input, output and error (as file
+descriptors), so that the command writes to and reads from the terminal of the client directly. Then, it exits with
+the exit code of the command.
+
+Usage::
+
+    python3 -m gallium.cli.client /path/to/app.sock set config --name panda
+
+or set the path to the socket with ``GALLIUM_SOCKET``::
+
+    GALLIUM_SOCKET=/path/to/app.sock python3 -m gallium.cli.client set config --name panda
+
+"""
+import array
+import json
+import os
+import socket
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+HEADER_FORMAT = '!I'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+FORWARDED_FDS = (0, 1, 2)
+STATUS_EXIT = 'exit'
+STATUS_RELOAD = 'reload'
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any], fds: Optional[Tuple[int, ...]] = None):
+    """ Send the length-prefixed JSON message (and the file descriptors, if given) """
+    payload = json.dumps(message).encode()
+    data = struct.pack(HEADER_FORMAT, len(payload)) + payload
+
+    if fds:
+        sent = sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+        data = data[sent:]
+
+    if data:
+        sock.sendall(data)
+
+
+def receive_message(sock: socket.socket, fd_count: int = 0) -> Tuple[Optional[Dict[str, Any]], List[int]]:
+    """ Receive the length-prefixed JSON message (and the file descriptors, if expected)
+
+        :return: the message (or ``None`` if the connection is closed) and the received file descriptors
+    """
+    fds = array.array('i')
+    buffer = b''
+
+    if fd_count:
+        data, ancillary_data, _, _ = sock.recvmsg(4096, socket.CMSG_SPACE(fd_count * fds.itemsize))
+        for level, kind, fd_data in ancillary_data:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(fd_data[:len(fd_data) - (len(fd_data) % fds.itemsize)])
+        buffer += data
+
+    while True:
+        if len(buffer) >= HEADER_SIZE:
+            expected_size = HEADER_SIZE + struct.unpack(HEADER_FORMAT, buffer[:HEADER_SIZE])[0]
+            if len(buffer) >= expected_size:
+                return json.loads(buffer[HEADER_SIZE:expected_size].decode()), list(fds)
+
+        data = sock.recv(65536)
+
+        if not data:
+            return None, list(fds)
+
+        buffer += data
+
+
+def request(socket_path: str, argv: List[str], retry_timeout: float = 10.0) -> int:
+    """ Request the server to execute the command
+
+        :param str socket_path: The path to the socket of the server
+        :param argv: The command line arguments (without the program name)
+        :param float retry_timeout: The maximum time to wait for the server while it is reloading
+        :return: the exit code of the command
+    """
+    deadline: Optional[float] = None
+
+    while True:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+                send_message(sock,
+                             dict(argv=argv, env=dict(os.environ), cwd=os.getcwd()),
+                             FORWARDED_FDS)
+                response, _ = receive_message(sock)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if deadline is None or time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+            continue
+
+        if response is None:
+            raise ConnectionError('The server closed the connection unexpectedly.')
+
+        if response['status'] == STATUS_RELOAD:
+            # The server is restarting. Wait for it to be back.
+            deadline = deadline or (time.monotonic() + retry_timeout)
+            time.sleep(0.05)
+            continue
+
+        return response['code']
+
+
+def main():
+    args = sys.argv[1:]
+    socket_path = os.getenv('GALLIUM_SOCKET')
+
+    if not socket_path:
+        if not args:
+            sys.stderr.write('Usage: python3 -m gallium.cli.client SOCKET_PATH [ARGS...]\n')
+            sys.exit(2)
+        socket_path, args = args[0], args[1:]
+
+    try:
+        sys.exit(request(socket_path, args))
+    except OSError as e:
+        sys.stderr.write(f'<<< ERROR: Unable to reach the server at {socket_path} ({e})\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
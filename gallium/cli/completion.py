@@ -0,0 +1,285 @@
+"""
+This module provides the shell completion for :class:`gallium.cli.core.Console`, answered from a precomputed index
+instead of running the app.
+
+Install the completion script (which also writes the index) with one of:
+
+.. code-block:: shell
+
+    source <(python3 app.py --gallium-completion bash)
+    source <(python3 app.py --gallium-completion zsh)
+    python3 app.py --gallium-completion fish | source
+
+The completion is registered for the program name (the base name of the script, e.g., ``app.py``). The index is
+written to the cache directory of the console (``GALLIUM_CACHE_DIR``) or ``~/.cache/gallium`` by default, and is
+regenerated by the completion script (with ``--gallium-completion-index``) whenever the entry script or any of the
+command modules is newer than the index.
+
+Index format
+############
+
+The index is a tab-separated text file so that the shell can query it with ``awk`` alone::
+
+    gallium-completion  <version>  <fingerprint>
+    source              <path to the entry script or a command module>
+    node                <command path>  <sub-commands>  <options>  <description>
+    option              <command path>  <option>        <type>     <description>
+
+where the command path is the words of the command ID separated by spaces (empty for the root), and the sub-commands
+and the options are separated by spaces.
+"""
+import os
+import re
+import shlex
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+INDEX_FORMAT_VERSION = 1
+
+SHELL_BASH = 'bash'
+SHELL_ZSH = 'zsh'
+SHELL_FISH = 'fish'
+SHELLS = (SHELL_BASH, SHELL_ZSH, SHELL_FISH)
+
+# The query of the index. The arguments are the index path and the words after the program name, including the word
+# being completed. It prints the candidates separated by spaces, or nothing for the value of an option.
+# NOTE: This must not contain any single quotes as it is embedded in the shell scripts.
+_QUERY_PROGRAM = r'''
+BEGIN {
+    FS = "\t"
+    token_count = 0
+    for (i = 2; i < ARGC; i++) {
+        tokens[++token_count] = ARGV[i]
+        delete ARGV[i]
+    }
+}
+$1 == "node" { children[$2] = $3; options[$2] = $4; next }
+$1 == "option" { option_types[$2 SUBSEP $3] = $4; next }
+END {
+    path = ""
+    expecting_value = 0
+    for (i = 1; i < token_count; i++) {
+        token = tokens[i]
+        if (token == "::") {
+            # The next stage of the pipeline starts from the root.
+            path = ""
+            expecting_value = 0
+        } else if (expecting_value) {
+            expecting_value = 0
+        } else if (substr(token, 1, 1) == "-") {
+            option_type = option_types[path SUBSEP token]
+            expecting_value = (option_type != "" && option_type != "bool")
+        } else {
+            next_path = (path == "" ? token : path " " token)
+            if (next_path in children) {
+                path = next_path
+            }
+        }
+    }
+    if (!expecting_value) {
+        print children[path] " " options[path]
+    }
+}
+'''.strip()
+
+
+class CompletionNode:
+    """ Node of the Command Tree for the Completion """
+
+    def __init__(self, path: List[str], description: Optional[str] = None):
+        self.path = path
+        self.description = description or ''
+        self.children: List[str] = list()
+        self.options: List[Tuple[str, str, str]] = list()
+        """ The options as the tuples of the name, the type and the description """
+
+
+class CompletionIndex:
+    """ Completion Index File """
+
+    def __init__(self, path: str):
+        self.__path = path
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def read_fingerprint(self) -> Optional[str]:
+        try:
+            with open(self.__path, 'r') as f:
+                header = f.readline().rstrip('\n').split('\t')
+        except OSError:
+            return None
+
+        if len(header) != 3 or header[0] != 'gallium-completion' or header[1] != str(INDEX_FORMAT_VERSION):
+            return None
+
+        return header[2]
+
+    def touch(self):
+        """ Mark the index up to date without rewriting it """
+        os.utime(self.__path)
+
+    def write(self, fingerprint: str, sources: Iterable[str], nodes: Iterable[CompletionNode]):
+        """ Write the index atomically """
+        lines = [f'gallium-completion\t{INDEX_FORMAT_VERSION}\t{fingerprint}']
+        lines.extend(f'source\t{_sanitize(source)}' for source in sorted(set(sources)))
+
+        for node in nodes:
+            path = ' '.join(node.path)
+            lines.append('\t'.join(['node',
+                                    path,
+                                    ' '.join(node.children),
+                                    ' '.join(option_name for option_name, _, _ in node.options),
+                                    _sanitize(node.description.split('\n')[0])]))
+            lines.extend('\t'.join(['option', path, option_name, option_type, _sanitize(description)])
+                         for option_name, option_type, description in node.options)
+
+        temporary_path = f'{self.__path}.{os.getpid()}.tmp'
+
+        os.makedirs(os.path.dirname(self.__path) or '.', exist_ok=True)
+
+        with open(temporary_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        os.replace(temporary_path, self.__path)
+
+
+def get_default_index_dir() -> str:
+    return os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')), 'gallium')
+
+
+def get_program_name() -> str:
+    return os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'app'
+
+
+def get_regeneration_command(index_path: str) -> List[str]:
+    """ Get the command to regenerate the index, i.e., to run the app with ``--gallium-completion-index`` """
+    return [sys.executable, os.path.abspath(sys.argv[0]), '--gallium-completion-index', index_path]
+
+
+def render_script(shell: str, program_name: str, index_path: str, regeneration_command: List[str]) -> str:
+    """ Render the completion script for the shell """
+    function_name = f'_gallium_complete_{re.sub(r"[^A-Za-z0-9_]", "_", program_name)}'
+
+    if shell == SHELL_BASH:
+        return _BASH_TEMPLATE.format(function_name=function_name,
+                                     program_name=shlex.quote(program_name),
+                                     index_path=shlex.quote(index_path),
+                                     regeneration_command=' '.join(shlex.quote(arg) for arg in regeneration_command),
+                                     query_program=_QUERY_PROGRAM)
+
+    if shell == SHELL_ZSH:
+        return _ZSH_TEMPLATE.format(function_name=function_name,
+                                    program_name=shlex.quote(program_name),
+                                    index_path=shlex.quote(index_path),
+                                    regeneration_command=' '.join(shlex.quote(arg) for arg in regeneration_command),
+                                    query_program=_QUERY_PROGRAM)
+
+    if shell == SHELL_FISH:
+        return _FISH_TEMPLATE.format(function_name=function_name,
+                                     program_name=_quote_for_fish(program_name),
+                                     index_path=_quote_for_fish(index_path),
+                                     regeneration_command=' '.join(_quote_for_fish(arg) for arg in regeneration_command),
+                                     query_program=_QUERY_PROGRAM)
+
+    raise ValueError(f'Unsupported shell: {shell}')
+
+
+def _sanitize(value: str) -> str:
+    return re.sub(r'[\t\r\n]+', ' ', value)
+
+
+def _quote_for_fish(value: str) -> str:
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+_BASH_TEMPLATE = '''
+{function_name}() {{
+    local index={index_path}
+    local stale=0 kind value rest
+
+    if [ ! -f "$index" ]; then
+        stale=1
+    else
+        while IFS=$'\\t' read -r kind value rest; do
+            [ "$kind" = gallium-completion ] && continue
+            [ "$kind" = source ] || break
+            if [ "$value" -nt "$index" ]; then
+                stale=1
+                break
+            fi
+        done < "$index"
+    fi
+
+    if [ "$stale" = 1 ]; then
+        {regeneration_command} >/dev/null 2>&1
+    fi
+
+    local candidates
+    candidates=$(awk '{query_program}' "$index" "${{COMP_WORDS[@]:1:COMP_CWORD}}")
+    COMPREPLY=($(compgen -W "$candidates" -- "${{COMP_WORDS[COMP_CWORD]}}"))
+}}
+complete -o default -F {function_name} {program_name}
+'''.lstrip()
+
+_ZSH_TEMPLATE = '''
+#compdef {program_name}
+{function_name}() {{
+    local index={index_path}
+    local stale=0 kind value rest
+
+    if [[ ! -f $index ]]; then
+        stale=1
+    else
+        while IFS=$'\\t' read -r kind value rest; do
+            [[ $kind == gallium-completion ]] && continue
+            [[ $kind == source ]] || break
+            if [[ $value -nt $index ]]; then
+                stale=1
+                break
+            fi
+        done < $index
+    fi
+
+    if (( stale )); then
+        {regeneration_command} >/dev/null 2>&1
+    fi
+
+    local -a candidates
+    candidates=(${{=$(awk '{query_program}' $index "${{(@)words[2,CURRENT]}}")}})
+
+    if (( ${{#candidates}} )); then
+        compadd -a candidates
+    else
+        _files
+    fi
+}}
+compdef {function_name} {program_name}
+'''.lstrip()
+
+_FISH_TEMPLATE = '''
+function {function_name}
+    set -l index {index_path}
+    set -l stale 0
+
+    if not test -f $index
+        set stale 1
+    else
+        for source in (string replace -r -f '^source\\t' '' < $index)
+            if command test $source -nt $index
+                set stale 1
+                break
+            end
+        end
+    end
+
+    if test $stale = 1
+        {regeneration_command} >/dev/null 2>&1
+    end
+
+    set -l tokens (commandline -opc)[2..-1] (commandline -ct)
+    awk '{query_program}' $index $tokens | string split ' ' | string match -v ''
+end
+complete -c {program_name} -f -a '({function_name})'
+'''.lstrip()
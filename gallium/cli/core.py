@@ -37,18 +37,210 @@ Then, you should be able to call ``set_config``, ``authenticate``, and `add` by
 
 respectively.
 
+Lazy parser construction
+########################
+
+By default, the parsers of all registered commands are built before the command line arguments are parsed. For an app
+with a lot of commands, you can have the console to resolve the command path first and only build the parsers along
+that path (and register the names of the other sub-commands for the help output).
+
+.. code-block:: python
+
+    console = Console(lazy_parser=True)
+
+or set the environment variable ``GALLIUM_LAZY_PARSER`` to ``1``.
+
+Deferred command modules
+########################
+
+Instead of importing every command module up front, you can register a command by its import target. The module is
+only imported when the command is invoked.
+
+.. code-block:: python
+
+    console.lazy_command(["db", "migrate"], "pkg.db:migrate", "Migrate the database")
+    console.load_manifest({"db dump": "pkg.db:dump"})
+    console.run_with()
+
+.. note:: The lazy parser construction is always used when there is at least one lazy command.
+
+Command graph cache
+###################
+
+The console can store the argument specifications of the commands in a cache directory so that the subsequent runs
+can build the parsers without reflecting on the commands.
+
+.. code-block:: python
+
+    console = Console(cache_dir=os.path.expanduser("~/.cache/my-app"))
+
+or set the environment variable ``GALLIUM_CACHE_DIR``. The cache is invalidated automatically when any of the command
+modules changes. Set ``GALLIUM_NO_CACHE`` to ``1`` to bypass the cache.
+
+Resident server
+###############
+
+To avoid paying the start-up cost on every invocation, run the app as a server listening on a Unix domain socket and
+use the thin client to execute the commands. See :mod:`gallium.cli.daemon` for more information.
+
+.. code-block:: shell
+
+    python3 app.py --gallium-serve /tmp/app.sock --gallium-workers 4 --gallium-idle-timeout 600 &
+    python3 -m gallium.cli.client /tmp/app.sock set config --name panda
+
+Batch execution
+###############
+
+To run many command lines in one process, list them in a file (one command line per line) and run:
+
+.. code-block:: shell
+
+    python3 app.py --gallium-batch commands.txt --gallium-jobs 8
+
+See :mod:`gallium.cli.batch` for more information.
+
+Fan-out execution
+#################
+
+To run one command for many values of one parameter, e.g., over many files, in one process (instead of ``xargs -P``),
+give the parameter and the values (or the lines from the standard input if no values are given) after the command:
+
+.. code-block:: shell
+
+    python3 app.py images resize --width 100 --gallium-each path a.png b.png c.png
+    find . -name "*.png" | python3 app.py images resize --width 100 --gallium-each path --gallium-jobs 8 \\
+        --gallium-executor process --gallium-retries 2 --gallium-unordered
+
+The status of each value and the failures are reported to the standard error, like the batch execution.
+
+Asynchronous commands
+#####################
+
+A command can be a coroutine function or an asynchronous generator function. It runs on the event loop shared by all
+commands of the console, and the items yielded by an asynchronous generator are written to the output as they arrive.
+
+.. code-block:: python
+
+    console = Console(event_loop="uvloop", async_concurrency=16)
+
+    @console.command(["fetch"])
+    async def fetch(url: str):
+        ...
+
+See :mod:`gallium.cli.aio` for more information.
+
+Profiling
+#########
+
+Use ``--gallium-profile`` (or ``GALLIUM_PROFILE=text``) to print the time spent by phase, e.g., importing the modules,
+building the parsers, parsing the arguments and executing the command. To export the timings to your own metrics,
+register a callback.
+
+.. code-block:: python
+
+    @console.on_after_execute
+    def export_timings(command, params, timings):
+        metrics.record(" ".join(command.id), timings)
+
+See :mod:`gallium.cli.profiling` for more information.
+
+Streaming arguments
+###################
+
+The parameters annotated as ``Iterable[T]``, ``Iterator[T]`` or IO (e.g., ``TextIO``) take ``-`` for the standard
+input, or the path to the file (optionally prefixed with ``@``). The command receives a generator converting each line
+to ``T`` on demand, or the opened file, respectively.
+
+.. code-block:: python
+
+    @console.command(["users", "disable"])
+    def disable_users(ids: Iterable[int]):
+        for id in ids:
+            ...
+
+See :mod:`gallium.cli.streams` for more information.
+
+Pipelines
+#########
+
+The commands can be chained in one process with ``::``, where the return value of each command is given lazily, as
+it is (without serialization), to the first iterable parameter (e.g., ``Iterable[User]``) of the next command.
+
+.. code-block:: shell
+
+    python3 app.py list users :: enrich --source crm :: export
+
+or ``console.pipeline(["list users", "enrich --source crm", "export"])`` from Python.
+
+Structured output
+#################
+
+The console can write the return values of the commands with :class:`gallium.obj.encoder.ObjectEncoder` in
+``json``, ``jsonl``, ``yaml`` or ``table``. The generators are written record by record as they yield.
+
+.. code-block:: python
+
+    console = Console(output="jsonl")
+
+or use ``--gallium-output`` (or ``GALLIUM_OUTPUT``) to choose the format. See :mod:`gallium.cli.output` for more
+information.
+
+Shell completion
+################
+
+The console can write the command tree, the options and their types to an index file which the completion scripts for
+bash, zsh and fish read directly, without running the app. To install the completion, e.g., for bash, run:
+
+.. code-block:: shell
+
+    source <(python3 app.py --gallium-completion bash)
+
+The index is regenerated automatically when any of the command modules changes. See :mod:`gallium.cli.completion`
+for more information.
+
 """
 import importlib
 import inspect
+import io
 import logging
 import os
 import re
+import shlex
+import sys
+import threading
+import time
 from argparse import ArgumentParser
-from typing import List, Optional, Callable, Union, Any, Dict, Type
+from dataclasses import dataclass
+from typing import List, Optional, Callable, Union, Any, Dict, Type, Iterable, Tuple
 
 from imagination.debug import get_logger
 
-from gallium.obj.utils import is_optional, get_all_types
+from gallium.cli.cache import CommandCache, compute_fingerprint, get_cache_name, get_module_origin, \
+    is_type_resolvable, string_to_type, type_to_string
+from gallium.cli.completion import SHELLS, CompletionIndex, CompletionNode, get_default_index_dir, \
+    get_program_name, get_regeneration_command, render_script
+from gallium.cli.output import OUTPUT_FORMATS
+from gallium.cli.profiling import PROFILE_JSON, PROFILE_MODES, PROFILE_TEXT, PhaseTimer, TimedIterator, profile, \
+    report as report_profile
+from gallium.cli.streams import STREAM_ITERABLE, get_stream_kind, make_argument_type
+from gallium.obj.schema import registry as schema_registry
+
+
+PIPELINE_SEPARATOR = '::'
+""" The command line argument separating the stages of the pipeline """
+
+
+def split_pipeline(argv: List[str]) -> List[List[str]]:
+    """ Split the command line arguments into the stages of the pipeline """
+    stages: List[List[str]] = [list()]
+
+    for arg in argv:
+        if arg == PIPELINE_SEPARATOR:
+            stages.append(list())
+        else:
+            stages[-1].append(arg)
+
+    return stages
 
 
 class Command:
@@ -73,6 +265,10 @@ class Command:
     def callable(self) -> Callable:
         return self.__callable
 
+    @property
+    def module_name(self) -> str:
+        return self.__callable.__module__
+
     def __repr__(self):
         return f'{type(self).__name__}({self.__callable.__module__}.{self.__callable.__name__})'
 
@@ -80,14 +276,123 @@ class Command:
         return f'{type(self).__name__}({self.__callable.__module__}.{self.__callable.__name__})'
 
 
+class LazyCommand(Command):
+    """ Command Metadata with Deferred Import
+
+        The callable is referred by the import target (``module:function``) and only imported on the first access.
+    """
+    def __init__(self, id: List[str], target: str, description: Optional[str] = None):
+        if ':' not in target:
+            raise ValueError(f'The import target "{target}" must be in the format of "module:function".')
+
+        super().__init__(id, None, description)
+
+        self.__target = target
+        self.__callable: Optional[Callable] = None
+
+    @property
+    def target(self) -> str:
+        return self.__target
+
+    @property
+    def loaded(self) -> bool:
+        return self.__callable is not None
+
+    @property
+    def callable(self) -> Callable:
+        if self.__callable is None:
+            module_name, attribute_path = self.__target.split(':', 1)
+            obj = importlib.import_module(module_name)
+            for attribute_name in attribute_path.split('.'):
+                obj = getattr(obj, attribute_name)
+            self.__callable = obj
+        return self.__callable
+
+    @property
+    def module_name(self) -> str:
+        return self.__target.split(':', 1)[0]
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.__target})'
+
+    def __str__(self):
+        return f'{type(self).__name__}({self.__target})'
+
+
+@dataclass(frozen=True)
+class ArgumentSpec:
+    """ Command Line Argument Specification """
+    parameter_name: str
+    name: str
+    type: Type
+    required: bool
+    description: str
+    stream: Optional[str] = None
+    """ The kind of the stream (see :mod:`gallium.cli.streams`), in which case the type is of the items """
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(parameter_name=self.parameter_name,
+                    name=self.name,
+                    type=type_to_string(self.type),
+                    required=self.required,
+                    description=self.description,
+                    stream=self.stream)
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]):
+        return ArgumentSpec(parameter_name=data['parameter_name'],
+                            name=data['name'],
+                            type=string_to_type(data['type']),
+                            required=data['required'],
+                            description=data['description'],
+                            stream=data.get('stream'))
+
+
 class Console:
     """ Console (Argument Parser Wrapper) """
     __SPECIAL_PARSER_KEY_FOR_COMMAND = '_command'
 
-    def __init__(self):
+    def __init__(self,
+                 lazy_parser: Optional[bool] = None,
+                 cache_dir: Optional[str] = None,
+                 event_loop: Optional[str] = None,
+                 async_concurrency: Optional[int] = None,
+                 output: Optional[str] = None):
+        """
+        :param bool lazy_parser: Flag to only build the parsers along the command path given by the command line
+                                 arguments. If not specified, it is enabled by setting ``GALLIUM_LAZY_PARSER`` to
+                                 ``1`` or ``true``.
+        :param str cache_dir: The path to the directory for the command graph cache. If not specified, it is taken
+                              from ``GALLIUM_CACHE_DIR``. The cache is disabled if neither is given or
+                              ``GALLIUM_NO_CACHE`` is set to ``1`` or ``true``.
+        :param str event_loop: The event loop for the asynchronous commands, either ``asyncio`` or ``uvloop``. If not
+                               specified, it is taken from ``GALLIUM_EVENT_LOOP``.
+        :param int async_concurrency: The maximum number of the asynchronous commands running at the same time. If not
+                                      specified, it is taken from ``GALLIUM_ASYNC_CONCURRENCY``.
+        :param str output: The format to write the return values of the commands in, either ``json``, ``jsonl``,
+                           ``yaml`` or ``table``. If not specified, it is taken from ``GALLIUM_OUTPUT``. The return
+                           values are not written if neither is given. See :mod:`gallium.cli.output`.
+        """
         self.__commands: List[Command] = list()
         self.__log = get_logger(type(self).__name__, logging.DEBUG if os.getenv('GALLIUM_DEBUG') in ['1', 'true'] else logging.INFO)
         self.__activated = False
+        self.__lazy_parser = lazy_parser \
+            if lazy_parser is not None \
+            else os.getenv('GALLIUM_LAZY_PARSER') in ['1', 'true']
+        self.__cache_dir = None \
+            if os.getenv('GALLIUM_NO_CACHE') in ['1', 'true'] \
+            else (cache_dir or os.getenv('GALLIUM_CACHE_DIR'))
+        self.__fingerprint: Optional[str] = None
+        self.__event_loop = event_loop or os.getenv('GALLIUM_EVENT_LOOP')
+        self.__async_concurrency = async_concurrency or int(os.getenv('GALLIUM_ASYNC_CONCURRENCY') or 0) or None
+        self.__event_loop_runner = None
+        self.__event_loop_runner_lock = threading.Lock()
+        self.__before_execute_callbacks: List[Callable[[Command, Dict[str, Any]], None]] = list()
+        self.__after_execute_callbacks: List[Callable[[Command, Dict[str, Any], Dict[str, float]], None]] = list()
+        self.__cached_commands: Dict[str, Dict[str, Any]] = dict()
+        self.__cache_updated = False
+        self.__output = output or os.getenv('GALLIUM_OUTPUT')
+        self.__output_renderer = None
 
     def command(self, id: Union[None, str, List[str]] = None, description: Optional[str] = None):
         """ A decorator to define a command
@@ -108,35 +413,607 @@ class Console:
                                        (_func.__doc__ or '').lstrip()))
         return _func
 
+    def lazy_command(self, id: Union[str, List[str]], target: str, description: Optional[str] = None):
+        """ Define a command whose module is only imported when the command is invoked
+
+            :param id: The command ID
+            :param str target: The import target in the format of ``module:function``
+            :param description: The description of the command (as the callable is not imported for the help output)
+        """
+        actual_id = re.split(r'\s+', id) if isinstance(id, str) else id
+        self.__commands.append(LazyCommand(actual_id, target, (description or '').lstrip()))
+        return self
+
+    def load_manifest(self, manifest: Dict[str, Union[str, Dict[str, str]]]):
+        """ Define the lazy commands from the manifest
+
+            The manifest maps the command ID to either the import target or a dictionary with ``target`` and
+            optionally ``description``, for example:
+
+            .. code-block:: python
+
+                console.load_manifest({
+                    'db migrate': 'pkg.db:migrate',
+                    'db dump': {'target': 'pkg.db:dump', 'description': 'Dump the database'},
+                })
+        """
+        for id, definition in manifest.items():
+            if isinstance(definition, str):
+                self.lazy_command(id, definition)
+            else:
+                self.lazy_command(id, definition['target'], definition.get('description'))
+        return self
+
     def run_with(self, *import_paths):
         # To prevent multiple run when used with gallium.toolkit.docs.
         if self.__activated:
             return
         self.__activated = True
 
-        for import_path in import_paths:
-            importlib.import_module(import_path)
+        timer = PhaseTimer()
+
+        with timer.phase('import'):
+            for import_path in import_paths:
+                importlib.import_module(import_path)
+
+        options, argv = self.__parse_reserved_options(sys.argv[1:])
+
+        if options.gallium_output:
+            self.__output = options.gallium_output
+
+        if options.gallium_completion:
+            index_path = self.write_completion_index()
+            print(render_script(options.gallium_completion,
+                                get_program_name(),
+                                index_path,
+                                get_regeneration_command(index_path)))
+            return
+
+        if options.gallium_completion_index:
+            self.write_completion_index(options.gallium_completion_index)
+            return
+
+        if options.gallium_serve:
+            self.serve(options.gallium_serve,
+                       max_workers=options.gallium_workers,
+                       idle_timeout=options.gallium_idle_timeout)
+            return
+
+        if options.gallium_batch:
+            report = self.run_batch(options.gallium_batch,
+                                    jobs=options.gallium_jobs,
+                                    ordered=not options.gallium_unordered,
+                                    executor=options.gallium_executor,
+                                    retries=options.gallium_retries)
+            if not report.succeeded:
+                sys.exit(1)
+            return
+
+        if options.gallium_each:
+            parameter_name, *values = options.gallium_each
+            report = self.run_each(argv,
+                                   parameter_name,
+                                   values or sys.stdin,
+                                   jobs=options.gallium_jobs,
+                                   ordered=not options.gallium_unordered,
+                                   executor=options.gallium_executor,
+                                   retries=options.gallium_retries)
+            if not report.succeeded:
+                sys.exit(1)
+            return
+
+        profile_mode = options.gallium_profile_mode \
+            or (PROFILE_TEXT if options.gallium_profile else None) \
+            or os.getenv('GALLIUM_PROFILE')
+        profile_output_path = options.gallium_profile_output or os.getenv('GALLIUM_PROFILE_OUTPUT')
+
+        if not profile_mode:
+            self.__execute(argv, timer)
+            return
+
+        try:
+            self.__execute(argv, timer, profile_mode, profile_output_path)
+        finally:
+            # NOTE: The profile output is for the profiler in the cProfile and sampling modes.
+            report_profile(timer,
+                           profile_mode,
+                           profile_output_path if profile_mode == PROFILE_JSON else None)
+
+    def execute(self, argv: List[str]):
+        """ Parse the command line arguments (without the program name) and execute the command
+
+            The arguments may be of a pipeline, i.e., the stages separated by ``::``.
+
+            :return: the result of the (last) command
+        """
+        return self.__execute(argv, PhaseTimer())
+
+    def pipeline(self, stages: List[Union[str, List[str]]]):
+        """ Execute the commands as a pipeline in this process
+
+            The return value of each command is given lazily, as it is, to the first iterable parameter (e.g.,
+            ``Iterable[User]``) of the next command, which is not given in the command line arguments.
+
+            .. code-block:: python
+
+                console.pipeline(["list users", "enrich --source crm", "export"])
+
+            :param stages: The command lines (without the program name), either as the strings or the lists of the
+                           arguments
+            :return: the result of the last command
+        """
+        argv: List[str] = list()
+
+        for stage in stages:
+            if argv:
+                argv.append(PIPELINE_SEPARATOR)
+            argv.extend(shlex.split(stage) if isinstance(stage, str) else stage)
+
+        return self.execute(argv)
+
+    def on_before_execute(self, callback: Callable[[Command, Dict[str, Any]], None]):
+        """ Register the callback invoked right before executing a command
+
+            The callback receives the command and the parameters. This can be used as a decorator.
+        """
+        self.__before_execute_callbacks.append(callback)
+        return callback
+
+    def on_after_execute(self, callback: Callable[[Command, Dict[str, Any], Dict[str, float]], None]):
+        """ Register the callback invoked right after executing a command (even if the command fails)
+
+            The callback receives the command, the parameters and the elapsed time (in seconds) by phase. See
+            :mod:`gallium.cli.profiling` for the phases. This can be used as a decorator.
+
+            In a pipeline, ``execute`` is the time of the command on its own, excluding the time of the previous
+            command. The callback for the command in the middle which returns an iterator is invoked once the next
+            command has consumed the iterator.
+        """
+        self.__after_execute_callbacks.append(callback)
+        return callback
+
+    def serve(self, socket_path: str, max_workers: int = 4, idle_timeout: Optional[float] = None, auto_reload: bool = True):
+        """ Serve the commands from the resident process listening on the Unix domain socket
+
+            All commands are loaded and the whole parser tree is built before the server starts. Use the thin client
+            (:mod:`gallium.cli.client`) to execute the commands.
+
+            :param str socket_path: The path to the Unix domain socket
+            :param int max_workers: The maximum number of the concurrent requests
+            :param float idle_timeout: The number of seconds without any request before the server shuts down itself
+            :param bool auto_reload: Flag to restart the server when any of the command modules changes
+        """
+        from gallium.cli.daemon import CommandServer
+
+        parser = self.__build_parser()
+
+        CommandServer(socket_path,
+                      lambda argv: self.__execute_with(parser, argv),
+                      max_workers=max_workers,
+                      idle_timeout=idle_timeout,
+                      fingerprint=self.__compute_fingerprint if auto_reload else None).serve()
+
+    def run_batch(self,
+                  source: Union[str, Iterable[str]],
+                  jobs: Optional[int] = None,
+                  ordered: bool = True,
+                  executor: str = 'thread',
+                  retries: int = 0):
+        """ Execute the command lines from the source in this process
+
+            The whole parser tree is built once and reused for every line. See :mod:`gallium.cli.batch` for more
+            information.
+
+            :param source: The path to the batch file, ``-`` for the standard input, or an iterable of lines
+            :param int jobs: The number of the concurrent workers
+            :param bool ordered: Flag to write the output in the order of the lines
+            :param str executor: Either ``thread`` or ``process``
+            :param int retries: The number of the times to retry a failed line
+            :rtype: gallium.cli.batch.BatchReport
+        """
+        from gallium.cli.batch import BatchRunner
+
+        parser = self.__build_parser()
+
+        return BatchRunner(lambda argv: self.__execute_with(parser, argv),
+                           jobs=jobs,
+                           ordered=ordered,
+                           executor=executor,
+                           retries=retries).run(source)
+
+    def run_each(self,
+                 argv: List[str],
+                 parameter_name: str,
+                 values: Iterable[str],
+                 jobs: Optional[int] = None,
+                 ordered: bool = True,
+                 executor: str = 'thread',
+                 retries: int = 0):
+        """ Execute the command once per value of the parameter in this process
+
+            The command is resolved once. Then, the callable of the command is invoked with each value converted like
+            the command line argument, concurrently if ``jobs`` is greater than 1. The other arguments are parsed again
+            for each value so that each invocation reads its own streams, except the standard input, which is shared
+            by all invocations. The forked worker processes (with the ``process`` executor) inherit the imported
+            modules.
+
+            .. code-block:: python
+
+                console.run_each(["images", "resize", "--width", "100"], "path", ["a.png", "b.png"], jobs=8)
+
+            :param argv: The command line arguments (without the program name and the parameter)
+            :param str parameter_name: The name of the parameter, e.g., ``path`` or ``--max-size``
+            :param values: The values of the parameter, e.g., the lines from the standard input
+            :param int jobs: The number of the concurrent workers
+            :param bool ordered: Flag to write the output in the order of the values
+            :param str executor: Either ``thread`` or ``process``
+            :param int retries: The number of the times to retry a failed value
+            :rtype: gallium.cli.batch.BatchReport
+        """
+        from gallium.cli.batch import BatchRunner
+
         parser_map = dict()
         for command in self.__commands:
             self.__compute_graph(command, parser_map, command.id)
-        parser = ArgumentParser()
-        self.__initialize_parser(parser, parser_map)
-        args = parser.parse_args()
-
-        params = {
-            k: v
-            for k, v in vars(args).items()
-            if k not in ('func', 'origin_')
-        }
-
-        if hasattr(args, 'origin_'):
-            command: Command = args.origin_
-            self.__log.debug('command: %s -> %s (begin)', command, params)
-            command.callable(**params)
-            self.__log.debug('command: %s -> %s (end)', command, params)
-        else:
-            self.__log.error('Unable to process')
-            parser.print_help()
+
+        trail = self.__resolve_trail(parser_map, argv)
+        node = parser_map
+        for name in trail:
+            node = node[name]
+
+        command: Optional[Command] = node.get(self.__SPECIAL_PARSER_KEY_FOR_COMMAND)
+
+        if command is None:
+            ArgumentParser().error(f'Unknown command: {" ".join(argv)}')
+
+        cache = self.__load_cache()
+        argument_specs = self.__get_argument_specs(command)
+        self.__save_cache(cache)
+
+        parameter_name = re.sub('-', '_', parameter_name.lstrip('-'))
+        parser = ArgumentParser(prog=' '.join(command.id), description=command.description)
+        target_spec: Optional[ArgumentSpec] = None
+
+        for spec in argument_specs:
+            if spec.parameter_name == parameter_name:
+                target_spec = spec
+            else:
+                self.__define_argument(parser, spec)
+
+        if target_spec is None:
+            parser.error(f'Unknown parameter for --gallium-each: {parameter_name}')
+
+        base_argv = argv[len(trail):]
+        # NOTE: The other arguments are parsed up front so that the errors are reported before any item is executed.
+        self.__close_streams(vars(parser.parse_args(base_argv)))
+        convert = self.__get_argument_converter(target_spec)
+
+        def execute(item_argv: List[str]):
+            # The streams of the other arguments are consumed and closed by each item, so they are opened per item.
+            params = vars(parser.parse_args(base_argv))
+            params[target_spec.parameter_name] = convert(item_argv[0])
+
+            try:
+                return self.__run(command, params, PhaseTimer())
+            finally:
+                self.__close_streams(params)
+
+        return BatchRunner(execute,
+                           jobs=jobs,
+                           ordered=ordered,
+                           executor=executor,
+                           retries=retries).run_items(values)
+
+    def write_completion_index(self, path: Optional[str] = None) -> str:
+        """ Write the shell completion index
+
+            The index is only rewritten when the commands or their modules have changed since the last time.
+
+            :param str path: The path to the index. By default, it is in the cache directory of the console, or
+                             ``~/.cache/gallium`` if the cache is disabled.
+            :return: the path to the index
+        """
+        index = CompletionIndex(path or os.path.join(self.__cache_dir or get_default_index_dir(),
+                                                     f'{get_cache_name()}.completion'))
+        fingerprint = self.__compute_fingerprint()
+
+        if index.read_fingerprint() == fingerprint:
+            index.touch()
+            return index.path
+
+        parser_map = dict()
+        for command in self.__commands:
+            self.__compute_graph(command, parser_map, command.id)
+
+        cache = self.__load_cache()
+        nodes: List[CompletionNode] = list()
+        self.__describe_completion(parser_map, list(), nodes)
+        self.__save_cache(cache)
+
+        sources = [get_module_origin(command.module_name) for command in self.__commands]
+        if sys.argv and sys.argv[0]:
+            sources.append(os.path.abspath(sys.argv[0]))
+
+        index.write(fingerprint, [source for source in sources if source], nodes)
+
+        self.__log.debug(f'Completion: {index.path} ({len(nodes)} node(s))')
+
+        return index.path
+
+    def __describe_completion(self, parser_map: Dict[str, Any], trail: List[str], nodes: List[CompletionNode]):
+        """ Describe the command tree for the completion index (in the depth-first order) """
+        command: Optional[Command] = parser_map.get(self.__SPECIAL_PARSER_KEY_FOR_COMMAND)
+        node = CompletionNode(trail, command.description if command else None)
+        node.children.extend(name for name in parser_map if name != self.__SPECIAL_PARSER_KEY_FOR_COMMAND)
+        node.options.append(('--help', 'bool', 'show this help message and exit'))
+
+        if command:
+            node.options.extend((spec.name, type_to_string(spec.type), spec.description)
+                                for spec in self.__get_argument_specs(command)
+                                if spec.name.startswith('-'))
+
+        nodes.append(node)
+
+        for name in node.children:
+            self.__describe_completion(parser_map[name], trail + [name], nodes)
+
+    def __parse_reserved_options(self, argv: List[str]):
+        """ Separate the reserved options (``--gallium-*``) from the command line arguments """
+        parser = ArgumentParser(add_help=False, allow_abbrev=False)
+        parser.add_argument('--gallium-serve', metavar='SOCKET_PATH')
+        parser.add_argument('--gallium-workers', type=int, default=4)
+        parser.add_argument('--gallium-idle-timeout', type=float)
+        parser.add_argument('--gallium-batch', metavar='FILE')
+        parser.add_argument('--gallium-jobs', type=int)
+        parser.add_argument('--gallium-unordered', action='store_true')
+        parser.add_argument('--gallium-executor', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--gallium-retries', type=int, default=0)
+        parser.add_argument('--gallium-each', nargs='+', metavar=('PARAMETER', 'VALUE'))
+        # NOTE: The mode is a separate option as an optional value would take the command as the mode.
+        parser.add_argument('--gallium-profile', action='store_true')
+        parser.add_argument('--gallium-profile-mode', choices=PROFILE_MODES)
+        parser.add_argument('--gallium-profile-output', metavar='PATH')
+        parser.add_argument('--gallium-output', choices=OUTPUT_FORMATS)
+        parser.add_argument('--gallium-completion', choices=SHELLS)
+        parser.add_argument('--gallium-completion-index', metavar='PATH')
+
+        return parser.parse_known_args(argv)
+
+    def __execute(self,
+                  argv: List[str],
+                  timer: PhaseTimer,
+                  profile_mode: Optional[str] = None,
+                  profile_output_path: Optional[str] = None):
+        return self.__execute_with(self.__build_parser(argv, timer), argv, timer, profile_mode, profile_output_path)
+
+    def __build_parser(self, argv: Optional[List[str]] = None, timer: Optional[PhaseTimer] = None) -> ArgumentParser:
+        """ Build the parser tree
+
+            :param argv: The command line arguments to build the parsers for (if the lazy parser construction is
+                         enabled). If not given, the whole tree is built.
+        """
+        timer = timer or PhaseTimer()
+
+        with timer.phase('graph'):
+            parser_map = dict()
+            for command in self.__commands:
+                self.__compute_graph(command, parser_map, command.id)
+
+        with timer.phase('parser'):
+            # NOTE: The lazy commands always require the lazy parser construction as otherwise all of them are imported.
+            lazy_parser = argv is not None \
+                and (self.__lazy_parser or any(isinstance(command, LazyCommand) for command in self.__commands))
+            cache = self.__load_cache()
+            parser = ArgumentParser()
+            self.__initialize_parser(parser,
+                                     parser_map,
+                                     target_trails=[self.__resolve_trail(parser_map, stage_argv)
+                                                    for stage_argv in split_pipeline(argv)] if lazy_parser else None)
+            self.__save_cache(cache)
+
+        return parser
+
+    def __execute_with(self,
+                       parser: ArgumentParser,
+                       argv: List[str],
+                       timer: Optional[PhaseTimer] = None,
+                       profile_mode: Optional[str] = None,
+                       profile_output_path: Optional[str] = None):
+        """ Parse the command line arguments and execute the command, or the commands of the pipeline
+
+            The stages of the pipeline are separated by ``::``. The return value of each command is given to the first
+            iterable parameter of the next command, and the last command is executed like a single command. The files
+            opened for the IO parameters of all stages are closed once the last command returns.
+
+            :return: the result of the (last) command
+        """
+        timer = timer or PhaseTimer()
+        stages = split_pipeline(argv)
+        parsed_stages: List[Tuple[Command, Dict[str, Any], Optional[ArgumentSpec]]] = list()
+        timed_results: List[TimedIterator] = list()
+        result = None
+
+        try:
+            # NOTE: All stages are parsed and validated before any command is executed.
+            for stage_index, stage_argv in enumerate(stages):
+                with timer.phase('parse'):
+                    args = parser.parse_args(stage_argv)
+
+                params = {
+                    k: v
+                    for k, v in vars(args).items()
+                    if k not in ('func', 'origin_', 'piped_')
+                }
+
+                if not hasattr(args, 'origin_'):
+                    self.__close_streams(params)
+                    self.__log.error('Unable to process')
+                    parser.print_help()
+                    return None
+
+                command: Command = args.origin_
+                piped_spec: Optional[ArgumentSpec] = getattr(args, 'piped_', None)
+                parsed_stages.append((command, params, piped_spec))
+
+                if stage_index > 0:
+                    if piped_spec is None:
+                        parser.error(f'{" ".join(command.id)}: no iterable parameter to take the output of '
+                                     f'{" ".join(stages[stage_index - 1])}')
+                    elif params.get(piped_spec.parameter_name) is not None:
+                        parser.error(f'{" ".join(command.id)}: {piped_spec.name} is given by the output of '
+                                     f'{" ".join(stages[stage_index - 1])} and cannot be given explicitly')
+                elif piped_spec and piped_spec.required and params.get(piped_spec.parameter_name) is None:
+                    parser.error(f'{" ".join(command.id)}: the following arguments are required: {piped_spec.name}')
+
+            for stage_index, (command, params, piped_spec) in enumerate(parsed_stages):
+                if stage_index > 0:
+                    params[piped_spec.parameter_name] = self.__to_iterable(result)
+
+                result = self.__run(command, params, timer, profile_mode, profile_output_path,
+                                    emit=stage_index == len(stages) - 1,
+                                    drain=len(stages) > 1,
+                                    upstream=timed_results[-1] if timed_results else None)
+
+                if isinstance(result, TimedIterator):
+                    timed_results.append(result)
+        finally:
+            # NOTE: The iterators which are not exhausted, e.g., by a command stopping early, are closed here.
+            for timed_result in timed_results:
+                timed_result.close()
+
+            for _, params, _ in parsed_stages:
+                self.__close_streams(params)
+
+        return result
+
+    def __run(self,
+              command: Command,
+              params: Dict[str, Any],
+              timer: PhaseTimer,
+              profile_mode: Optional[str] = None,
+              profile_output_path: Optional[str] = None,
+              emit: bool = True,
+              drain: bool = False,
+              upstream: Optional[TimedIterator] = None):
+        """ Execute the command with the callbacks
+
+            :param upstream: The iterator returned by the previous command in the pipeline, if it is timed
+        """
+        self.__log.debug('command: %s -> %s (begin)', command, params)
+
+        for callback in self.__before_execute_callbacks:
+            callback(command, params)
+
+        started_at = time.perf_counter()
+
+        try:
+            with timer.phase('execute'), profile(profile_mode, profile_output_path):
+                result = self.__invoke(command, params, emit, drain)
+        except BaseException:
+            self.__notify_after_execute(command, params, timer, time.perf_counter() - started_at, upstream)
+            raise
+
+        elapsed_time = time.perf_counter() - started_at
+
+        if not emit and hasattr(result, '__next__'):
+            # The iterator is only executed as the next command consumes it, so the callbacks are deferred until then.
+            self.__log.debug('command: %s -> %s (deferred)', command, params)
+
+            return TimedIterator(result,
+                                 lambda consumed_time: self.__notify_after_execute(command,
+                                                                                   params,
+                                                                                   timer,
+                                                                                   elapsed_time + consumed_time,
+                                                                                   upstream))
+
+        self.__notify_after_execute(command, params, timer, elapsed_time, upstream)
+        self.__log.debug('command: %s -> %s (end)', command, params)
+
+        return result
+
+    def __notify_after_execute(self,
+                               command: Command,
+                               params: Dict[str, Any],
+                               timer: PhaseTimer,
+                               elapsed_time: float,
+                               upstream: Optional[TimedIterator]):
+        # NOTE: The time spent in the previous command while this command consumes it is excluded.
+        timings = dict(timer.timings, execute=elapsed_time - (upstream.elapsed if upstream is not None else 0.0))
+
+        for callback in self.__after_execute_callbacks:
+            callback(command, params, timings)
+
+    def __invoke(self, command: Command, params: Dict[str, Any], emit: bool = True, drain: bool = False):
+        """ Invoke the command
+
+            The coroutine is run on the shared event loop while the items from the asynchronous iterator are written
+            to the standard output as they arrive. If the output format is set, the return value is written in that
+            format.
+
+            :param bool emit: Flag to write the return value. Otherwise, e.g., for the command in the middle of the
+                              pipeline, the asynchronous iterator is returned as an iterator.
+            :param bool drain: Flag to also write the items of the returned iterator (without the output format),
+                               e.g., for the last command of the pipeline, which consumes the whole pipeline.
+        """
+        result = command.callable(**params)
+
+        if inspect.isawaitable(result):
+            result = self.__get_event_loop_runner().run(result)
+        elif hasattr(result, '__anext__'):
+            result = self.__get_event_loop_runner().iterate(result)
+
+            if emit and not self.__output:
+                for item in result:
+                    print(item, flush=True)
+                return None
+
+        if not emit:
+            return result
+
+        if self.__output:
+            self.__get_output_renderer().render(result)
+        elif drain and hasattr(result, '__next__'):
+            for item in result:
+                print(item, flush=True)
+            return None
+
+        return result
+
+    @staticmethod
+    def __to_iterable(result: Any) -> Iterable:
+        """ Get the items from the return value of the previous command in the pipeline """
+        if result is None:
+            return iter(())
+
+        if isinstance(result, (str, bytes, dict)) or not hasattr(result, '__iter__'):
+            return iter((result,))
+
+        return result
+
+    def __get_output_renderer(self):
+        from gallium.cli.output import OutputRenderer
+
+        if self.__output_renderer is None or self.__output_renderer.format != self.__output:
+            self.__output_renderer = OutputRenderer(self.__output)
+
+        return self.__output_renderer
+
+    @staticmethod
+    def __close_streams(params: Dict[str, Any]):
+        """ Close the files opened for the IO parameters (but not the standard input) """
+        for value in params.values():
+            if isinstance(value, io.IOBase) and value is not sys.stdin and value is not sys.stdin.buffer:
+                value.close()
+
+    def __get_event_loop_runner(self):
+        from gallium.cli.aio import EventLoopRunner, get_loop_factory
+
+        with self.__event_loop_runner_lock:
+            if self.__event_loop_runner is None:
+                self.__event_loop_runner = EventLoopRunner(get_loop_factory(self.__event_loop),
+                                                           self.__async_concurrency)
+
+        return self.__event_loop_runner
 
     def __compute_graph(self, command, node: Dict[str, Any], id_trail: List[str]):
         command_block_name = id_trail[0]
@@ -151,7 +1028,28 @@ class Console:
         else:
             self.__compute_graph(command, node[command_block_name], id_trail[1:])
 
-    def __initialize_parser(self, parser: ArgumentParser, parser_map: Dict[str, Any], prefix_trail: Optional[List[str]] = None):
+    def __resolve_trail(self, parser_map: Dict[str, Any], argv: List[str]) -> List[str]:
+        """ Resolve the command path from the command line arguments without building any parsers. """
+        trail = list()
+        node = parser_map
+        for token in argv:
+            if token == self.__SPECIAL_PARSER_KEY_FOR_COMMAND or token not in node:
+                break
+            trail.append(token)
+            node = node[token]
+        return trail
+
+    def __initialize_parser(self,
+                            parser: ArgumentParser,
+                            parser_map: Dict[str, Any],
+                            prefix_trail: Optional[List[str]] = None,
+                            target_trails: Optional[List[List[str]]] = None):
+        """ Initialize the parser tree
+
+            :param target_trails: The command paths to build, e.g., one per stage of the pipeline. When given, only the
+                                  parsers along these paths are fully initialized while the other sub-commands are
+                                  registered by name (for the help output). Otherwise, the whole tree is built.
+        """
         prefix_trail = prefix_trail or list()
 
         self.__log.debug(f"Initializing parser ({' '.join(prefix_trail)})")
@@ -161,58 +1059,149 @@ class Console:
             # Define the registered command
             command: Command = parser_map[self.__SPECIAL_PARSER_KEY_FOR_COMMAND]
             parser.description = command.description
-            parser.set_defaults(
-                origin_=command,
-                func=command.callable
-            )
+            parser.set_defaults(origin_=command)
             self.__define_arguments(parser, command)
         else:
             self.__log.debug(f"Set the default command ({' '.join(prefix_trail)})")
             # Define the default command (to provide sublisting)
             parser.set_defaults(func=lambda: self.__print_help_by_default(parser))
 
-        if not parser_map:
+        # NOTE: A command without any sub-commands must not have the sub-parsers, which take a positional argument.
+        if not any(name != self.__SPECIAL_PARSER_KEY_FOR_COMMAND for name in parser_map):
             return
 
         subparsers = parser.add_subparsers()
 
         for sub_command_name, subparser_map in parser_map.items():
-            if sub_command_name != self.__SPECIAL_PARSER_KEY_FOR_COMMAND:
-                self.__log.debug(f'Traversing downward ({sub_command_name})')
-                self.__initialize_parser(
-                    subparsers.add_parser(sub_command_name),
-                    subparser_map,
-                    prefix_trail + [sub_command_name]
-                )
+            if sub_command_name == self.__SPECIAL_PARSER_KEY_FOR_COMMAND:
+                continue
+
+            # NOTE: The description is from the command itself, so the lazy command is listed without being imported.
+            sub_command: Optional[Command] = subparser_map.get(self.__SPECIAL_PARSER_KEY_FOR_COMMAND)
+            subparser = subparsers.add_parser(sub_command_name,
+                                              help=(sub_command.description or '').split('\n')[0] or None
+                                              if sub_command is not None
+                                              else None)
+
+            if target_trails is not None and not any(trail and trail[0] == sub_command_name for trail in target_trails):
+                # Only register the name as this sub-command is not going to be invoked.
+                continue
+
+            self.__log.debug(f'Traversing downward ({sub_command_name})')
+            self.__initialize_parser(
+                subparser,
+                subparser_map,
+                prefix_trail + [sub_command_name],
+                [trail[1:] for trail in target_trails if trail and trail[0] == sub_command_name]
+                if target_trails is not None
+                else None
+            )
 
     def __print_help_by_default(self, parser: ArgumentParser):
         self.__log.warning("Unable to execute command")
         parser.print_help()
 
+    def __compute_fingerprint(self) -> str:
+        return compute_fingerprint([command.module_name for command in self.__commands],
+                                   [f'{" ".join(command.id)}={command}:{command.description}'
+                                    for command in self.__commands])
+
+    def __load_cache(self) -> Optional[CommandCache]:
+        if not self.__cache_dir:
+            return None
+
+        cache = CommandCache(self.__cache_dir)
+        self.__fingerprint = self.__compute_fingerprint()
+        self.__cached_commands = cache.load(self.__fingerprint)
+        self.__cache_updated = False
+
+        self.__log.debug(f'Cache: {cache.path} ({len(self.__cached_commands)} command(s))')
+
+        return cache
+
+    def __save_cache(self, cache: Optional[CommandCache]):
+        if not cache or not self.__cache_updated:
+            return
+
+        try:
+            cache.save(self.__fingerprint, self.__cached_commands)
+        except OSError as e:
+            self.__log.debug(f'Cache: Unable to write to {cache.path} ({e})')
+
     def __define_arguments(self, parser: ArgumentParser, command: Command):
-        """ Define the command line argument based on the reflection of the callable.
+        """ Define the command line argument based on the reflection of the callable (or the cache).
 
             .. warning:: This does not support instance methods at the moment.
         """
+        argument_specs = self.__get_argument_specs(command)
+        # The first iterable parameter receives the output of the previous command in the pipeline.
+        piped_spec = next((spec for spec in argument_specs if spec.stream == STREAM_ITERABLE), None)
+
+        for argument_spec in argument_specs:
+            self.__define_argument(parser, argument_spec, argument_spec is piped_spec)
+
+        if piped_spec:
+            parser.set_defaults(piped_=piped_spec)
+
+    def __get_argument_specs(self, command: Command) -> List[ArgumentSpec]:
+        """ Get the argument specifications from the cache or the reflection of the callable """
+        command_name = ' '.join(command.id)
+        cached_command = self.__cached_commands.get(command_name)
+
+        if cached_command is not None:
+            try:
+                argument_specs = [ArgumentSpec.from_dict(data) for data in cached_command['arguments']]
+                self.__log.debug(f'C[{command_name}]: Use the cached argument specs')
+                return argument_specs
+            except (ImportError, AttributeError, KeyError, TypeError, ValueError) as e:
+                # NOTE: The cache must never break the command, e.g., when a type is moved or renamed.
+                self.__log.debug(f'C[{command_name}]: Unable to use the cached argument specs ({e})')
+                del self.__cached_commands[command_name]
+                self.__cache_updated = True
+
         signature = inspect.signature(command.callable)
-        for parameter_name, parameter in signature.parameters.items():
-            self.__define_argument(parser, ' '.join(command.id), parameter_name, parameter)
+        argument_specs = [
+            self.__describe_argument(command_name, parameter_name, parameter)
+            for parameter_name, parameter in signature.parameters.items()
+        ]
+
+        if all(is_type_resolvable(spec.type) for spec in argument_specs):
+            self.__cached_commands[command_name] = dict(id=command.id,
+                                                        description=command.description,
+                                                        arguments=[spec.to_dict() for spec in argument_specs])
+            self.__cache_updated = True
+        else:
+            self.__log.debug(f'C[{command_name}]: Not cached as some types cannot be resolved by reference')
+
+        return argument_specs
 
-    def __define_argument(self, parser: ArgumentParser, command_name: str, parameter_name: str, parameter: inspect.Parameter):
-        """ Define the command line argument according to the given parameter
+    def __describe_argument(self, command_name: str, parameter_name: str, parameter: inspect.Parameter) -> ArgumentSpec:
+        """ Describe the command line argument according to the given parameter
 
             .. warning:: This is still incomplete in term of handling any combination of type hints.
         """
         required = True
         annotation = parameter.annotation
-        parameter_type = get_all_types(annotation)[0]
+        type_spec = schema_registry.describe(annotation)
+        parameter_type = type_spec.types[0]
+        # NOTE: The stream may be annotated directly, e.g., Iterable[int], or as optional, e.g., Optional[TextIO].
+        stream_kind = get_stream_kind(parameter_type if type_spec.optional else annotation)
 
-        # Determine whether the parameter is option.
-        if hasattr(annotation, "__origin__"):
-            annotated_type = getattr(annotation, "__origin__")
-            required = is_optional(annotated_type)
+        if stream_kind:
+            # The stream is only optional when it is annotated as such, e.g., Optional[Iterable[int]].
+            required = not type_spec.optional
+            stream, parameter_type = stream_kind
+            content = f"{stream} of {parameter_type.__name__}" if stream == STREAM_ITERABLE else f"{stream} stream"
+            description = f"({content} from -, PATH or @PATH) {re.sub('_+', ' ', parameter_name)}"
+        else:
+            stream = None
+
+            # Determine whether the parameter is option.
+            if hasattr(annotation, "__origin__"):
+                annotated_type = getattr(annotation, "__origin__")
+                required = schema_registry.describe(annotated_type).optional
 
-        description = f"({parameter_type.__name__}) {re.sub('_+', ' ', parameter_name)}"
+            description = f"({parameter_type.__name__}) {re.sub('_+', ' ', parameter_name)}"
 
         name = (
             parameter_name
@@ -222,10 +1211,39 @@ class Console:
 
         self.__log.debug(f'C[{command_name}]: Argument: {dict(name=name, type=parameter_type, required=required, help=description)}')
 
-        if parameter_type == bool:
-            parser.add_argument(name, required=False, help=description, action='store_true')
+        return ArgumentSpec(parameter_name=parameter_name,
+                            name=name,
+                            type=parameter_type,
+                            required=required,
+                            description=description,
+                            stream=stream)
+
+    @staticmethod
+    def __get_argument_converter(spec: ArgumentSpec) -> Callable[[str], Any]:
+        """ Get the function converting the command line argument like the parser does """
+        if spec.stream:
+            return make_argument_type(spec.stream, spec.type)
+
+        if spec.type == bool:
+            return lambda value: value.lower() in ('1', 'true', 'yes', 'on')
+
+        return spec.type
+
+    def __define_argument(self, parser: ArgumentParser, spec: ArgumentSpec, piped: bool = False):
+        """ Define the command line argument according to the given specification
+
+            :param bool piped: Flag whether the argument may be given by the previous command in the pipeline, in
+                               which case the positional argument is only checked after parsing.
+        """
+        if spec.stream:
+            parser.add_argument(spec.name,
+                                type=make_argument_type(spec.stream, spec.type),
+                                help=spec.description,
+                                **(dict(nargs='?') if piped and not spec.name.startswith('-') else dict()))
+        elif spec.type == bool:
+            parser.add_argument(spec.name, required=False, help=spec.description, action='store_true')
         else:
-            parser.add_argument(name, type=parameter_type, help=description)
+            parser.add_argument(spec.name, type=spec.type, help=spec.description)
 
 
 console: Console = Console()
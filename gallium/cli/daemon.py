@@ -0,0 +1,246 @@
+"""
+This module provides the resident server for :class:`gallium.cli.core.Console`.
+
+The server keeps the process warm, i.e., all command modules are imported and the parser graph is built once, and
+listens on a Unix domain socket. For each request from the thin client (:mod:`gallium.cli.client`), the server forks
+the warm process, which then adopts the working directory, the environment variables and the standard streams of the
+client before executing the command. The exit code of the command is sent back to the client.
+
+The requests are received and the process is forked by the thread accepting the connections only, so that the child
+process never inherits a lock held by another thread. The other threads only wait for the child processes and send
+the exit codes back.
+
+Quick start
+###########
+
+.. code-block:: shell
+
+    python3 app.py --gallium-serve /tmp/app.sock &
+    python3 -m gallium.cli.client /tmp/app.sock set config --name panda
+
+.. note:: This only works on POSIX systems.
+"""
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, List, Optional
+
+from imagination.debug import get_logger
+
+from gallium.cli.client import FORWARDED_FDS, STATUS_EXIT, STATUS_RELOAD, receive_message, send_message
+
+REQUEST_TIMEOUT = 10.0
+""" The maximum number of seconds to receive the request after the connection is accepted """
+
+
+class CommandServer:
+    """ Resident Command Server """
+
+    def __init__(self,
+                 socket_path: str,
+                 handler: Callable[[List[str]], Any],
+                 max_workers: int = 4,
+                 idle_timeout: Optional[float] = None,
+                 fingerprint: Optional[Callable[[], str]] = None,
+                 poll_interval: float = 1.0):
+        """
+        :param str socket_path: The path to the Unix domain socket
+        :param handler: The callable executing the command line arguments (without the program name) in the forked
+                        process
+        :param int max_workers: The maximum number of the concurrent requests, i.e., the running commands
+        :param float idle_timeout: The number of seconds without any request before the server shuts down itself
+        :param fingerprint: The callable returning the fingerprint of the source modules. When given, the server
+                            restarts itself once the fingerprint changes.
+        :param float poll_interval: The interval (in seconds) to check the idle timeout and the fingerprint
+        """
+        self.__socket_path = socket_path
+        self.__handler = handler
+        self.__max_workers = max_workers
+        self.__idle_timeout = idle_timeout
+        self.__fingerprint = fingerprint
+        self.__poll_interval = poll_interval
+        self.__log = get_logger(type(self).__name__, logging.DEBUG if os.getenv('GALLIUM_DEBUG') in ['1', 'true'] else logging.INFO)
+        self.__active_request_count = 0
+        self.__last_activity = time.monotonic()
+        # Guard the request count, which is decreased by the threads waiting for the child processes.
+        self.__condition = threading.Condition()
+
+    def serve(self):
+        """ Serve the requests until the server is idle for too long or needs to reload """
+        initial_fingerprint = self.__fingerprint() if self.__fingerprint else None
+        reload_required = False
+
+        with self.__bind() as server_socket:
+            server_socket.settimeout(self.__poll_interval)
+            self.__log.info(f'Listening at {self.__socket_path}')
+
+            while True:
+                with self.__condition:
+                    if self.__active_request_count >= self.__max_workers:
+                        # The pending connections wait in the backlog until one of the commands exits.
+                        self.__condition.wait(self.__poll_interval)
+                        continue
+
+                try:
+                    connection, _ = server_socket.accept()
+                except socket.timeout:
+                    connection = None
+
+                if self.__fingerprint and self.__fingerprint() != initial_fingerprint:
+                    self.__log.info('The source has changed.')
+                    reload_required = True
+
+                    if connection is not None:
+                        self.__reject_for_reload(connection)
+
+                    break
+
+                if connection is None:
+                    if self.__is_idle():
+                        self.__log.info('Idle timeout')
+                        break
+                    continue
+
+                self.__handle(connection)
+
+            # Stop accepting new requests before the in-flight requests are done.
+            server_socket.close()
+
+            with self.__condition:
+                while self.__active_request_count:
+                    self.__condition.wait()
+
+        if os.path.exists(self.__socket_path):
+            os.unlink(self.__socket_path)
+
+        if reload_required:
+            self.__log.info('Reloading...')
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    def __bind(self) -> socket.socket:
+        if os.path.exists(self.__socket_path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(self.__socket_path)
+                except OSError:
+                    # The socket is stale.
+                    os.unlink(self.__socket_path)
+                else:
+                    raise RuntimeError(f'Another server is already listening at {self.__socket_path}.')
+
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server_socket.bind(self.__socket_path)
+        server_socket.listen(self.__max_workers * 4)
+
+        return server_socket
+
+    def __is_idle(self) -> bool:
+        if self.__idle_timeout is None:
+            return False
+
+        with self.__condition:
+            return self.__active_request_count == 0 \
+                   and time.monotonic() - self.__last_activity > self.__idle_timeout
+
+    def __reject_for_reload(self, connection: socket.socket):
+        with connection:
+            try:
+                _, fds = receive_message(connection, len(FORWARDED_FDS))
+                for fd in fds:
+                    os.close(fd)
+                send_message(connection, dict(status=STATUS_RELOAD))
+            except OSError:
+                pass
+
+    def __handle(self, connection: socket.socket):
+        """ Receive the request and fork the process executing the command """
+        fds: List[int] = list()
+
+        try:
+            connection.settimeout(REQUEST_TIMEOUT)
+            message, fds = receive_message(connection, len(FORWARDED_FDS))
+
+            if message is None or len(fds) != len(FORWARDED_FDS):
+                self.__log.warning('Received an incomplete request')
+                connection.close()
+                return
+
+            self.__log.debug(f'Request: {message["argv"]}')
+
+            pid = self.__fork(message, fds)
+        except Exception:
+            self.__log.error(f'Unable to handle the request\n{traceback.format_exc()}')
+            connection.close()
+            return
+        finally:
+            # The child process has its own copies of the standard streams of the client.
+            for fd in fds:
+                os.close(fd)
+
+        with self.__condition:
+            self.__active_request_count += 1
+            self.__last_activity = time.monotonic()
+
+        threading.Thread(target=self.__reply, args=(connection, pid), daemon=True).start()
+
+    def __fork(self, message, fds: List[int]) -> int:
+        # Flush the buffered output of the server before forking so that it is not written by the child process.
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+
+        if pid == 0:
+            self.__execute_in_child_process(message, fds)
+
+        return pid
+
+    def __reply(self, connection: socket.socket, pid: int):
+        """ Wait for the child process and send the exit code back to the client """
+        try:
+            with connection:
+                _, status = os.waitpid(pid, 0)
+                exit_code = 128 + os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+                send_message(connection, dict(status=STATUS_EXIT, code=exit_code))
+        except OSError:
+            # The client has gone away.
+            pass
+        finally:
+            with self.__condition:
+                self.__active_request_count -= 1
+                self.__last_activity = time.monotonic()
+                self.__condition.notify_all()
+
+    def __execute_in_child_process(self, message, fds: List[int]):
+        exit_code = 0
+
+        try:
+            for target_fd, client_fd in zip(FORWARDED_FDS, fds):
+                os.dup2(client_fd, target_fd)
+
+            os.chdir(message['cwd'])
+            os.environ.clear()
+            os.environ.update(message['env'])
+            sys.argv = sys.argv[:1] + message['argv']
+
+            self.__handler(message['argv'])
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                sys.stderr.write(f'{e.code}\n')
+                exit_code = 1
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                # Bypass the clean-up of the server process.
+                os._exit(exit_code)
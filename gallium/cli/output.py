@@ -0,0 +1,232 @@
+"""
+This module provides the structured output of the return values of the commands for
+:class:`gallium.cli.core.Console`.
+
+.. code-block:: python
+
+    console = Console(output="table")  # or GALLIUM_OUTPUT=table
+
+    @console.command(["users", "list"])
+    def list_users():
+        for user in repository.find_all():
+            yield user  # Each record is written as soon as it is yielded.
+
+.. code-block:: shell
+
+    python3 app.py users list --gallium-output jsonl
+
+The return value is encoded with :class:`gallium.obj.encoder.ObjectEncoder` and written in one of the formats:
+
+* ``json``: one JSON document, where an iterable is written as an array item by item,
+* ``jsonl``: one item of the iterable (or the value itself) per line (JSON Lines),
+* ``yaml``: one YAML document, where an iterable is written as a sequence item by item (requires ``pyyaml``),
+* ``table``: a plain text table with the keys of the records as the columns. The column widths are measured on the
+  first :data:`TABLE_SAMPLE_SIZE` records.
+
+A generator (or any other iterator) is consumed lazily and the records are written through a buffered writer which
+flushes once the buffer is full or :data:`FLUSH_INTERVAL` seconds have passed since the last flush, and right after
+the first record so that the first results appear immediately. The buffered records are also flushed by a timer, so
+they appear on time even when the generator is slow to yield the next one. ``None`` is not written.
+"""
+import importlib
+import itertools
+import json
+import sys
+import threading
+import time
+from typing import Any, Iterable, Iterator, List, Optional, TextIO
+
+OUTPUT_JSON = 'json'
+OUTPUT_JSON_LINES = 'jsonl'
+OUTPUT_YAML = 'yaml'
+OUTPUT_TABLE = 'table'
+OUTPUT_FORMATS = (OUTPUT_JSON, OUTPUT_JSON_LINES, OUTPUT_YAML, OUTPUT_TABLE)
+
+BUFFER_SIZE = 65536
+FLUSH_INTERVAL = 0.5
+TABLE_SAMPLE_SIZE = 100
+
+
+class BufferedWriter:
+    """ Text Writer Flushing by Size and Time """
+
+    def __init__(self, fp: TextIO, buffer_size: int = BUFFER_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        """
+        :param fp: The file object to write to
+        :param int buffer_size: The number of the characters to buffer before writing to the file
+        :param float flush_interval: The maximum number of seconds to hold the buffered output
+        """
+        self.__fp = fp
+        self.__buffer_size = buffer_size
+        self.__flush_interval = flush_interval
+        self.__buffer: List[str] = list()
+        self.__buffered_size = 0
+        # NOTE: The first write is flushed immediately.
+        self.__last_flushed_at = 0.0
+        # The timer flushing the buffer once the interval has passed, which is armed while the buffer is not empty.
+        self.__timer: Optional[threading.Timer] = None
+        self.__lock = threading.Lock()
+
+    def write(self, text: str):
+        with self.__lock:
+            self.__buffer.append(text)
+            self.__buffered_size += len(text)
+
+            elapsed_time = time.monotonic() - self.__last_flushed_at
+
+            if self.__buffered_size >= self.__buffer_size or elapsed_time >= self.__flush_interval:
+                self.__flush()
+            elif self.__timer is None:
+                self.__timer = threading.Timer(self.__flush_interval - elapsed_time, self.__flush_on_timer)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def flush(self):
+        """ Write the buffered text to the file, which also stops the timer """
+        with self.__lock:
+            self.__flush()
+
+    def __flush_on_timer(self):
+        with self.__lock:
+            self.__timer = None
+
+            if self.__buffer:
+                self.__flush()
+
+    def __flush(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        if self.__buffer:
+            self.__fp.write(''.join(self.__buffer))
+            self.__buffer.clear()
+            self.__buffered_size = 0
+
+        self.__fp.flush()
+        self.__last_flushed_at = time.monotonic()
+
+
+class OutputRenderer:
+    """ Renderer of the Return Values """
+
+    def __init__(self,
+                 format: str,
+                 encoder=None,
+                 buffer_size: int = BUFFER_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        """
+        :param str format: Either ``json``, ``jsonl``, ``yaml`` or ``table``
+        :param encoder: The object encoder (:class:`gallium.obj.encoder.ObjectEncoder`)
+        :param int buffer_size: The number of the characters to buffer before writing to the output
+        :param float flush_interval: The maximum number of seconds to hold the buffered output
+        """
+        if format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown output format: {format}')
+
+        if encoder is None:
+            # NOTE: The encoder is imported on demand to keep it out of the start-up of the console.
+            from gallium.obj.encoder import ObjectEncoder
+            encoder = ObjectEncoder.build()
+
+        self.__format = format
+        self.__encoder = encoder
+        self.__buffer_size = buffer_size
+        self.__flush_interval = flush_interval
+
+    @property
+    def format(self) -> str:
+        return self.__format
+
+    def render(self, result: Any, fp: Optional[TextIO] = None):
+        """ Write the value to the file object (the standard output by default) """
+        if result is None:
+            return
+
+        writer = BufferedWriter(fp or sys.stdout, self.__buffer_size, self.__flush_interval)
+
+        try:
+            if self.__format == OUTPUT_JSON:
+                for chunk in self.__encoder.iter_encode(result):
+                    writer.write(chunk)
+                writer.write('\n')
+            elif self.__format == OUTPUT_JSON_LINES:
+                for item in self.__iterate(result):
+                    writer.write(''.join(self.__encoder.iter_encode(item)) + '\n')
+            elif self.__format == OUTPUT_YAML:
+                self.__render_yaml(result, writer)
+            else:
+                self.__render_table(result, writer)
+        finally:
+            writer.flush()
+
+    def __iterate(self, result: Any) -> Iterable:
+        """ Iterate the records of the value, i.e., the items of a list or an iterator, or the value itself """
+        if isinstance(result, (str, bytes, dict)) or not hasattr(result, '__iter__'):
+            return (result,)
+
+        return result
+
+    def __render_yaml(self, result: Any, writer: BufferedWriter):
+        yaml = importlib.import_module('yaml')
+
+        if isinstance(result, (str, bytes, dict)) or not hasattr(result, '__iter__'):
+            writer.write(yaml.safe_dump(self.__encoder.encode(result), sort_keys=False))
+            return
+
+        has_item = False
+
+        for item in result:
+            has_item = True
+            # Each item is a block sequence entry, so the entries are concatenated into one sequence.
+            writer.write(yaml.safe_dump([self.__encoder.encode(item)], sort_keys=False))
+
+        if not has_item:
+            writer.write('[]\n')
+
+    def __render_table(self, result: Any, writer: BufferedWriter):
+        records = iter(self.__iterate(result))
+        sample = [self.__encoder.encode(record) for record in itertools.islice(records, TABLE_SAMPLE_SIZE)]
+
+        if not sample:
+            return
+
+        columns: List[str] = list()
+
+        for record in sample:
+            if isinstance(record, dict):
+                columns.extend(key for key in record if key not in columns)
+
+        if not columns:
+            columns.append('value')
+
+        widths = [len(column) for column in columns]
+
+        for record in sample:
+            for i, cell in enumerate(self.__format_cells(record, columns)):
+                widths[i] = max(widths[i], len(cell))
+
+        writer.write(self.__format_row(columns, widths))
+        writer.write(self.__format_row(['-' * width for width in widths], widths))
+
+        for record in sample:
+            writer.write(self.__format_row(self.__format_cells(record, columns), widths))
+
+        for record in records:
+            writer.write(self.__format_row(self.__format_cells(self.__encoder.encode(record), columns), widths))
+
+    @staticmethod
+    def __format_cells(record: Any, columns: List[str]) -> Iterator[str]:
+        values = (record.get(column) for column in columns) if isinstance(record, dict) else (record,)
+
+        for value in values:
+            if value is None:
+                yield ''
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield json.dumps(value)
+
+    @staticmethod
+    def __format_row(cells: Iterable[str], widths: List[int]) -> str:
+        return '  '.join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip() + '\n'
@@ -0,0 +1,219 @@
+"""
+This module provides the instrumentation of :class:`gallium.cli.core.Console`.
+
+Every run is timed by phase:
+
+* ``import`` for importing the modules given to ``run_with``,
+* ``graph`` for computing the command graph,
+* ``parser`` for building the parsers,
+* ``parse`` for parsing the command line arguments, and
+* ``execute`` for executing the command.
+
+In a pipeline, the command in the middle which returns an iterator is only executed as the next command consumes it.
+The time spent in the iterator is measured (see :class:`TimedIterator`) so that the callbacks registered with
+``on_after_execute`` receive the time of each command on its own, once the iterator is exhausted.
+
+To print the breakdown, use the reserved option ``--gallium-profile``, or choose one of the following modes with
+``--gallium-profile-mode`` (or the environment variable ``GALLIUM_PROFILE``):
+
+* ``text`` (default) to print the breakdown to the standard error,
+* ``json`` to write the breakdown as JSON to the standard error or the file given by ``--gallium-profile-output``
+  (or ``GALLIUM_PROFILE_OUTPUT``),
+* ``cprofile`` to also run the command with ``cProfile`` and dump the statistics to a ``.prof`` file, or
+* ``sample`` to also sample the stack of the command periodically and dump the collapsed stacks, which can be
+  rendered by flame graph tools.
+
+For example:
+
+.. code-block:: shell
+
+    python3 app.py set config --name panda --gallium-profile
+    python3 app.py --gallium-profile-mode cprofile --gallium-profile-output set-config.prof set config --name panda
+
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+PROFILE_TEXT = 'text'
+PROFILE_JSON = 'json'
+PROFILE_CPROFILE = 'cprofile'
+PROFILE_SAMPLE = 'sample'
+PROFILE_MODES = (PROFILE_TEXT, PROFILE_JSON, PROFILE_CPROFILE, PROFILE_SAMPLE)
+
+
+class PhaseTimer:
+    """ Wall-clock Timer of the Phases """
+
+    def __init__(self):
+        self.__timings: Dict[str, float] = dict()
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """ The elapsed time (in seconds) by phase, in the order of the phases """
+        return dict(self.__timings)
+
+    @contextmanager
+    def phase(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__timings[name] = self.__timings.get(name, 0.0) + time.perf_counter() - started_at
+
+    def to_text(self) -> str:
+        total = sum(self.__timings.values())
+        lines = [
+            f'{name:>10}: {elapsed * 1000:10.3f} ms ({elapsed / total * 100 if total else 0:5.1f}%)'
+            for name, elapsed in self.__timings.items()
+        ]
+        lines.append(f'{"total":>10}: {total * 1000:10.3f} ms')
+        return '\n'.join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps(dict(unit='s', phases=self.__timings, total=sum(self.__timings.values())))
+
+
+class TimedIterator:
+    """ Iterator Timing its Consumption
+
+        The callback is called with the time spent in the wrapped iterator once the iterator is exhausted, fails or is
+        closed.
+    """
+
+    def __init__(self, iterator: Iterator, on_finish: Callable[[float], None]):
+        self.__iterator = iterator
+        self.__on_finish = on_finish
+        self.__elapsed = 0.0
+        self.__finished = False
+
+    @property
+    def elapsed(self) -> float:
+        """ The time (in seconds) spent in the wrapped iterator so far """
+        return self.__elapsed
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started_at = time.perf_counter()
+
+        try:
+            item = next(self.__iterator)
+        except BaseException:
+            self.__elapsed += time.perf_counter() - started_at
+            self.__finish()
+            raise
+
+        self.__elapsed += time.perf_counter() - started_at
+
+        return item
+
+    def close(self):
+        """ Close the wrapped iterator (if it can be closed) and call the callback if it has not been called """
+        try:
+            close = getattr(self.__iterator, 'close', None)
+
+            if close is not None:
+                close()
+        finally:
+            self.__finish()
+
+    def __finish(self):
+        if not self.__finished:
+            self.__finished = True
+            self.__on_finish(self.__elapsed)
+
+
+class SamplingProfiler:
+    """ Sampling Profiler
+
+        The stack of the profiled thread is sampled periodically from a background thread and counted by the
+        collapsed stack (``module:function;module:function;... count``).
+    """
+
+    def __init__(self, interval: float = 0.001):
+        """
+        :param float interval: The sampling interval in seconds
+        """
+        self.__interval = interval
+        self.__counts: Dict[str, int] = dict()
+        self.__stopped = threading.Event()
+        self.__sampler: Optional[threading.Thread] = None
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return dict(self.__counts)
+
+    def start(self):
+        target_thread_id = threading.get_ident()
+        self.__stopped.clear()
+        self.__sampler = threading.Thread(target=self.__sample, args=(target_thread_id,), daemon=True)
+        self.__sampler.start()
+
+    def stop(self):
+        self.__stopped.set()
+        self.__sampler.join()
+
+    def dump(self, path: str):
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.__counts.items()):
+                f.write(f'{stack} {count}\n')
+
+    def __sample(self, target_thread_id: int):
+        while not self.__stopped.wait(self.__interval):
+            frame = sys._current_frames().get(target_thread_id)
+            stack = list()
+
+            while frame is not None:
+                stack.append(f'{frame.f_globals.get("__name__", "?")}:{frame.f_code.co_name}')
+                frame = frame.f_back
+
+            if stack:
+                collapsed_stack = ';'.join(reversed(stack))
+                self.__counts[collapsed_stack] = self.__counts.get(collapsed_stack, 0) + 1
+
+
+@contextmanager
+def profile(mode: Optional[str], output_path: Optional[str] = None):
+    """ Profile the code block according to the mode
+
+        Only ``cprofile`` and ``sample`` profile the code block. The profile is dumped to the given path or
+        ``gallium-<pid>.prof`` / ``gallium-<pid>.collapsed`` in the current working directory.
+    """
+    if mode == PROFILE_CPROFILE:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path or f'gallium-{os.getpid()}.prof')
+    elif mode == PROFILE_SAMPLE:
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            profiler.dump(output_path or f'gallium-{os.getpid()}.collapsed')
+    else:
+        yield
+
+
+def report(timer: PhaseTimer, mode: str, output_path: Optional[str] = None):
+    """ Report the breakdown of the phases """
+    if mode == PROFILE_JSON:
+        if output_path:
+            with open(output_path, 'w') as f:
+                f.write(timer.to_json())
+        else:
+            sys.stderr.write(timer.to_json() + '\n')
+    else:
+        sys.stderr.write(timer.to_text() + '\n')
@@ -0,0 +1,184 @@
+"""
+This module provides the streaming arguments for :class:`gallium.cli.core.Console`, i.e., the parameters annotated as
+``Iterable[T]``, ``Iterator[T]`` or IO (``TextIO``, ``BinaryIO``, ``IO[str]``, ``IO[bytes]``).
+
+.. code-block:: python
+
+    @console.command(["users", "disable"])
+    def disable_users(ids: Iterable[int], reason: Optional[TextIO]):
+        for id in ids:
+            ...
+
+The value of the argument is either ``-`` for the standard input, or the path to the file, optionally prefixed with
+``@`` (e.g., ``@ids.txt``, which is also the way to refer to a file named ``-``, i.e., ``@./-``).
+
+.. code-block:: shell
+
+    python3 app.py users disable ids.txt --reason @reason.txt
+    cut -f 1 users.tsv | python3 app.py users disable -
+
+An iterable parameter receives a generator which reads the input and converts each line to ``T`` on demand, so the
+memory usage stays flat regardless of the size of the input:
+
+* ``str`` and ``bytes``: the line without the line break,
+* the data classes and the annotated classes: the JSON object on the line, decoded with
+  :class:`gallium.obj.decoder.ObjectDecoder` (i.e., JSON Lines),
+* ``dict``, ``list`` and ``Any``: the JSON value on the line,
+* ``datetime.datetime`` and ``datetime.date``: the ISO 8601 string on the line,
+* the other types, e.g., ``int`` and ``Enum``: ``T(line)``.
+
+The blank lines are skipped unless ``T`` is ``str`` or ``bytes``. The large regular files are memory-mapped while the
+others are read through a buffered reader.
+
+An IO parameter receives the file object opened in the text or binary mode, which is closed after the command returns.
+"""
+import collections.abc
+import datetime
+import io
+import json
+import mmap
+import os
+import sys
+import typing
+from argparse import ArgumentTypeError
+from typing import Any, Callable, IO, Iterator, Optional, Tuple, Type
+
+STREAM_ITERABLE = 'iterable'
+STREAM_TEXT = 'text'
+STREAM_BINARY = 'binary'
+
+STDIN_REFERENCE = '-'
+FILE_REFERENCE_PREFIX = '@'
+
+BUFFER_SIZE = 1 << 16
+MMAP_THRESHOLD = 1 << 24
+""" The minimum size (in bytes) of the regular file to be memory-mapped """
+
+_ITERABLE_ORIGINS = (collections.abc.Iterable, collections.abc.Iterator)
+_JSON_TYPES = (dict, list, Any)
+
+
+def get_stream_kind(annotation: Any) -> Optional[Tuple[str, Type]]:
+    """ Get the kind of the stream and the type of the items (for the iterable) from the annotation
+
+        :return: the tuple of the kind and the item type, or ``None`` if the annotation is not for a stream
+    """
+    origin = getattr(annotation, '__origin__', None)
+
+    if origin in _ITERABLE_ORIGINS:
+        item_types = [t for t in getattr(annotation, '__args__', None) or tuple() if not isinstance(t, typing.TypeVar)]
+        item_type = item_types[0] if item_types else str
+        # NOTE: The generic item types, e.g., Dict[str, Any], are decoded from JSON by their origins.
+        return STREAM_ITERABLE, getattr(item_type, '__origin__', None) or item_type
+
+    if origin is typing.IO:
+        return (STREAM_BINARY, bytes) if annotation.__args__[0] is bytes else (STREAM_TEXT, str)
+
+    if annotation in _ITERABLE_ORIGINS:
+        return STREAM_ITERABLE, str
+
+    if not isinstance(annotation, type):
+        return None
+
+    if issubclass(annotation, (typing.BinaryIO, io.BufferedIOBase, io.RawIOBase)):
+        return STREAM_BINARY, bytes
+
+    if issubclass(annotation, (typing.IO, io.IOBase)):
+        return STREAM_TEXT, str
+
+    return None
+
+
+def resolve_reference(reference: str) -> Optional[str]:
+    """ Resolve the argument into the path to the file, or ``None`` for the standard input
+
+        :raises ArgumentTypeError: if the file does not exist
+    """
+    if reference == STDIN_REFERENCE:
+        return None
+
+    path = reference[len(FILE_REFERENCE_PREFIX):] if reference.startswith(FILE_REFERENCE_PREFIX) else reference
+
+    if not os.path.isfile(path):
+        raise ArgumentTypeError(f'{path}: No such file')
+
+    return path
+
+
+def make_argument_type(kind: str, item_type: Type) -> Callable[[str], Any]:
+    """ Make the function converting the command line argument into the stream, for the ``type`` of the argument """
+    if kind == STREAM_ITERABLE:
+        converter = make_converter(item_type)
+
+        def convert(reference: str) -> Iterator:
+            return iterate(resolve_reference(reference), converter, keep_blank_lines=item_type in (str, bytes))
+    else:
+        def convert(reference: str) -> IO:
+            return open_stream(resolve_reference(reference), binary=kind == STREAM_BINARY)
+
+    convert.__name__ = getattr(item_type, '__name__', kind)
+
+    return convert
+
+
+def make_converter(item_type: Type) -> Callable[[bytes], Any]:
+    """ Make the function converting one line (without the line break) into the item """
+    if item_type is bytes:
+        return bytes
+
+    if item_type is str:
+        return lambda line: line.decode()
+
+    if item_type in _JSON_TYPES:
+        return json.loads
+
+    if item_type in (datetime.datetime, datetime.date):
+        return lambda line: item_type.fromisoformat(line.decode())
+
+    if isinstance(item_type, type) and (hasattr(item_type, '__dataclass_fields__') or '__annotations__' in vars(item_type)):
+        from gallium.obj.decoder import ObjectDecoder
+
+        decode = ObjectDecoder().get_decoder(item_type)
+        return lambda line: decode(json.loads(line))
+
+    return lambda line: item_type(line.decode())
+
+
+def open_stream(path: Optional[str], binary: bool) -> IO:
+    """ Open the file (or the standard input if the path is not given) in the text or binary mode """
+    if path is None:
+        return sys.stdin.buffer if binary else sys.stdin
+
+    return open(path, 'rb' if binary else 'r', buffering=BUFFER_SIZE)
+
+
+def iterate(path: Optional[str], converter: Callable[[bytes], Any], keep_blank_lines: bool = True) -> Iterator:
+    """ Read the lines of the file (or the standard input if the path is not given) and convert them on demand
+
+        The file is only opened on the first iteration and closed once the generator is exhausted or closed.
+    """
+    for line in _read_lines(path):
+        if line[-1:] == b'\n':
+            line = line[:-2] if line[-2:-1] == b'\r' else line[:-1]
+
+        if keep_blank_lines or line.strip():
+            yield converter(line)
+
+
+def _read_lines(path: Optional[str]) -> Iterator[bytes]:
+    if path is None:
+        yield from sys.stdin.buffer
+        return
+
+    with open(path, 'rb', buffering=BUFFER_SIZE) as f:
+        size = os.fstat(f.fileno()).st_size
+
+        if size < MMAP_THRESHOLD:
+            yield from f
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            if hasattr(mapped_file, 'madvise'):
+                mapped_file.madvise(mmap.MADV_SEQUENTIAL)
+
+            yield from iter(mapped_file.readline, b'')
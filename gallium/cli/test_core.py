@@ -0,0 +1,454 @@
+import asyncio
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from enum import Enum
+from typing import Iterable, List, Optional, TextIO
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from gallium.cli.completion import render_script
+from gallium.cli.core import Console, LazyCommand
+
+LAZY_CALLS: List[tuple] = list()
+
+
+def lazy_target(name: str):
+    LAZY_CALLS.append(('lazy', name))
+
+
+class ConsoleTest(TestCase):
+    def setUp(self):
+        self.calls: List[tuple] = list()
+
+    def make_console(self, **kwargs) -> Console:
+        console = Console(**kwargs)
+
+        @console.command(['set', 'config'])
+        def set_config(name: str):
+            self.calls.append(('set config', name))
+
+        @console.simple_command
+        def add(a: int, b: int):
+            self.calls.append(('add', a + b))
+
+        return console
+
+    def run_console(self, console: Console, *args: str):
+        with patch.object(sys, 'argv', ['app', *args]):
+            console.run_with()
+
+    def test_run_with_eager_parser(self):
+        self.run_console(self.make_console(lazy_parser=False), 'set', 'config', 'panda')
+        self.assertEqual([('set config', 'panda')], self.calls)
+
+    def test_run_with_lazy_parser(self):
+        self.run_console(self.make_console(lazy_parser=True), 'add', '1', '2')
+        self.assertEqual([('add', 3)], self.calls)
+
+    def test_run_with_lazy_parser_only_reflects_invoked_command(self):
+        console = self.make_console(lazy_parser=True)
+
+        with patch('inspect.signature', wraps=__import__('inspect').signature) as signature:
+            self.run_console(console, 'add', '3', '4')
+
+        self.assertEqual(1, signature.call_count)
+        self.assertEqual([('add', 7)], self.calls)
+
+    def test_lazy_command_only_imports_invoked_module(self):
+        LAZY_CALLS.clear()
+        console = self.make_console()
+        console.lazy_command('db migrate', f'{__name__}:lazy_target')
+        console.load_manifest({'db broken': 'gallium.cli.does_not_exist:nothing'})
+
+        self.run_console(console, 'db', 'migrate', 'panda')
+
+        self.assertEqual([('lazy', 'panda')], LAZY_CALLS)
+
+    def test_lazy_command_description_in_help(self):
+        console = self.make_console()
+        console.lazy_command('db migrate', 'gallium.cli.does_not_exist:nothing', 'Migrate the database\nin detail')
+
+        with patch.object(sys, 'stdout', new_callable=io.StringIO) as stdout, self.assertRaises(SystemExit):
+            self.run_console(console, 'db', '--help')
+
+        self.assertIn('Migrate the database', stdout.getvalue())
+        self.assertNotIn('in detail', stdout.getvalue())
+
+    def test_lazy_command_requires_import_target(self):
+        with self.assertRaises(ValueError):
+            LazyCommand(['db'], 'pkg.db.migrate')
+
+    def test_run_with_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.run_console(self.make_console(cache_dir=cache_dir), 'add', '1', '2')
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+
+            with patch('inspect.signature') as signature:
+                self.run_console(self.make_console(cache_dir=cache_dir), 'set', 'config', 'panda')
+
+            signature.assert_not_called()
+            self.assertEqual([('add', 3), ('set config', 'panda')], self.calls)
+
+    def test_run_with_cache_does_not_import_lazy_packages(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            package_dir = os.path.join(temp_dir, 'gallium_heavy_package')
+            os.makedirs(package_dir)
+
+            with open(os.path.join(package_dir, '__init__.py'), 'w') as f:
+                f.write('raise RuntimeError("The package must not be imported.")\n')
+
+            with open(os.path.join(package_dir, 'command.py'), 'w') as f:
+                f.write('def run():\n    pass\n')
+
+            with patch.object(sys, 'path', [temp_dir] + sys.path):
+                for _ in range(2):
+                    console = self.make_console(cache_dir=os.path.join(temp_dir, 'cache'))
+                    console.lazy_command('heavy run', 'gallium_heavy_package.command:run')
+                    self.run_console(console, 'add', '1', '2')
+
+        self.assertNotIn('gallium_heavy_package', sys.modules)
+        self.assertEqual([('add', 3), ('add', 3)], self.calls)
+
+    def test_run_with_cache_and_unresolvable_types(self):
+        class Color(Enum):
+            RED = 'red'
+
+        def make_console(cache_dir: str) -> Console:
+            console = self.make_console(cache_dir=cache_dir)
+
+            @console.simple_command
+            def paint(color: Color):
+                self.calls.append(('paint', color))
+
+            return console
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # The type defined in the function cannot be resolved by reference, so the command is not cached.
+            self.run_console(make_console(cache_dir), 'paint', 'red')
+            self.run_console(make_console(cache_dir), 'paint', 'red')
+
+            # The cached type which no longer resolves falls back to the reflection.
+            cache_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+
+            with open(cache_path) as f:
+                data = json.load(f)
+
+            data['commands']['add']['arguments'][0]['type'] = f'{__name__}:DoesNotExist'
+
+            with open(cache_path, 'w') as f:
+                json.dump(data, f)
+
+            self.run_console(make_console(cache_dir), 'add', '1', '2')
+
+        self.assertEqual([('paint', Color.RED), ('paint', Color.RED), ('add', 3)], self.calls)
+
+    def test_run_with_profile_before_command(self):
+        console = self.make_console()
+
+        with patch.object(sys, 'stderr', io.StringIO()) as stderr:
+            self.run_console(console, '--gallium-profile', 'add', '1', '2')
+
+        self.assertIn('execute:', stderr.getvalue())
+
+        with patch.object(sys, 'stderr', io.StringIO()) as stderr:
+            self.run_console(self.make_console(), '--gallium-profile-mode', 'json', 'set', 'config', 'panda')
+
+        self.assertIn('execute', json.loads(stderr.getvalue())['phases'])
+        self.assertEqual([('add', 3), ('set config', 'panda')], self.calls)
+
+    def test_run_batch(self):
+        console = self.make_console()
+
+        with patch.object(sys, 'stderr', io.StringIO()):
+            report = console.run_batch(['add 1 2', '# comment', '', 'add x 2', 'set config "giant panda"'], jobs=2)
+
+        self.assertEqual([1, 4, 5], [result.line_number for result in report.results])
+        self.assertEqual([4], [result.line_number for result in report.failures])
+        self.assertEqual([('add', 3), ('set config', 'giant panda')], self.calls)
+
+    def test_run_with_async_commands(self):
+        console = Console(async_concurrency=2)
+
+        @console.simple_command
+        async def fetch(name: str):
+            await asyncio.sleep(0)
+            self.calls.append(('fetch', name))
+
+        @console.simple_command
+        async def stream(count: int):
+            for i in range(count):
+                await asyncio.sleep(0)
+                yield i
+
+        console.execute(['fetch', 'panda'])
+
+        with patch.object(sys, 'stdout', io.StringIO()) as stdout:
+            console.execute(['stream', '3'])
+
+        self.assertEqual([('fetch', 'panda')], self.calls)
+        self.assertEqual('0\n1\n2\n', stdout.getvalue())
+
+    def test_execute_hooks(self):
+        console = self.make_console()
+        events = list()
+
+        @console.on_before_execute
+        def before(command, params):
+            events.append(('before', command.id, params))
+
+        @console.on_after_execute
+        def after(command, params, timings):
+            events.append(('after', command.id, sorted(timings)))
+
+        console.execute(['add', '1', '2'])
+
+        self.assertEqual([('before', ['add'], dict(a=1, b=2)),
+                          ('after', ['add'], ['execute', 'graph', 'parse', 'parser'])],
+                         events)
+
+    @skipUnless(shutil.which('bash') and shutil.which('awk'), 'bash and awk are required')
+    def test_completion_index(self):
+        console = self.make_console()
+
+        @console.command(['set', 'mode'])
+        def set_mode(mode: str, level: Optional[int], force: bool):
+            pass
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            index_path = console.write_completion_index(os.path.join(cache_dir, 'app.completion'))
+            script = render_script('bash', 'app', index_path, ['false'])
+
+            def complete(*words: str) -> List[str]:
+                completed = subprocess.run(['bash', '-c', script + 'COMP_WORDS=("$@"); COMP_CWORD=$(($# - 1)); '
+                                                                   '_gallium_complete_app; echo "${COMPREPLY[@]}"',
+                                            'bash', 'app', *words],
+                                           stdout=subprocess.PIPE,
+                                           check=True)
+                return sorted(completed.stdout.decode().split())
+
+            self.assertEqual(['--help', 'add', 'set'], complete(''))
+            self.assertEqual(['--help', 'config', 'mode'], complete('set', ''))
+            self.assertEqual(['--force', '--help', '--level'], complete('set', 'mode', '-'))
+            self.assertEqual([], complete('set', 'mode', '--level', ''))
+            self.assertEqual(['--force', '--help', '--level'], complete('set', 'mode', '--force', '--'))
+            self.assertEqual(['--help', 'add', 'set'], complete('set', 'config', 'panda', '::', ''))
+
+            with patch('inspect.signature') as signature:
+                self.assertEqual(index_path, console.write_completion_index(index_path))
+
+            signature.assert_not_called()
+
+    def test_run_with_streams(self):
+        console = Console()
+
+        @console.simple_command
+        def total(numbers: Iterable[int], note: Optional[TextIO]):
+            self.calls.append(('total', sum(numbers), note.read() if note else None))
+
+        with tempfile.TemporaryDirectory() as directory:
+            numbers_path = os.path.join(directory, 'numbers.txt')
+            note_path = os.path.join(directory, 'note.txt')
+
+            with open(numbers_path, 'w') as f:
+                f.write('1\n2\r\n\n3')
+
+            with open(note_path, 'w') as f:
+                f.write('panda')
+
+            console.execute(['total', numbers_path, '--note', f'@{note_path}'])
+
+            with patch.object(sys, 'stdin', io.TextIOWrapper(io.BytesIO(b'4\n5\n'))):
+                console.execute(['total', '-'])
+
+        self.assertEqual([('total', 6, 'panda'), ('total', 9, None)], self.calls)
+
+        with patch.object(sys, 'stderr', io.StringIO()), self.assertRaises(SystemExit):
+            console.execute(['total', '@does-not-exist.txt'])
+
+    def test_execute_with_output(self):
+        def make_console(output: str) -> Console:
+            console = Console(output=output)
+
+            @console.simple_command
+            def numbers(count: int):
+                for i in range(count):
+                    yield dict(number=i, square=i * i if i else None)
+
+            @console.simple_command
+            def total(count: int):
+                return dict(total=count)
+
+            return console
+
+        expected_outputs = [
+            ('jsonl', ['numbers', '2'], '{"number": 0, "square": null}\n{"number": 1, "square": 1}\n'),
+            ('json', ['numbers', '2'], '[{"number": 0, "square": null}, {"number": 1, "square": 1}]\n'),
+            ('yaml', ['numbers', '2'], '- number: 0\n  square: null\n- number: 1\n  square: 1\n'),
+            ('yaml', ['total', '3'], 'total: 3\n'),
+            ('table', ['numbers', '2'], 'number  square\n------  ------\n0\n1       1\n'),
+            ('table', ['total', '3'], 'total\n-----\n3\n'),
+        ]
+
+        for output, args, expected_output in expected_outputs:
+            with self.subTest(output=output, args=args), patch.object(sys, 'stdout', io.StringIO()) as stdout:
+                make_console(output).execute(args)
+
+            self.assertEqual(expected_output, stdout.getvalue())
+
+        with patch.object(sys, 'stdout', io.StringIO()) as stdout:
+            self.run_console(make_console('yaml'), 'total', '3', '--gallium-output', 'json')
+
+        self.assertEqual('{"total": 3}\n', stdout.getvalue())
+
+    def test_pipeline(self):
+        console = Console()
+
+        @console.command(['list', 'numbers'])
+        def list_numbers(count: int):
+            for i in range(count):
+                self.calls.append(('list', i))
+                yield i
+
+        @console.simple_command
+        def scale(numbers: Iterable[int], factor: int):
+            for number in numbers:
+                yield number * factor
+
+        @console.simple_command
+        def total(numbers: Iterable[int]):
+            return sum(numbers)
+
+        self.assertEqual(12, console.pipeline(['list numbers 4', 'scale 2', ['total']]))
+        self.assertEqual(12, console.execute(['list', 'numbers', '4', '::', 'scale', '2', '::', 'total']))
+
+        with patch.object(sys, 'stdout', io.StringIO()) as stdout:
+            console.execute(['list', 'numbers', '2', '::', 'scale', '3'])
+
+        self.assertEqual('0\n3\n', stdout.getvalue())
+        # The items are passed lazily, one at a time.
+        self.assertEqual([('list', 0), ('list', 1), ('list', 2), ('list', 3)] * 2 + [('list', 0), ('list', 1)],
+                         self.calls)
+
+        with patch.object(sys, 'stderr', io.StringIO()):
+            with self.assertRaises(SystemExit):
+                console.execute(['total', '::', 'list', 'numbers', '1'])
+
+            with self.assertRaises(SystemExit):
+                console.execute(['total'])
+
+        calls_before = list(self.calls)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as numbers_file, \
+                patch.object(sys, 'stderr', io.StringIO()) as stderr:
+            numbers_file.write('5\n')
+            numbers_file.flush()
+
+            # The piped argument cannot be given explicitly as well.
+            with self.assertRaises(SystemExit):
+                console.execute(['list', 'numbers', '2', '::', 'total', numbers_file.name])
+
+        self.assertIn('cannot be given explicitly', stderr.getvalue())
+        self.assertEqual(calls_before, self.calls)
+
+        @console.simple_command
+        def produce(count: int):
+            self.calls.append(('produce', count))
+            return list(range(count))
+
+        self.calls.clear()
+
+        # The later stage with the parse error prevents the first stage from running.
+        with patch.object(sys, 'stderr', io.StringIO()):
+            with self.assertRaises(SystemExit):
+                console.pipeline(['produce 2', 'totl'])
+
+            with self.assertRaises(SystemExit):
+                console.pipeline(['produce 2', 'list numbers 1'])
+
+        self.assertEqual([], self.calls)
+
+    def test_pipeline_hooks_with_lazy_stage(self):
+        console = Console()
+        events = list()
+
+        @console.simple_command
+        def slow(count: int):
+            for i in range(count):
+                time.sleep(0.05)
+                yield i
+
+        @console.simple_command
+        def total(numbers: Iterable[int]):
+            return sum(numbers)
+
+        @console.on_after_execute
+        def after(command, params, timings):
+            events.append((command.id, timings['execute']))
+
+        self.assertEqual(3, console.pipeline(['slow 3', 'total']))
+
+        # The lazy stage is timed as the next stage consumes it, and its time is not charged to the next stage.
+        self.assertEqual([['slow'], ['total']], [command_id for command_id, _ in events])
+        self.assertGreaterEqual(events[0][1], 0.15)
+        self.assertLess(events[1][1], 0.1)
+
+    def test_run_each(self):
+        console = Console()
+        attempts = dict()
+
+        @console.command(['square'])
+        def square(number: int, offset: Optional[int]):
+            attempts[number] = attempts.get(number, 0) + 1
+
+            # Fail on the first attempt of 2, and always for 3.
+            if number == 3 or (number == 2 and attempts[number] == 1):
+                raise RuntimeError(f'Unable to square {number}')
+
+            print(number * number + (offset or 0))
+
+        with patch.object(sys, 'stdout', io.StringIO()) as stdout, patch.object(sys, 'stderr', io.StringIO()) as stderr:
+            report = console.run_each(['square', '--offset', '1'], 'number', ['1', '2', '3', '4'], jobs=2, retries=1)
+
+        self.assertEqual([1, 2, 3, 4], [result.line_number for result in report.results])
+        self.assertEqual([1, 2, 2, 1], [result.attempts for result in report.results])
+        self.assertEqual(['3'], [result.line for result in report.failures])
+        self.assertEqual('2\n5\n17\n', stdout.getvalue())
+        self.assertIn('[each] 4 item(s), 3 succeeded, 1 failed', stderr.getvalue())
+
+        attempts.clear()
+
+        with patch.object(sys, 'stdin', io.StringIO('4\n\n5\n')), \
+                patch.object(sys, 'stdout', io.StringIO()) as stdout, \
+                patch.object(sys, 'stderr', io.StringIO()):
+            self.run_console(console, 'square', '--gallium-each', 'number')
+
+        self.assertEqual('16\n25\n', stdout.getvalue())
+
+    def test_run_each_with_streams(self):
+        console = Console()
+
+        @console.command(['scale'])
+        def scale(factor: int, numbers: Iterable[int], label: Optional[TextIO]):
+            print(f'{label.read().strip()}: {sum(numbers) * factor}')
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            numbers_path = os.path.join(temp_dir, 'numbers.txt')
+            label_path = os.path.join(temp_dir, 'label.txt')
+
+            with open(numbers_path, 'w') as f:
+                f.write('1\n2\n3\n')
+
+            with open(label_path, 'w') as f:
+                f.write('total\n')
+
+            with patch.object(sys, 'stdout', io.StringIO()) as stdout, patch.object(sys, 'stderr', io.StringIO()):
+                report = console.run_each(['scale', numbers_path, '--label', label_path], 'factor', ['1', '2', '3'])
+
+        self.assertEqual([], report.failures)
+        self.assertEqual('total: 6\ntotal: 12\ntotal: 18\n', stdout.getvalue())
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from typing import List
+from unittest import TestCase, skipUnless
+
+from gallium.cli.client import request
+
+SERVER_SCRIPT = textwrap.dedent('''
+    import sys
+
+    from gallium.cli.daemon import CommandServer
+
+
+    def handle(argv):
+        print(' '.join(argv))
+        sys.exit(int(argv[0]))
+
+
+    CommandServer(sys.argv[1], handle, idle_timeout=30, poll_interval=0.1).serve()
+''')
+
+APP_SCRIPT = textwrap.dedent('''
+    from gallium.cli.core import Console
+
+    console = Console()
+
+
+    @console.simple_command
+    def greet(name: str):
+        print(f'Hello, {name}!')
+
+
+    console.run_with()
+''')
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@skipUnless(hasattr(os, 'fork') and hasattr(os, 'dup2'), 'The server only works on POSIX systems.')
+class CommandServerTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, 'app.sock')
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.terminate()
+            self.server.wait(10)
+
+        self.temp_dir.cleanup()
+
+    def test_request(self):
+        self.start_server(['-c', SERVER_SCRIPT, self.socket_path])
+
+        self.assertEqual((0, '0 hello\n'), self.request(['0', 'hello']))
+        self.assertEqual((3, '3 failed\n'), self.request(['3', 'failed']))
+
+    def test_request_to_console(self):
+        app_path = os.path.join(self.temp_dir.name, 'app.py')
+
+        with open(app_path, 'w') as f:
+            f.write(APP_SCRIPT)
+
+        self.start_server([app_path, '--gallium-serve', self.socket_path, '--gallium-workers', '2',
+                           '--gallium-idle-timeout', '30'])
+
+        self.assertEqual((0, 'Hello, panda!\n'), self.request(['greet', 'panda']))
+        # The usage error is written to the standard error of the client.
+        self.assertEqual((2, ''), self.request(['greet']))
+
+    def start_server(self, args: List[str]):
+        self.server = subprocess.Popen([sys.executable, *args],
+                                       cwd=REPOSITORY_DIR,
+                                       env=dict(os.environ, PYTHONPATH=REPOSITORY_DIR),
+                                       stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + 10
+
+        while not os.path.exists(self.socket_path):
+            if self.server.poll() is not None or time.monotonic() > deadline:
+                self.fail('The server did not start.')
+            time.sleep(0.05)
+
+    def request(self, argv: List[str]):
+        """ Send the request with the standard output and error of the client redirected to temporary files """
+        with tempfile.TemporaryFile('w+') as output, tempfile.TemporaryFile('w+') as error:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            original_fds = os.dup(1), os.dup(2)
+            os.dup2(output.fileno(), 1)
+            os.dup2(error.fileno(), 2)
+
+            try:
+                exit_code = request(self.socket_path, argv)
+            finally:
+                for target_fd, original_fd in zip((1, 2), original_fds):
+                    os.dup2(original_fd, target_fd)
+                    os.close(original_fd)
+
+            output.seek(0)
+
+            return exit_code, output.read()
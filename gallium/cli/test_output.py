@@ -0,0 +1,45 @@
+import io
+import json
+import threading
+import time
+from unittest import TestCase
+
+from gallium.cli.output import OutputRenderer
+
+
+class Name(str):
+    pass
+
+
+class OutputRendererTest(TestCase):
+    def test_render_subclasses_of_primitives(self):
+        for format, expected_output in [('json', '[["ab", "cd"]]\n'), ('jsonl', '["ab", "cd"]\n')]:
+            with self.subTest(format=format):
+                output = io.StringIO()
+                OutputRenderer(format).render([[Name('ab'), Name('cd')]], output)
+                self.assertEqual(expected_output, output.getvalue())
+
+    def test_render_with_slow_generator(self):
+        resumed = threading.Event()
+        output = io.StringIO()
+
+        def generate():
+            yield dict(number=1)
+            yield dict(number=2)
+            # The second record must be written while the generator is blocked.
+            resumed.wait(30)
+
+        renderer = OutputRenderer('jsonl', flush_interval=0.05)
+        rendering = threading.Thread(target=renderer.render, args=(generate(), output))
+        rendering.start()
+
+        deadline = time.monotonic() + 5
+
+        while output.getvalue().count('\n') < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        written_lines = output.getvalue().splitlines()
+        resumed.set()
+        rendering.join(10)
+
+        self.assertEqual([dict(number=1), dict(number=2)], [json.loads(line) for line in written_lines])
@@ -15,24 +15,46 @@ Here is a quick example on how to use it.
 
     ObjectBuilder(User).name("Foo").age(123).build()
 
+Generated builder classes
+#########################
+
+When many objects of the same class are built, e.g., in a loop, use the builder class generated for the target class
+instead. It has the same fluent API but its setters are real methods and its ``build`` method is generated from the
+class schema, analyzed only once.
+
+.. code-block:: python
+
+    UserBuilder = ObjectBuilder.for_class(User)
+
+    users = [UserBuilder().name(name).age(age).build() for name, age in rows]
+
+Bulk construction
+#################
+
+When the data is already in columns (e.g., the result of a query) or in rows, build all objects at once. The columns
+(or the row keys) are validated against the class schema only once, before any object is built.
+
+.. code-block:: python
+
+    users = ObjectBuilder.build_many(User, {'name': ['Foo', 'Bar'], 'age': [123, 456]})
+    users = ObjectBuilder.build_many_rows(User, [('Foo', 123), ('Bar', 456)], names=['name', 'age'])
+    users = ObjectBuilder.build_many_rows(User, ({'name': name, 'age': age} for name, age in cursor), lazy=True)
+
+The columns can be any sequences, including NumPy arrays and ``array.array`` (converted with ``tolist()``).
+
 .. note:: This is tested with Python's built-in ``dataclass`` and Pylandic's ``BaseModel``.
 
 """
 
-import inspect
+import itertools
+import weakref
 from dataclasses import dataclass
-from typing import Type, Any, Dict, Tuple, List
+from typing import Type, Any, Dict, Tuple, List, Mapping, Iterable, Union, Iterator, Optional, Sequence, Callable
 
-from gallium.obj.utils import is_optional, get_all_types, is_dataclass_class
+from gallium.obj.schema import AttributeSpec, IncompatibleBuildableClassError, registry
 
-
-@dataclass(frozen=True)
-class AttributeSpec:
-    """ Class Attribute Specification """
-    name: str
-    types: Tuple[Type]
-    optional: bool
-    default: Any
+# The marker of the attributes which are not set in the generated builders
+_UNSET = object()
 
 
 @dataclass
@@ -56,40 +78,18 @@ class ObjectBuilder:
 
     Inspired by the ``lombok.builder`` annotation. (Java)
     """
-    __HIDDEN_SCHEMA_PROPERTY_NAME = '__oriole_object_schema__'
-
     def __init__(self, cls: Type):
         self.__class = cls
-        self.__class_schema: List[AttributeSpec] = list()
+        self.__class_schema: Tuple[AttributeSpec, ...] = tuple()
         self.__attribute_map: Dict[str, Attribute] = dict()
         self._analyze()
 
     def _analyze(self):
-        # Reuse the cache.
-        if hasattr(self.__class, self.__HIDDEN_SCHEMA_PROPERTY_NAME):
-            self.__class_schema = getattr(self.__class, self.__HIDDEN_SCHEMA_PROPERTY_NAME)
-        else:
-            for attribute_name, annotation in self.__class.__annotations__.items():
-                # Get the default value
-                default_value = None
-                if hasattr(self.__class, attribute_name):
-                    class_attribute_value = getattr(self.__class, attribute_name)
-                    if class_attribute_value is not None and not callable(class_attribute_value):
-                        default_value = class_attribute_value
-
-                # Add to the schema
-                self.__class_schema.append(
-                    AttributeSpec(name=attribute_name,
-                                  types=get_all_types(annotation),
-                                  optional=is_optional(annotation),
-                                  default=default_value)
-
-                )
-            setattr(self.__class, self.__HIDDEN_SCHEMA_PROPERTY_NAME, self.__class_schema)
-
         if not hasattr(self.__class, '__annotations__'):
             raise IncompatibleBuildableClassError()
 
+        self.__class_schema = registry.get(self.__class).attributes
+
         for attr_spec in self.__class_schema:
             self.__attribute_map[attr_spec.name] = Attribute(
                 spec=attr_spec,
@@ -108,15 +108,15 @@ class ObjectBuilder:
             for attr in self.__attribute_map.values()
         }
 
-        if is_dataclass_class(self.__class):
+        class_schema = registry.get(self.__class)
+
+        if class_schema.is_dataclass:
             return self.__class(**properties)
         else:
             # Get the constructor parameters.
-            constructor_signature = inspect.signature(self.__class)
-            constructor_param_names = [param_name for param_name in constructor_signature.parameters]
             constructor_params = {
                 param_name: properties[param_name]
-                for param_name in constructor_param_names
+                for param_name in class_schema.constructor_param_names
             }
 
             # Instantiate the object.
@@ -128,6 +128,72 @@ class ObjectBuilder:
 
             return obj
 
+    @staticmethod
+    def for_class(cls: Type) -> Type:
+        """ Get the builder class generated for the given class
+
+            The generated class is cached. Its instances behave like ``ObjectBuilder(cls)``.
+        """
+        return registry.get_artifact(cls, 'builder_class', lambda: _generate_builder_class(cls))
+
+    @staticmethod
+    def build_many(cls: Type, columns: Mapping[str, Iterable], lazy: bool = False) -> Union[List, Iterator]:
+        """ Build the instances of the given class from the columns
+
+            :param cls: The class to instantiate
+            :param columns: The values by attribute name. All columns must have the same length.
+            :param bool lazy: Flag to return an iterator building the instances on demand instead of a list
+        """
+        names = tuple(columns.keys())
+        factory = ObjectBuilder.__get_factory(cls, names)
+        values = [_to_list(columns[name]) for name in names]
+
+        if len({len(column) for column in values}) > 1:
+            raise ValueError('All columns must have the same length: '
+                             + ', '.join(f'{name}={len(column)}' for name, column in zip(names, values)))
+
+        instances = map(factory, *values) if values else iter(())
+
+        return instances if lazy else list(instances)
+
+    @staticmethod
+    def build_many_rows(cls: Type,
+                        rows: Iterable[Union[Mapping[str, Any], Sequence]],
+                        names: Optional[Sequence[str]] = None,
+                        lazy: bool = False) -> Union[List, Iterator]:
+        """ Build the instances of the given class from the rows
+
+            :param cls: The class to instantiate
+            :param rows: The rows, either as the sequences of the values in the order of ``names`` or, if ``names`` is
+                         not given, as the mappings with the same keys as the first row
+            :param names: The attribute names of the values in each row
+            :param bool lazy: Flag to return an iterator building the instances on demand instead of a list
+        """
+        instances = ObjectBuilder.__iter_rows(cls, iter(rows), names)
+
+        return instances if lazy else list(instances)
+
+    @staticmethod
+    def __iter_rows(cls: Type, rows: Iterator, names: Optional[Sequence[str]]) -> Iterator:
+        if names is not None:
+            # Validate before the first row is requested.
+            factory = ObjectBuilder.__get_factory(cls, tuple(names))
+            return itertools.starmap(factory, rows)
+
+        first_row = next(rows, None)
+
+        if first_row is None:
+            return iter(())
+
+        names = tuple(first_row.keys())
+        factory = ObjectBuilder.__get_factory(cls, names)
+
+        return (factory(**row) for row in itertools.chain([first_row], rows))
+
+    @staticmethod
+    def __get_factory(cls: Type, names: Tuple[str, ...]) -> Callable:
+        return registry.get_artifact(cls, ('factory', names), lambda: _generate_factory(cls, names))
+
     def __getattr__(self, item):
         if item not in self.__attribute_map:
             raise AttributeError(f'No setter for {item}')
@@ -140,13 +206,132 @@ class ObjectBuilder:
         return setter
 
 
+def _generate_builder_class(cls: Type) -> Type:
+    """ Generate the builder class for the given class """
+    schema = registry.get(cls)
+    class_schema = schema.attributes
+    class_name = f'{cls.__name__}Builder'
+    # NOTE: The class is referred weakly as the generated class is cached in the registry, keyed by the class.
+    namespace: Dict[str, Any] = dict(cls_ref=weakref.ref(cls), _UNSET=_UNSET,
+                                     RequiredAttributeError=RequiredAttributeError)
+
+    lines = [
+        f'class {class_name}:',
+        # NOTE: The slots are prefixed so that they never conflict with the setters named after the attributes.
+        f'    __slots__ = {tuple(f"_gallium_v{i}" for i in range(len(class_schema)))!r}',
+        '',
+        '    def __init__(self):',
+    ]
+    lines.extend(f'        self._gallium_v{i} = _UNSET' for i in range(len(class_schema)))
+
+    if not class_schema:
+        lines.append('        pass')
+
+    for i, attr_spec in enumerate(class_schema):
+        # NOTE: Like ObjectBuilder, there is no setter for the attribute named "build".
+        if attr_spec.name == 'build':
+            continue
+
+        lines.extend([
+            '',
+            f'    def {attr_spec.name}(self, value):',
+            f'        self._gallium_v{i} = value',
+            '        return self',
+        ])
+
+    lines.extend([
+        '',
+        '    def build(self, define_all_attributes=True):',
+    ])
+
+    for i, attr_spec in enumerate(class_schema):
+        lines.extend([
+            f'        v{i} = self._gallium_v{i}',
+            f'        if v{i} is _UNSET:',
+        ])
+
+        # Same as Attribute.extract
+        if attr_spec.optional:
+            namespace[f'd{i}'] = attr_spec.default
+            lines.append(f'            v{i} = d{i}')
+        else:
+            lines.append(f'            raise RequiredAttributeError({attr_spec.name!r})')
+
+    attribute_indexes = {attr_spec.name: i for i, attr_spec in enumerate(class_schema)}
+    constructor_arguments = ', '.join(f'{param_name}=v{attribute_indexes[param_name]}'
+                                      for param_name in schema.constructor_param_names)
+
+    lines.append(f'        obj = cls_ref()({constructor_arguments})')
+
+    if class_schema and not schema.is_dataclass:
+        lines.append('        if define_all_attributes:')
+        lines.extend(f'            obj.{attr_spec.name} = v{i}' for i, attr_spec in enumerate(class_schema))
+
+    lines.append('        return obj')
+
+    exec('\n'.join(lines), namespace)
+
+    builder_class = namespace[class_name]
+    builder_class.__qualname__ = f'{cls.__qualname__}Builder'
+    builder_class.__module__ = cls.__module__
+
+    return builder_class
+
+
+def _generate_factory(cls: Type, names: Tuple[str, ...]) -> Callable:
+    """ Generate the function instantiating the given class from the values of the given attributes
+
+        The values are passed by position (in the order of the names) or by keyword. The attributes which are not
+        given are set to their default values.
+    """
+    schema = registry.get(cls)
+    class_schema = schema.attributes
+    attribute_indexes = {attr_spec.name: i for i, attr_spec in enumerate(class_schema)}
+
+    for name in names:
+        if name not in attribute_indexes:
+            raise AttributeError(f'No setter for {name}')
+
+    # NOTE: The parameters are named after the attributes. The other names are prefixed to avoid the conflicts.
+    #       The class is referred weakly as the generated function is cached in the registry, keyed by the class.
+    namespace: Dict[str, Any] = dict(__cls_ref=weakref.ref(cls))
+    values: Dict[str, str] = dict()
+
+    for i, attr_spec in enumerate(class_schema):
+        if attr_spec.name in names:
+            values[attr_spec.name] = attr_spec.name
+        elif attr_spec.optional:
+            # Same as Attribute.extract
+            namespace[f'__d{i}'] = attr_spec.default
+            values[attr_spec.name] = f'__d{i}'
+        else:
+            raise RequiredAttributeError(attr_spec.name)
+
+    constructor_arguments = ', '.join(f'{param_name}={values[param_name]}'
+                                      for param_name in schema.constructor_param_names)
+    lines = [
+        f'def build_{cls.__name__}({", ".join(names)}):',
+        f'    __obj = __cls_ref()({constructor_arguments})',
+    ]
+
+    if not schema.is_dataclass:
+        lines.extend(f'    __obj.{attr_spec.name} = {values[attr_spec.name]}' for attr_spec in class_schema)
+
+    lines.append('    return __obj')
+
+    exec('\n'.join(lines), namespace)
+
+    return namespace[f'build_{cls.__name__}']
+
+
+def _to_list(column: Iterable) -> Sequence:
+    if hasattr(column, 'tolist'):
+        # NumPy arrays and array.array
+        return column.tolist()
+
+    return column if isinstance(column, (list, tuple)) else list(column)
+
+
 class RequiredAttributeError(RuntimeError):
     """ Attribute in question is not defined before building the object """
     pass
-
-
-class IncompatibleBuildableClassError(RuntimeError):
-    """ Class annotations does not exist """
-    def __init__(self):
-        super().__init__('Requires class annotations. '
-                         'Check out the doc at https://github.com/shiroyuki/oriole/tree/master/oriole/docs.')
@@ -0,0 +1,232 @@
+"""
+This module provides the CBOR (RFC 8949) writer for :class:`gallium.obj.encoder.ObjectEncoder`.
+
+Unlike JSON, the following types are written natively instead of being converted to strings:
+
+* ``bytes``, ``bytearray`` and byte ``memoryview`` as byte strings (written without copying),
+* ``datetime.datetime`` as the standard date/time string (tag 0), where the naive one is written as UTC,
+* ``datetime.date`` as the full-date string (tag 1004, RFC 8943), and
+* ``Enum`` as its value.
+
+The other objects go through the plug-ins registered to the encoder, so the custom types are written in the same way
+as they are in JSON. The lists, tuples and dictionaries are written with definite lengths while the other iterables,
+e.g., generators, are written as indefinite-length arrays, item by item. The circular references are handled by the
+cycle policy of the encoder.
+
+.. code-block:: python
+
+    encoder = ObjectEncoder.build()
+
+    with open('records.cbor', 'wb') as f:
+        encoder.dump(records, f, format='cbor')
+
+    payload = dumps(records, encoder)
+
+"""
+import datetime
+import io
+import struct
+from enum import Enum
+from typing import Any, BinaryIO, Callable, Optional
+
+from gallium.obj.encoder import ObjectEncoder
+
+_MAJOR_UNSIGNED_INTEGER = 0
+_MAJOR_NEGATIVE_INTEGER = 1
+_MAJOR_BYTE_STRING = 2
+_MAJOR_TEXT_STRING = 3
+_MAJOR_ARRAY = 4
+_MAJOR_MAP = 5
+_MAJOR_TAG = 6
+
+_TAG_DATE_TIME_STRING = 0
+_TAG_POSITIVE_BIGNUM = 2
+_TAG_NEGATIVE_BIGNUM = 3
+_TAG_FULL_DATE_STRING = 1004
+
+_FALSE = b'\xf4'
+_TRUE = b'\xf5'
+_NULL = b'\xf6'
+_FLOAT64 = b'\xfb'
+_INDEFINITE_ARRAY = b'\x9f'
+_BREAK = b'\xff'
+
+_BYTE_FORMATS = ('B', 'b', 'c')
+
+_pack_float64 = struct.Struct('>d').pack
+
+
+class CborWriter:
+    """ CBOR Writer """
+
+    def __init__(self, fp: BinaryIO, encoder: Optional[ObjectEncoder] = None, buffer_size: int = 65536):
+        """
+        :param fp: The binary file object
+        :param encoder: The encoder providing the plug-ins (the default encoder if not given)
+        :param int buffer_size: The number of bytes to buffer before writing to the file
+        """
+        self.__fp = fp
+        self.__encoder = encoder or ObjectEncoder.build()
+        self.__buffer_size = buffer_size
+        self.__buffer = bytearray()
+        self.__walk = None
+
+    def write(self, obj: Any):
+        """ Write the object """
+        self.__walk = self.__encoder.start_walk()
+        self.__write(obj)
+        self.__flush_if_full()
+        return self
+
+    def flush(self):
+        """ Write the buffered data to the file """
+        if self.__buffer:
+            self.__fp.write(self.__buffer)
+            self.__buffer = bytearray()
+        return self
+
+    def __flush_if_full(self):
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def __write(self, obj: Any):
+        obj_type = type(obj)
+        buffer = self.__buffer
+
+        # The most common types are checked first and the small values are written inline.
+        if obj_type is str:
+            data = obj.encode('utf-8')
+            if len(data) < 24:
+                buffer.append(0x60 | len(data))
+            else:
+                self.__write_head(_MAJOR_TEXT_STRING, len(data))
+            buffer += data
+        elif obj_type is int:
+            if 0 <= obj < 24:
+                buffer.append(obj)
+            else:
+                self.__write_integer(obj)
+        elif obj_type is bool:
+            buffer += _TRUE if obj else _FALSE
+        elif obj is None:
+            buffer += _NULL
+        elif obj_type is float:
+            buffer += _FLOAT64 + _pack_float64(obj)
+        elif obj_type is dict:
+            self.__write_container(obj, self.__write_map)
+        elif obj_type is list or obj_type is tuple:
+            self.__write_container(obj, self.__write_array)
+        elif isinstance(obj, Enum):
+            self.__write(obj.value)
+        elif isinstance(obj, datetime.datetime):
+            self.__write_head(_MAJOR_TAG, _TAG_DATE_TIME_STRING)
+            # NOTE: RFC 3339 requires the UTC offset, so the naive date/time is written as UTC.
+            self.__write(obj.isoformat() if obj.tzinfo is not None else obj.isoformat() + 'Z')
+        elif isinstance(obj, datetime.date):
+            self.__write_head(_MAJOR_TAG, _TAG_FULL_DATE_STRING)
+            self.__write(obj.isoformat())
+        elif isinstance(obj, (bytes, bytearray, memoryview)) and memoryview(obj).format in _BYTE_FORMATS:
+            self.__write_byte_string(memoryview(obj))
+        else:
+            self.__write_container(obj, self.__write_other)
+
+    def __write_container(self, obj: Any, write: Callable[[Any], None]):
+        """ Write the object which may refer to the other objects, with the cycle detection if enabled """
+        walk = self.__walk
+
+        if walk is None:
+            write(obj)
+            return
+
+        if not walk.enter(obj):
+            self.__write(walk.replace_cycle(obj))
+            return
+
+        try:
+            write(obj)
+        finally:
+            walk.leave(obj)
+
+    def __write_other(self, obj: Any):
+        transformed_obj, transformed = self.__encoder.transform(obj)
+
+        if transformed:
+            self.__write(transformed_obj)
+        elif isinstance(obj, bool):
+            self.__buffer += _TRUE if obj else _FALSE
+        elif isinstance(obj, int):
+            self.__write_integer(int(obj))
+        elif isinstance(obj, float):
+            self.__buffer += _FLOAT64 + _pack_float64(obj)
+        elif isinstance(obj, str):
+            self.__write(str(obj))
+        elif isinstance(obj, dict):
+            self.__write_map(obj)
+        elif isinstance(obj, (list, tuple)):
+            self.__write_array(obj)
+        elif hasattr(obj, '__iter__'):
+            self.__write_indefinite_array(obj)
+        else:
+            raise TypeError(f'Object of type {type(obj).__name__} is not CBOR serializable')
+
+    def __write_head(self, major_type: int, value: int):
+        initial_byte = major_type << 5
+
+        if value < 24:
+            self.__buffer.append(initial_byte | value)
+        elif value < 0x100:
+            self.__buffer += struct.pack('>BB', initial_byte | 24, value)
+        elif value < 0x10000:
+            self.__buffer += struct.pack('>BH', initial_byte | 25, value)
+        elif value < 0x100000000:
+            self.__buffer += struct.pack('>BI', initial_byte | 26, value)
+        else:
+            self.__buffer += struct.pack('>BQ', initial_byte | 27, value)
+
+    def __write_integer(self, value: int):
+        major_type, argument = (_MAJOR_UNSIGNED_INTEGER, value) if value >= 0 else (_MAJOR_NEGATIVE_INTEGER, -1 - value)
+
+        if argument < 0x10000000000000000:
+            self.__write_head(major_type, argument)
+            return
+
+        # The integer does not fit in 64 bits.
+        self.__write_head(_MAJOR_TAG, _TAG_POSITIVE_BIGNUM if value >= 0 else _TAG_NEGATIVE_BIGNUM)
+        self.__write(argument.to_bytes((argument.bit_length() + 7) // 8, 'big'))
+
+    def __write_byte_string(self, view: memoryview):
+        self.__write_head(_MAJOR_BYTE_STRING, view.nbytes)
+
+        if view.nbytes < self.__buffer_size:
+            self.__buffer += view
+        else:
+            # Write the large payload directly without copying it into the buffer.
+            self.flush()
+            self.__fp.write(view if view.contiguous else view.tobytes())
+
+    def __write_map(self, obj: dict):
+        self.__write_head(_MAJOR_MAP, len(obj))
+        for key, value in obj.items():
+            self.__write(key)
+            self.__write(value)
+            self.__flush_if_full()
+
+    def __write_array(self, obj):
+        self.__write_head(_MAJOR_ARRAY, len(obj))
+        for item in obj:
+            self.__write(item)
+            self.__flush_if_full()
+
+    def __write_indefinite_array(self, obj):
+        self.__buffer += _INDEFINITE_ARRAY
+        for item in obj:
+            self.__write(item)
+            self.__flush_if_full()
+        self.__buffer += _BREAK
+
+
+def dumps(obj: Any, encoder: Optional[ObjectEncoder] = None) -> bytes:
+    """ Encode the object into CBOR """
+    output = io.BytesIO()
+    CborWriter(output, encoder).write(obj).flush()
+    return output.getvalue()
@@ -0,0 +1,245 @@
+"""
+This module provides an object decoder, the reverse of :class:`gallium.obj.encoder.ObjectEncoder`, which turns the
+dictionaries (e.g., parsed JSON) into the instances of data classes and annotated classes.
+
+Quick start
+###########
+
+.. code-block:: python
+
+    @dataclass
+    class Pet:
+        name: str
+        color: Color  # Enum
+
+    @dataclass
+    class Owner:
+        name: str
+        born_at: datetime.datetime
+        pets: List[Pet]
+        nickname: Optional[str] = None
+
+    decoder = ObjectDecoder()
+
+    owner = decoder.decode(Owner, {'name': 'Juti', 'born_at': '2000-01-02T03:04:05', 'pets': [...]})
+
+    for owner in decoder.decode_many(Owner, json_lines):
+        ...
+
+How it works
+############
+
+The class schema (:data:`gallium.obj.schema.registry`) is analyzed once per class and compiled into a
+function reading the values from the dictionary and calling the constructor directly. The nested classes, ``Optional``,
+``datetime.datetime`` / ``datetime.date`` (ISO 8601), ``Enum`` and the collections of them (e.g., ``List[Pet]``,
+``Dict[str, Pet]``) are converted. The other values are used as they are.
+
+A missing attribute falls back to its default value. If the attribute is required, i.e., neither optional nor with a
+default value, :class:`gallium.obj.builder.RequiredAttributeError` is raised.
+"""
+import collections.abc
+import datetime
+from dataclasses import MISSING
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Set, Type, Union
+
+from gallium.obj.builder import RequiredAttributeError
+from gallium.obj.schema import AttributeSpec, registry
+from gallium.obj.utils import NONE_TYPE, is_dataclass_class
+
+_IDENTITY_TYPES = (str, int, float, bool, bytes, Any)
+
+_LIST_ORIGINS = (list, collections.abc.Iterable, collections.abc.Sequence, collections.abc.MutableSequence,
+                 collections.abc.Collection)
+_SET_ORIGINS = (set, frozenset, collections.abc.Set, collections.abc.MutableSet)
+_DICT_ORIGINS = (dict, collections.abc.Mapping, collections.abc.MutableMapping)
+
+
+def _decode_datetime(value: Any) -> datetime.datetime:
+    return value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(value)
+
+
+def _decode_date(value: Any) -> datetime.date:
+    return value if isinstance(value, datetime.date) else datetime.date.fromisoformat(value)
+
+
+class ObjectDecoder:
+    """ Object Decoder """
+
+    def __init__(self):
+        self.__decoders: Dict[Type, Callable[[Mapping], Any]] = dict()
+        self.__compiling: Set[Type] = set()
+
+    def decode(self, cls: Type, data: Mapping) -> Any:
+        """ Decode the dictionary into an instance of the class """
+        return self.get_decoder(cls)(data)
+
+    def decode_many(self, cls: Type, iterable: Iterable[Mapping]) -> Iterator:
+        """ Decode the dictionaries into the instances of the class lazily, one at a time """
+        return map(self.get_decoder(cls), iterable)
+
+    def get_decoder(self, cls: Type) -> Callable[[Mapping], Any]:
+        """ Get the compiled decoding function of the class """
+        decoder = self.__decoders.get(cls)
+
+        if decoder is None:
+            if cls in self.__compiling:
+                # The class refers to itself, directly or indirectly. Look up the decoder once it is compiled.
+                return lambda data: self.__decoders[cls](data)
+
+            self.__compiling.add(cls)
+            try:
+                decoder = self.__decoders[cls] = self.__compile(cls)
+            finally:
+                self.__compiling.discard(cls)
+
+        return decoder
+
+    def __compile(self, cls: Type) -> Callable[[Mapping], Any]:
+        class_schema = registry.get(cls)
+        schema = class_schema.attributes
+        namespace: Dict[str, Any] = dict(cls=cls, RequiredAttributeError=RequiredAttributeError)
+        lines = [f'def decode_{cls.__name__}(data):']
+
+        for i, spec in enumerate(schema):
+            converter = self.__compile_converter(spec.annotation)
+            value_expression = f"data[{spec.name!r}]"
+
+            if converter is not None:
+                namespace[f'c{i}'] = converter
+                value_expression = f'c{i}({value_expression})'
+
+            default_expression = self.__compile_default(cls, spec, i, namespace)
+
+            lines.append(f'    if {spec.name!r} in data:')
+            lines.append(f'        v{i} = {value_expression}')
+            lines.append('    else:')
+            lines.append(f'        v{i} = {default_expression}'
+                         if default_expression
+                         else f'        raise RequiredAttributeError({spec.name!r})')
+
+        constructor_param_names = class_schema.constructor_param_names
+        arguments = ', '.join(f'{spec.name}=v{i}'
+                              for i, spec in enumerate(schema)
+                              if spec.name in constructor_param_names)
+
+        lines.append(f'    obj = cls({arguments})')
+
+        if not class_schema.is_dataclass:
+            # Like ObjectBuilder, define the attributes which are not covered by the constructor.
+            lines.extend(f'    obj.{spec.name} = v{i}'
+                         for i, spec in enumerate(schema)
+                         if spec.name not in constructor_param_names)
+
+        lines.append('    return obj')
+
+        exec('\n'.join(lines), namespace)
+
+        return namespace[f'decode_{cls.__name__}']
+
+    def __compile_default(self, cls: Type, spec: AttributeSpec, i: int, namespace: Dict[str, Any]) -> Optional[str]:
+        """ Compile the expression of the default value
+
+            :return: the expression or ``None`` if the attribute is required
+        """
+        if is_dataclass_class(cls):
+            field = cls.__dataclass_fields__[spec.name]
+
+            if field.default_factory is not MISSING:
+                namespace[f'f{i}'] = field.default_factory
+                return f'f{i}()'
+
+            if field.default is not MISSING:
+                namespace[f'd{i}'] = field.default
+                return f'd{i}'
+        elif spec.optional or spec.default is not None:
+            namespace[f'd{i}'] = spec.default
+            return f'd{i}'
+
+        return 'None' if spec.optional else None
+
+    def __compile_converter(self, annotation: Any) -> Optional[Callable[[Any], Any]]:
+        """ Compile the function converting the value to the annotated type
+
+            :return: the converting function or ``None`` if the value is used as it is
+        """
+        if annotation is None or annotation in _IDENTITY_TYPES or isinstance(annotation, str):
+            return None
+
+        origin = getattr(annotation, '__origin__', None)
+        args = getattr(annotation, '__args__', None) or tuple()
+
+        if origin is Union:
+            item_types = [item_type for item_type in args if item_type is not NONE_TYPE]
+
+            # Only Optional[X] is converted as the type of the other unions is ambiguous.
+            if len(item_types) != 1:
+                return None
+
+            item_converter = self.__compile_converter(item_types[0])
+
+            if item_converter is None:
+                return None
+
+            return lambda value: None if value is None else item_converter(value)
+
+        if origin is not None:
+            return self.__compile_collection_converter(origin, args)
+
+        if not isinstance(annotation, type):
+            return None
+
+        if issubclass(annotation, datetime.datetime):
+            return _decode_datetime
+
+        if issubclass(annotation, datetime.date):
+            return _decode_date
+
+        if issubclass(annotation, Enum):
+            return annotation
+
+        if is_dataclass_class(annotation) or (annotation.__module__ != 'builtins'
+                                              and '__annotations__' in annotation.__dict__):
+            decoder = self.get_decoder(annotation)
+            return lambda value: value if value.__class__ is annotation else decoder(value)
+
+        return None
+
+    def __compile_collection_converter(self, origin: Any, args: tuple) -> Optional[Callable[[Any], Any]]:
+        if origin is tuple:
+            if len(args) == 2 and args[1] is Ellipsis:
+                item_converter = self.__compile_converter(args[0])
+                return (lambda value: tuple(value)) \
+                    if item_converter is None \
+                    else (lambda value: tuple([item_converter(item) for item in value]))
+
+            item_converters = [self.__compile_converter(item_type) for item_type in args]
+
+            if not any(item_converters):
+                return tuple
+
+            return lambda value: tuple([
+                item if item_converter is None else item_converter(item)
+                for item_converter, item in zip(item_converters, value)
+            ])
+
+        if origin in _DICT_ORIGINS:
+            value_converter = self.__compile_converter(args[1]) if len(args) == 2 else None
+            return None \
+                if value_converter is None \
+                else (lambda value: {key: value_converter(item) for key, item in value.items()})
+
+        item_converter = self.__compile_converter(args[0]) if args else None
+
+        if origin in _SET_ORIGINS:
+            collection_type = frozenset if origin is frozenset else set
+        elif origin in _LIST_ORIGINS:
+            if item_converter is None:
+                return None
+            return lambda value: [item_converter(item) for item in value]
+        else:
+            return None
+
+        return collection_type \
+            if item_converter is None \
+            else (lambda value: collection_type([item_converter(item) for item in value]))
@@ -1,8 +1,48 @@
-from typing import Type
+from typing import Optional, Type
 
-from gallium.obj.utils import stringify
+from gallium.obj.schema import registry
+from gallium.obj.utils import compile_formatter
 
 
-def to_string(cls: Type):
-    cls.__str__ = stringify
-    return cls
+def to_string(cls: Optional[Type] = None,
+              *,
+              max_items: Optional[int] = None,
+              max_string: Optional[int] = None,
+              max_depth: Optional[int] = None,
+              as_repr: bool = False):
+    """ Define ``__str__`` (and optionally ``__repr__``) of the class
+
+        The formatter is generated once per class (see :func:`gallium.obj.utils.compile_formatter`) on the first use.
+
+        .. code-block:: python
+
+            @to_string
+            class User:
+                ...
+
+            @to_string(max_items=10, max_string=100, max_depth=2, as_repr=True)
+            class Report:
+                ...
+
+        :param int max_items: The maximum number of the items of a sequence, set or mapping to show
+        :param int max_string: The maximum length of a string to show
+        :param int max_depth: The maximum depth of the nested objects, sequences, sets and mappings to show
+        :param bool as_repr: Flag to also define ``__repr__``
+    """
+    options = (max_items, max_string, max_depth)
+
+    def format_object(obj) -> str:
+        # NOTE: The formatter is cached per exact class as a subclass may declare more attributes.
+        obj_type = type(obj)
+        return registry.get_artifact(obj_type, (to_string, options),
+                                     lambda: compile_formatter(obj_type, *options))(obj)
+
+    def decorate(target_cls: Type):
+        target_cls.__str__ = format_object
+
+        if as_repr:
+            target_cls.__repr__ = format_object
+
+        return target_cls
+
+    return decorate if cls is None else decorate(cls)
@@ -1,75 +1,694 @@
+import array
+import base64
 import datetime
+import json
+import math
+import multiprocessing
+import os
+import sys
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from abc import ABC
-from dataclasses import asdict, is_dataclass
+from dataclasses import dataclass, is_dataclass
 from enum import Enum
-from typing import Any, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, TextIO, Tuple, Type
+
+from gallium.obj.schema import registry
+
+# The JSON primitives, which are returned as they are without consulting the plug-ins.
+_PRIMITIVE_TYPES = frozenset({str, int, float, bool, type(None)})
+_JSON = json.JSONEncoder()
+
+
+def _encode_float(value: float) -> str:
+    # Follow the JSON encoder from the standard library.
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return 'Infinity'
+    if value == -float('inf'):
+        return '-Infinity'
+    return float.__repr__(value)
+
+
+# The JSON encoding of the primitives by type
+_PRIMITIVE_JSON_ENCODERS: Dict[Type, Callable[[Any], str]] = {
+    str: json.encoder.encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: 'true' if value else 'false',
+    type(None): lambda value: 'null',
+}
+
+FORMAT_JSON = 'json'
+FORMAT_JSON_LINES = 'jsonl'
+FORMAT_CBOR = 'cbor'
+
+EXECUTOR_THREAD = 'thread'
+EXECUTOR_PROCESS = 'process'
+
+CYCLE_RAISE = 'raise'
+CYCLE_REFERENCE = 'ref'
+CYCLE_TRUNCATE = 'truncate'
 
 
 class PlugIn(ABC):
+    handled_types: Tuple[Type, ...] = tuple()
+    """ The types handled by the plug-in
+
+        When defined, the plug-in is selected by the type of the object (including its subclasses) and the result is
+        memoized per type by the encoder. Otherwise, :meth:`can_handle` is called for every object.
+    """
+
+    def can_handle_type(self, cls: Type) -> Optional[bool]:
+        """ Check whether the plug-in handles all instances of the given type
+
+            :return: ``True`` or ``False`` if it can be decided by the type alone, or ``None`` if :meth:`can_handle`
+                     needs to be called for each object.
+        """
+        return issubclass(cls, self.handled_types) if self.handled_types else None
+
     def can_handle(self, obj: Any) -> bool:
-        ...
+        return bool(self.handled_types) and isinstance(obj, self.handled_types)
 
     def encode(self, obj: Any) -> Any:
         ...
 
+    def compile(self, cls: Type) -> Optional[Callable[[Any, Callable[[Any], Any]], Any]]:
+        """ Compile the function encoding the instances of the given type in one pass
+
+            This is only called when the plug-in handles the type unconditionally (see :meth:`can_handle_type`).
+            The compiled function takes the object and the function to encode the nested values, and returns the
+            encoded result, which is NOT encoded again by the encoder.
+
+            :return: the compiled function, or ``None`` to use :meth:`encode` instead
+        """
+        return None
+
 
 class DataClassPlugIn(PlugIn):
+    def can_handle_type(self, cls: Type) -> Optional[bool]:
+        return is_dataclass(cls)
+
     def can_handle(self, obj: Any) -> bool:
-        return is_dataclass(obj)
+        return is_dataclass(obj) and not isinstance(obj, type)
 
     def encode(self, obj: Any) -> Any:
-        return asdict(obj)
+        # NOTE: Unlike asdict, the field values are not copied as they are encoded by the encoder afterward.
+        return {name: getattr(obj, name) for name in registry.get(type(obj)).attribute_names}
+
+    def compile(self, cls: Type) -> Optional[Callable[[Any, Callable[[Any], Any]], Any]]:
+        """ Generate the function building the output dictionary directly from the fields
+
+            Unlike :func:`dataclasses.asdict`, the field values are not deep-copied before being encoded.
+        """
+        field_names = registry.get(cls).attribute_names
+        lines = [f'def encode_{cls.__name__}(obj, encode):']
+        lines.extend(f'    v{i} = obj.{field_name}' for i, field_name in enumerate(field_names))
+        lines.append('    return {')
+        lines.extend(f'        {field_name!r}: v{i} if v{i}.__class__ in primitive_types else encode(v{i}),'
+                     for i, field_name in enumerate(field_names))
+        lines.append('    }')
+
+        namespace = dict(primitive_types=_PRIMITIVE_TYPES)
+        exec('\n'.join(lines), namespace)
+
+        return namespace[f'encode_{cls.__name__}']
 
 
 class DateTimePlugIn(PlugIn):
+    handled_types = (datetime.datetime,)
+
     def __init__(self, time_format: Optional[str] = None):
         self.__time_format = time_format
 
-    def can_handle(self, obj: Any) -> bool:
-        return isinstance(obj, datetime.datetime)
-
     def encode(self, obj: datetime.datetime) -> Any:
         return obj.strftime(self.__time_format) if self.__time_format else obj.isoformat()
 
 
 class EnumPlugIn(PlugIn):
-    def can_handle(self, obj: Any) -> bool:
-        return isinstance(obj, Enum)
+    handled_types = (Enum,)
 
     def encode(self, obj: Enum) -> Any:
         return obj.value
 
 
+class BufferPlugIn(PlugIn):
+    """ Plug-in for the bytes-like objects and the numeric arrays
+
+        The bytes-like objects (``bytes``, ``bytearray``, ``memoryview`` and other objects supporting the buffer
+        protocol) are encoded as a whole through a ``memoryview`` without copying, according to the binary format:
+
+        * ``base64`` (default) for the Base64-encoded string,
+        * ``hex`` for the hexadecimal string, or
+        * ``raw`` for the ``memoryview`` itself, which is only suitable for the binary sinks.
+
+        The numeric arrays (``array.array``, the typed ``memoryview`` and the array-like objects such as NumPy arrays)
+        are converted to the lists of numbers by their own (vectorized) ``tolist`` method.
+    """
+    BASE64 = 'base64'
+    HEX = 'hex'
+    RAW = 'raw'
+
+    __BINARY_FORMATS = ('B', 'b', 'c')
+
+    def __init__(self, binary_format: str = BASE64):
+        if binary_format not in (self.BASE64, self.HEX, self.RAW):
+            raise ValueError(f'Unknown binary format: {binary_format}')
+
+        self.__binary_format = binary_format
+
+    def can_handle_type(self, cls: Type) -> Optional[bool]:
+        return issubclass(cls, (bytes, bytearray, memoryview, array.array)) \
+               or hasattr(cls, '__buffer__') \
+               or (hasattr(cls, '__array_interface__') and hasattr(cls, 'tolist'))
+
+    def can_handle(self, obj: Any) -> bool:
+        return self.can_handle_type(type(obj))
+
+    def encode(self, obj: Any) -> Any:
+        if isinstance(obj, array.array) or hasattr(obj, '__array_interface__'):
+            return obj.tolist()
+
+        view = obj if isinstance(obj, memoryview) else memoryview(obj)
+
+        if view.format not in self.__BINARY_FORMATS:
+            return view.tolist()
+
+        if self.__binary_format == self.RAW:
+            return view
+
+        if not view.contiguous:
+            view = memoryview(view.tobytes())
+
+        return base64.b64encode(view).decode('ascii') if self.__binary_format == self.BASE64 else view.hex()
+
+    def compile(self, cls: Type) -> Optional[Callable[[Any, Callable[[Any], Any]], Any]]:
+        # The output is final, i.e., the raw memoryview must not be encoded again.
+        return lambda obj, encode: self.encode(obj)
+
+
+class CircularReferenceError(ValueError):
+    """ The object refers to itself directly or indirectly """
+    pass
+
+
+@dataclass
+class EncodingStats:
+    """ Statistics of the Identity Memo """
+    hits: int = 0
+    misses: int = 0
+    cycles: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.cycles = 0
+
+
 class ObjectEncoder:
-    def __init__(self):
+    def __init__(self, memoize: bool = False, cycle_policy: Optional[str] = None):
+        """
+        :param bool memoize: Flag to reuse the encoded result for the objects referred more than once within one
+                             :meth:`encode` call (by identity). The repeated references share the same encoded result.
+                             This does not apply to :meth:`iter_encode` and :meth:`dump`, which keep nothing of what
+                             they have written and write the repeated references again.
+        :param str cycle_policy: The policy for the circular references, either ``raise`` for raising
+                                 :class:`CircularReferenceError`, ``ref`` for emitting the marker
+                                 ``{"$ref": "<module>.<class>@<id>"}``, or ``truncate`` for emitting ``None``. By
+                                 default, the circular references are not detected. This applies to :meth:`encode`,
+                                 :meth:`iter_encode` and :meth:`dump` (including CBOR).
+        """
+        if cycle_policy not in (None, CYCLE_RAISE, CYCLE_REFERENCE, CYCLE_TRUNCATE):
+            raise ValueError(f'Unknown cycle policy: {cycle_policy}')
+
+        self.__memoize = memoize
+        self.__cycle_policy = cycle_policy
+        self.__tracking = memoize or cycle_policy is not None
+        self.__stats = EncodingStats()
         self.__plug_ins: List[PlugIn] = []
+        # The candidate plug-ins by type, each paired with the flag whether it handles the type unconditionally and
+        # the compiled encoding function (if available).
+        self.__type_handlers: Dict[Type, Tuple[Tuple[PlugIn, bool, Optional[Callable]], ...]] = dict()
+
+    @property
+    def stats(self) -> EncodingStats:
+        """ The cumulative statistics of the identity memo and the cycle detection """
+        return self.__stats
+
+    def start_walk(self) -> Optional['_TrackedEncoding']:
+        """ Start the cycle detection for the sinks walking the object themselves (e.g., :mod:`gallium.obj.cbor`)
+
+            :return: the state of the walk, or ``None`` if the circular references are not detected
+        """
+        if self.__cycle_policy is None:
+            return None
+
+        return _TrackedEncoding(self, False, self.__cycle_policy, self.__stats)
 
     def register(self, plug_in: PlugIn):
         self.__plug_ins.append(plug_in)
+        self.__type_handlers.clear()
         return self
 
     def encode(self, obj: Any):
-        for plug_in in self.__plug_ins:
-            if plug_in.can_handle(obj):
-                return self.encode(plug_in.encode(obj))
+        if self.__tracking:
+            return _TrackedEncoding(self, self.__memoize, self.__cycle_policy, self.__stats).encode(obj)
+
+        return self.__encode_untracked(obj)
+
+    def _encode_node(self, obj: Any, encode: Callable[[Any], Any]):
+        """ Encode the object with the given function to encode the nested objects """
+        obj_type = type(obj)
+
+        if obj_type in _PRIMITIVE_TYPES:
+            return obj
+
+        handlers = self.__type_handlers.get(obj_type)
+
+        if handlers is None:
+            handlers = self.__resolve_handlers(obj_type)
+
+        for plug_in, unconditional, compiled_encode in handlers:
+            if compiled_encode is not None:
+                return compiled_encode(obj, encode)
+            if unconditional or plug_in.can_handle(obj):
+                return encode(plug_in.encode(obj))
 
         if isinstance(obj, dict):
             return {
-                k: self.encode(v)
+                k: encode(v)
                 for k, v in obj.items()
             }
 
         if not isinstance(obj, str) and hasattr(obj, '__iter__'):
             return [
-                self.encode(item)
+                encode(item)
                 for item in obj
             ]
 
         return obj
 
+    def __encode_untracked(self, obj: Any):
+        # NOTE: This is the same as _encode_node but inlined for the speed as it is the hot path.
+        obj_type = type(obj)
+
+        if obj_type in _PRIMITIVE_TYPES:
+            return obj
+
+        handlers = self.__type_handlers.get(obj_type)
+
+        if handlers is None:
+            handlers = self.__resolve_handlers(obj_type)
+
+        for plug_in, unconditional, compiled_encode in handlers:
+            if compiled_encode is not None:
+                return compiled_encode(obj, self.__encode_untracked)
+            if unconditional or plug_in.can_handle(obj):
+                return self.__encode_untracked(plug_in.encode(obj))
+
+        if isinstance(obj, dict):
+            return {
+                k: self.__encode_untracked(v)
+                for k, v in obj.items()
+            }
+
+        if not isinstance(obj, str) and hasattr(obj, '__iter__'):
+            return [
+                self.__encode_untracked(item)
+                for item in obj
+            ]
+
+        return obj
+
+    def encode_parallel(self,
+                        obj: Any,
+                        workers: Optional[int] = None,
+                        chunk_size: Optional[int] = None,
+                        threshold: int = 10000,
+                        executor: Optional[str] = None):
+        """ Encode the large top-level list, tuple or mapping in parallel
+
+            The items are split into chunks, which are encoded by the pool of workers with the same plug-ins, and then
+            reassembled in order. The result is the same as :meth:`encode` except that the identity memo and the cycle
+            detection only work within each chunk.
+
+            :param obj: The object to encode
+            :param int workers: The number of the workers (the number of the CPUs by default)
+            :param int chunk_size: The number of the items per chunk (split evenly into four chunks per worker by
+                                   default)
+            :param int threshold: The minimum number of the items to encode in parallel. Below this, the object is
+                                  encoded serially.
+            :param str executor: Either ``process`` or ``thread``. By default, the threads are only used on the
+                                 free-threaded builds of Python where the GIL is disabled.
+        """
+        original_obj = obj
+        obj, encoded = self.__transform(obj)
+
+        if encoded:
+            return obj
+
+        if not isinstance(obj, (list, tuple, Mapping)) or len(obj) < threshold:
+            # NOTE: The original object is encoded so that the plug-ins are not applied to the transformed one again.
+            return self.encode(original_obj)
+
+        workers = workers or os.cpu_count() or 1
+        chunk_size = chunk_size or max(1, math.ceil(len(obj) / (workers * 4)))
+        executor = executor or (EXECUTOR_THREAD if _is_gil_disabled() else EXECUTOR_PROCESS)
+        values = list(obj.values()) if isinstance(obj, Mapping) else obj
+        ranges = [(i, min(i + chunk_size, len(values))) for i in range(0, len(values), chunk_size)]
+
+        if executor == EXECUTOR_THREAD:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                encoded_chunks = list(pool.map(lambda r: self.encode(values[r[0]:r[1]]), ranges))
+        elif executor == EXECUTOR_PROCESS:
+            forking = 'fork' in multiprocessing.get_all_start_methods()
+
+            # When the worker processes are forked, they inherit the values and only the ranges are sent to them.
+            # Otherwise, the chunks of the values are pickled and sent to them.
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('fork' if forking else None),
+                                     initializer=_initialize_worker,
+                                     initargs=(self, values if forking else None)) as pool:
+                encoded_chunks = list(
+                    pool.map(_encode_range_in_worker, ranges)
+                    if forking
+                    else pool.map(_encode_in_worker, [values[start:end] for start, end in ranges])
+                )
+        else:
+            raise ValueError(f'Unknown executor: {executor}')
+
+        encoded_values = [value for encoded_chunk in encoded_chunks for value in encoded_chunk]
+
+        return dict(zip(obj.keys(), encoded_values)) if isinstance(obj, Mapping) else encoded_values
+
+    def iter_encode(self, obj: Any) -> Iterator[str]:
+        """ Encode the object into JSON lazily, chunk by chunk
+
+            Unlike :meth:`encode`, the lists, dictionaries, generators and iterators are walked lazily without building
+            the intermediate structure, i.e., a generator is consumed as the chunks are written.
+        """
+        return self.__iter_json(obj, self.start_walk())
+
+    def dump(self, obj: Any, fp: TextIO, format: str = FORMAT_JSON, buffer_size: int = 65536):
+        """ Write the object to the file incrementally
+
+            :param obj: The object to write
+            :param fp: The file object, which must be binary for CBOR
+            :param str format: Either ``json``, ``jsonl`` (JSON Lines, one item of the iterable per line) or ``cbor``
+                               (see :mod:`gallium.obj.cbor`)
+            :param int buffer_size: The number of characters (or bytes) to buffer before writing to the file
+        """
+        if format == FORMAT_CBOR:
+            from gallium.obj.cbor import CborWriter
+            CborWriter(fp, self, buffer_size).write(obj).flush()
+            return
+
+        if format == FORMAT_JSON:
+            chunks = self.__iter_json(obj, self.start_walk())
+        elif format == FORMAT_JSON_LINES:
+            chunks = self.__iter_json_lines(obj, self.start_walk())
+        else:
+            raise ValueError(f'Unknown format: {format}')
+
+        buffer: List[str] = list()
+        buffered_size = 0
+
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered_size += len(chunk)
+
+            if buffered_size >= buffer_size:
+                fp.write(''.join(buffer))
+                buffer.clear()
+                buffered_size = 0
+
+        if buffer:
+            fp.write(''.join(buffer))
+
+    def transform(self, obj: Any) -> Tuple[Any, bool]:
+        """ Apply the first applicable plug-in to the object once, without the compiled functions
+
+            This is for the other sinks (e.g., :mod:`gallium.obj.cbor`) which walk the transformed object themselves.
+
+            :return: the transformed object and the flag whether any plug-in is applied
+        """
+        obj_type = type(obj)
+
+        if obj_type in _PRIMITIVE_TYPES:
+            return obj, False
+
+        handlers = self.__type_handlers.get(obj_type)
+
+        if handlers is None:
+            handlers = self.__resolve_handlers(obj_type)
+
+        for plug_in, unconditional, _ in handlers:
+            if unconditional or plug_in.can_handle(obj):
+                return plug_in.encode(obj), True
+
+        return obj, False
+
+    def __transform(self, obj: Any, walk: Optional['_TrackedEncoding'] = None) -> Tuple[Any, bool]:
+        """ Apply the plug-ins to the object until none is applicable
+
+            :param walk: The state of the walk, which encodes the nested objects of the compiled plug-ins
+            :return: the transformed object and the flag whether the object is fully encoded
+        """
+        obj_type = type(obj)
+
+        if obj_type in _PRIMITIVE_TYPES:
+            return obj, True
+
+        handlers = self.__type_handlers.get(obj_type)
+
+        if handlers is None:
+            handlers = self.__resolve_handlers(obj_type)
+
+        for plug_in, unconditional, compiled_encode in handlers:
+            if compiled_encode is not None:
+                return compiled_encode(obj, walk.encode if walk is not None else self.encode), True
+            if unconditional or plug_in.can_handle(obj):
+                return self.__transform(plug_in.encode(obj), walk)
+
+        return obj, False
+
+    def __iter_json_lines(self, obj: Any, walk: Optional['_TrackedEncoding']) -> Iterator[str]:
+        if walk is not None:
+            # NOTE: The items referring to the iterable itself are the circular references.
+            walk.enter(obj)
+
+        obj, encoded = self.__transform(obj, walk)
+
+        if encoded or isinstance(obj, (str, dict)) or not hasattr(obj, '__iter__'):
+            yield from self.__iter_json_node(obj, encoded, walk)
+            yield '\n'
+            return
+
+        for item in obj:
+            yield from self.__iter_json(item, walk)
+            yield '\n'
+
+    def __iter_json(self, obj: Any, walk: Optional['_TrackedEncoding']) -> Iterator[str]:
+        if walk is None or type(obj) in _PRIMITIVE_TYPES:
+            yield from self.__iter_json_node(*self.__transform(obj), None)
+            return
+
+        if not walk.enter(obj):
+            yield from self.__iter_json(walk.replace_cycle(obj), None)
+            return
+
+        try:
+            yield from self.__iter_json_node(*self.__transform(obj, walk), walk)
+        finally:
+            walk.leave(obj)
+
+    def __iter_json_node(self, obj: Any, encoded: bool, walk: Optional['_TrackedEncoding']) -> Iterator[str]:
+        """ Write the transformed object """
+        if encoded:
+            primitive_encode = _PRIMITIVE_JSON_ENCODERS.get(type(obj))
+            yield primitive_encode(obj) if primitive_encode else _JSON.encode(obj)
+        elif isinstance(obj, str):
+            # The subclasses of the primitives are written as the primitives, like the JSON encoder does.
+            yield json.encoder.encode_basestring_ascii(str(obj))
+        elif isinstance(obj, int):
+            yield int.__repr__(obj)
+        elif isinstance(obj, float):
+            yield _encode_float(obj)
+        elif isinstance(obj, dict):
+            separator = '{'
+            for key, value in obj.items():
+                yield f'{separator}{json.encoder.encode_basestring_ascii(self.__encode_key(key))}: '
+                separator = ', '
+                primitive_encode = _PRIMITIVE_JSON_ENCODERS.get(type(value))
+                if primitive_encode:
+                    yield primitive_encode(value)
+                else:
+                    yield from self.__iter_json(value, walk)
+            yield '{}' if separator == '{' else '}'
+        elif hasattr(obj, '__iter__'):
+            separator = '['
+            for item in obj:
+                yield separator
+                separator = ', '
+                primitive_encode = _PRIMITIVE_JSON_ENCODERS.get(type(item))
+                if primitive_encode:
+                    yield primitive_encode(item)
+                else:
+                    yield from self.__iter_json(item, walk)
+            yield '[]' if separator == '[' else ']'
+        else:
+            # NOTE: This raises TypeError as the object is not serializable.
+            yield _JSON.encode(obj)
+
+    def __encode_key(self, key: Any) -> str:
+        if isinstance(key, str):
+            return key
+
+        # Follow the conversion of the JSON encoder for the primitive keys.
+        primitive_encode = _PRIMITIVE_JSON_ENCODERS.get(type(key))
+
+        return primitive_encode(key) if primitive_encode else str(self.encode(key))
+
+    def __resolve_handlers(self, obj_type: Type) -> Tuple[Tuple[PlugIn, bool, Optional[Callable]], ...]:
+        """ Resolve the candidate plug-ins for the type, in the order of registration
+
+            The candidates end at the first plug-in handling the type unconditionally as the plug-ins registered after
+            it would never be used.
+        """
+        handlers = list()
+
+        for plug_in in self.__plug_ins:
+            decision = plug_in.can_handle_type(obj_type)
+
+            if decision is None:
+                handlers.append((plug_in, False, None))
+            elif decision:
+                handlers.append((plug_in, True, plug_in.compile(obj_type)))
+                break
+
+        self.__type_handlers[obj_type] = resolved_handlers = tuple(handlers)
+
+        return resolved_handlers
+
+    def __getstate__(self):
+        # The compiled functions cannot be pickled. They are recompiled on demand.
+        state = dict(self.__dict__)
+        state['_ObjectEncoder__type_handlers'] = dict()
+        return state
+
     @staticmethod
-    def build():
-        return ObjectEncoder() \
+    def build(memoize: bool = False, cycle_policy: Optional[str] = None):
+        return ObjectEncoder(memoize, cycle_policy) \
             .register(DataClassPlugIn()) \
             .register(DateTimePlugIn()) \
-            .register(EnumPlugIn())
+            .register(EnumPlugIn()) \
+            .register(BufferPlugIn())
+
+
+def _is_gil_disabled() -> bool:
+    return not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+# The encoder and the values (inherited from the parent process when forked) used by the worker process
+_worker_encoder: Optional[ObjectEncoder] = None
+_worker_values: Optional[List[Any]] = None
+
+
+def _initialize_worker(encoder: ObjectEncoder, values: Optional[List[Any]]):
+    global _worker_encoder, _worker_values
+    _worker_encoder = encoder
+    _worker_values = values
+
+
+def _encode_in_worker(chunk: List[Any]) -> List[Any]:
+    return _worker_encoder.encode(chunk)
+
+
+def _encode_range_in_worker(value_range: Tuple[int, int]) -> List[Any]:
+    return _worker_encoder.encode(_worker_values[value_range[0]:value_range[1]])
+
+
+class _TrackedEncoding:
+    """ State of one :meth:`ObjectEncoder.encode` call with the identity memo and/or the cycle detection """
+
+    def __init__(self, encoder: ObjectEncoder, memoize: bool, cycle_policy: Optional[str], stats: EncodingStats):
+        self.__encoder = encoder
+        # NOTE: The memo keeps the reference to the original object so that its ID is not reused during the call.
+        self.__memo: Optional[Dict[int, Tuple[Any, Any]]] = dict() if memoize else None
+        self.__cycle_policy = cycle_policy
+        self.__active_ids: Set[int] = set()
+        self.__stats = stats
+
+    def encode(self, obj: Any):
+        if type(obj) in _PRIMITIVE_TYPES:
+            return obj
+
+        obj_id = id(obj)
+
+        if self.__memo is not None:
+            memo_entry = self.__memo.get(obj_id)
+
+            if memo_entry is not None:
+                self.__stats.hits += 1
+                return memo_entry[1]
+
+            self.__stats.misses += 1
+
+        if self.__cycle_policy is None:
+            return self.__encode_and_memoize(obj_id, obj)
+
+        if obj_id in self.__active_ids:
+            return self.replace_cycle(obj)
+
+        self.__active_ids.add(obj_id)
+
+        try:
+            return self.__encode_and_memoize(obj_id, obj)
+        finally:
+            self.__active_ids.discard(obj_id)
+
+    def enter(self, obj: Any) -> bool:
+        """ Mark the object as being walked by a sink other than :meth:`encode`
+
+            :return: ``False`` if the object is a circular reference, which is to be replaced by :meth:`replace_cycle`
+        """
+        obj_id = id(obj)
+
+        if obj_id in self.__active_ids:
+            return False
+
+        self.__active_ids.add(obj_id)
+
+        return True
+
+    def leave(self, obj: Any):
+        """ Mark the object as walked """
+        self.__active_ids.discard(id(obj))
+
+    def replace_cycle(self, obj: Any):
+        """ Get the replacement of the circular reference by the policy
+
+            :raises CircularReferenceError: if the policy is ``raise``
+        """
+        self.__stats.cycles += 1
+
+        if self.__cycle_policy == CYCLE_RAISE:
+            raise CircularReferenceError(f'Circular reference to {type(obj).__module__}.{type(obj).__qualname__}')
+        elif self.__cycle_policy == CYCLE_REFERENCE:
+            return {'$ref': f'{type(obj).__module__}.{type(obj).__qualname__}@{id(obj):x}'}
+        else:
+            return None
+
+    def __encode_and_memoize(self, obj_id: int, obj: Any):
+        result = self.__encoder._encode_node(obj, self.encode)
+
+        if self.__memo is not None:
+            self.__memo[obj_id] = (obj, result)
+
+        return result
@@ -0,0 +1,239 @@
+"""
+This module provides the registry of the class schemas and the type metadata shared by
+:class:`gallium.obj.builder.ObjectBuilder`, :class:`gallium.obj.decoder.ObjectDecoder`,
+:class:`gallium.obj.encoder.ObjectEncoder` and the command line argument definition of
+:class:`gallium.cli.core.Console`.
+
+Quick start
+###########
+
+The schema of a class is analyzed on the first use and cached by the exact class, i.e., a subclass never shares the
+schema of its parent class. The classes are referred weakly, so the cache does not keep them alive.
+
+.. code-block:: python
+
+    from gallium.obj.schema import registry
+
+    # Optionally, analyze the classes at startup instead of on the first use.
+    registry.warm([User, Pet])
+
+    schema = registry.get(User)
+    print(schema.attribute_names)
+
+    # Drop the cache, e.g., after the class is modified.
+    registry.invalidate(User)
+
+    print(registry.stats)
+
+"""
+import inspect
+import threading
+import weakref
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type, get_type_hints
+
+from gallium.obj.utils import get_all_types, is_dataclass_class, is_optional
+
+
+@dataclass(frozen=True)
+class AttributeSpec:
+    """ Class Attribute Specification """
+    name: str
+    types: Tuple[Type]
+    optional: bool
+    default: Any
+    annotation: Any = None
+
+
+@dataclass(frozen=True)
+class TypeSpec:
+    """ Type Specification of an Annotation """
+    types: Tuple[Type]
+    optional: bool
+
+
+@dataclass(frozen=True)
+class ClassSchema:
+    """ Class Schema """
+    attributes: Tuple[AttributeSpec, ...]
+    is_dataclass: bool
+    constructor_param_names: Tuple[str, ...]
+
+    @property
+    def attribute_names(self) -> Tuple[str, ...]:
+        return tuple(attribute.name for attribute in self.attributes)
+
+
+@dataclass
+class RegistryStats:
+    """ Statistics of the Schema Registry """
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SchemaRegistry:
+    """ Schema Registry """
+
+    def __init__(self):
+        self.__schemas: 'weakref.WeakKeyDictionary[Type, ClassSchema]' = weakref.WeakKeyDictionary()
+        self.__artifacts: 'weakref.WeakKeyDictionary[Type, Dict[Any, Any]]' = weakref.WeakKeyDictionary()
+        self.__class_type_specs: 'weakref.WeakKeyDictionary[Type, TypeSpec]' = weakref.WeakKeyDictionary()
+        self.__type_specs: Dict[Any, TypeSpec] = dict()
+        self.__lock = threading.RLock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def stats(self) -> RegistryStats:
+        return RegistryStats(hits=self.__hits, misses=self.__misses, size=len(self.__schemas))
+
+    def get(self, cls: Type) -> ClassSchema:
+        """ Get the schema of the class """
+        schema = self.__schemas.get(cls)
+
+        if schema is not None:
+            self.__hits += 1
+            return schema
+
+        with self.__lock:
+            schema = self.__schemas.get(cls)
+
+            if schema is None:
+                self.__misses += 1
+                schema = self.__schemas[cls] = self.__analyze(cls)
+
+        return schema
+
+    def describe(self, annotation: Any) -> TypeSpec:
+        """ Get the type specification of the annotation, e.g., of a function parameter """
+        type_specs = self.__class_type_specs if isinstance(annotation, type) else self.__type_specs
+
+        try:
+            type_spec = type_specs.get(annotation)
+        except TypeError:
+            # The annotation is not hashable.
+            return TypeSpec(types=get_all_types(annotation), optional=is_optional(annotation))
+
+        if type_spec is None:
+            type_spec = type_specs[annotation] = TypeSpec(types=get_all_types(annotation),
+                                                          optional=is_optional(annotation))
+
+        return type_spec
+
+    def get_artifact(self, cls: Type, key: Any, factory: Callable[[], Any]) -> Any:
+        """ Get the artifact derived from the schema of the class, e.g., a generated builder class
+
+            The artifact is made by the factory on the first use and dropped together with the schema.
+
+            .. note:: The artifact should not refer to the class strongly. Otherwise, the class is kept alive until
+                      the artifact is invalidated.
+        """
+        artifacts = self.__artifacts.get(cls)
+
+        if artifacts is None:
+            with self.__lock:
+                artifacts = self.__artifacts.setdefault(cls, dict())
+
+        artifact = artifacts.get(key)
+
+        if artifact is None:
+            with self.__lock:
+                artifact = artifacts.get(key)
+
+                if artifact is None:
+                    artifact = artifacts[key] = factory()
+
+        return artifact
+
+    def warm(self, classes: Iterable[Type]):
+        """ Analyze the classes in advance, e.g., at startup """
+        for cls in classes:
+            self.get(cls)
+
+        return self
+
+    def invalidate(self, cls: Optional[Type] = None):
+        """ Drop the schema and the artifacts of the class, or everything if the class is not given """
+        with self.__lock:
+            if cls is None:
+                self.__schemas.clear()
+                self.__artifacts.clear()
+                self.__class_type_specs.clear()
+                self.__type_specs.clear()
+            else:
+                self.__schemas.pop(cls, None)
+                self.__artifacts.pop(cls, None)
+
+        return self
+
+    def __analyze(self, cls: Type) -> ClassSchema:
+        if not hasattr(cls, '__annotations__'):
+            raise IncompatibleBuildableClassError()
+
+        # Resolve the postponed annotations, if possible.
+        try:
+            resolved_annotations = get_type_hints(cls)
+        except Exception:
+            resolved_annotations = dict()
+
+        # NOTE: The fields of a data class include the inherited ones, which are also the constructor parameters.
+        dataclass_fields = fields(cls) if is_dataclass_class(cls) else None
+        annotations = {field.name: field.type for field in dataclass_fields} \
+            if dataclass_fields is not None \
+            else cls.__dict__.get('__annotations__', dict())
+
+        attributes = list()
+
+        for attribute_name, annotation in annotations.items():
+            annotation = resolved_annotations.get(attribute_name, annotation)
+            type_spec = self.describe(annotation)
+
+            # Get the default value
+            default_value = None
+            if hasattr(cls, attribute_name):
+                class_attribute_value = getattr(cls, attribute_name)
+                if class_attribute_value is not None and not callable(class_attribute_value):
+                    default_value = class_attribute_value
+
+            attributes.append(AttributeSpec(name=attribute_name,
+                                            types=type_spec.types,
+                                            optional=type_spec.optional,
+                                            default=default_value,
+                                            annotation=annotation))
+
+        if dataclass_fields is not None:
+            constructor_param_names = tuple(field.name for field in dataclass_fields if field.init)
+        else:
+            attribute_names = {attribute.name for attribute in attributes}
+
+            try:
+                parameters = inspect.signature(cls).parameters
+            except (TypeError, ValueError):
+                parameters = dict()
+
+            constructor_param_names = tuple(
+                param_name
+                for param_name, param in parameters.items()
+                if param_name in attribute_names and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+            )
+
+        return ClassSchema(attributes=tuple(attributes),
+                           is_dataclass=dataclass_fields is not None,
+                           constructor_param_names=constructor_param_names)
+
+
+class IncompatibleBuildableClassError(RuntimeError):
+    """ Class annotations does not exist """
+    def __init__(self):
+        super().__init__('Requires class annotations. '
+                         'Check out the doc at https://github.com/shiroyuki/oriole/tree/master/oriole/docs.')
+
+
+registry: SchemaRegistry = SchemaRegistry()
+""" Default Schema Registry """
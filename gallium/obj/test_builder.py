@@ -1,7 +1,9 @@
+import array
+from dataclasses import dataclass
 from typing import Optional
 from unittest import TestCase
 
-from gallium.obj.builder import ObjectBuilder
+from gallium.obj.builder import ObjectBuilder, RequiredAttributeError
 from gallium.obj.decorator import to_string
 
 
@@ -38,3 +40,51 @@ class ObjectBuilderTest(TestCase):
         self.assertEqual(1234, target.alpha)
         self.assertEqual('foobar', target.bravo)
         self.assertEqual(True, target.charlie)
+
+    def test_generated_builder(self):
+        builder_class = ObjectBuilder.for_class(ObjectBuilderTest.TargetWithNoDecorator)
+
+        target = builder_class().alpha(1234).bravo('foobar').build()
+
+        self.assertIs(builder_class, ObjectBuilder.for_class(ObjectBuilderTest.TargetWithNoDecorator))
+        self.assertEqual((1234, 'foobar', False), (target.alpha, target.bravo, target.charlie))
+
+        with self.assertRaises(AttributeError):
+            builder_class().delta(1)
+
+        with self.assertRaises(RequiredAttributeError):
+            builder_class().alpha(1234).build()
+
+    def test_generated_builder_with_attributes_named_like_slots(self):
+        @dataclass
+        class Vector:
+            v0: int
+            v1: int = 0
+
+        self.assertEqual(Vector(1, 2), ObjectBuilder.for_class(Vector)().v0(1).v1(2).build())
+
+    def test_build_many(self):
+        target_class = ObjectBuilderTest.TargetWithNoDecorator
+        targets = ObjectBuilder.build_many(target_class, dict(alpha=array.array('i', [1, 2]), bravo=('a', 'b')))
+
+        self.assertEqual([(1, 'a', False), (2, 'b', False)],
+                         [(target.alpha, target.bravo, target.charlie) for target in targets])
+
+        with self.assertRaises(RequiredAttributeError):
+            ObjectBuilder.build_many(target_class, dict(alpha=[1, 2]))
+
+        with self.assertRaises(ValueError):
+            ObjectBuilder.build_many(target_class, dict(alpha=[1, 2], bravo=['a']))
+
+    def test_build_many_rows(self):
+        target_class = ObjectBuilderTest.TargetWithNoDecorator
+        targets = ObjectBuilder.build_many_rows(target_class, iter([(1, 'a'), (2, 'b')]), names=['alpha', 'bravo'],
+                                                lazy=True)
+
+        first_target = next(targets)
+
+        self.assertEqual((1, 'a'), (first_target.alpha, first_target.bravo))
+        self.assertEqual([(3, 'c', True)],
+                         [(target.alpha, target.bravo, target.charlie)
+                          for target in ObjectBuilder.build_many_rows(target_class,
+                                                                      [dict(alpha=3, bravo='c', charlie=True)])])
@@ -0,0 +1,87 @@
+import datetime
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+from unittest import TestCase
+
+from gallium.obj.builder import RequiredAttributeError
+from gallium.obj.decoder import ObjectDecoder
+from gallium.obj.encoder import ObjectEncoder
+
+
+class Color(Enum):
+    RED = 'red'
+    BLUE = 'blue'
+
+
+@dataclass
+class Pet:
+    name: str
+    color: Color
+    born_on: Optional[datetime.date] = None
+
+
+@dataclass
+class Owner:
+    name: str
+    born_at: datetime.datetime
+    pets: List[Pet]
+    nickname: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    pets_by_name: Dict[str, Pet] = field(default_factory=dict)
+    location: Optional[Tuple[float, float]] = None
+
+
+@dataclass
+class Node:
+    name: str
+    children: List['Node'] = field(default_factory=list)
+
+
+class Account:
+    name: str
+    active: bool = True
+    owner: Optional[Owner]
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class ObjectDecoderTest(TestCase):
+    def setUp(self):
+        self.owner = Owner(name='Juti',
+                           born_at=datetime.datetime(2000, 1, 2, 3, 4, 5),
+                           pets=[Pet('Panda', Color.RED, datetime.date(2010, 1, 1)), Pet('Koala', Color.BLUE)],
+                           tags=['a'],
+                           pets_by_name=dict(panda=Pet('Panda', Color.RED)),
+                           location=(1.5, 2.5))
+
+    def test_decode(self):
+        self.assertEqual(self.owner, ObjectDecoder().decode(Owner, ObjectEncoder.build().encode(self.owner)))
+
+    def test_decode_with_defaults(self):
+        owner = ObjectDecoder().decode(Owner, dict(name='Juti', born_at=self.owner.born_at, pets=[]))
+
+        self.assertEqual(Owner('Juti', self.owner.born_at, []), owner)
+
+        with self.assertRaises(RequiredAttributeError):
+            ObjectDecoder().decode(Owner, dict(name='Juti', pets=[]))
+
+    def test_decode_annotated_class(self):
+        account = ObjectDecoder().decode(Account, dict(name='panda'))
+
+        self.assertEqual(('panda', True, None), (account.name, account.active, account.owner))
+
+    def test_decode_recursive_class(self):
+        tree = ObjectDecoder().decode(Node, dict(name='root', children=[dict(name='leaf')]))
+
+        self.assertEqual(Node('root', [Node('leaf')]), tree)
+
+    def test_decode_many(self):
+        decoder = ObjectDecoder()
+        records = ObjectEncoder.build().encode([self.owner] * 3)
+
+        decoded_owners = decoder.decode_many(Owner, records)
+
+        self.assertEqual(self.owner, next(decoded_owners))
+        self.assertEqual([self.owner] * 2, list(decoded_owners))
@@ -0,0 +1,88 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+from unittest import TestCase
+
+from gallium.obj.decorator import to_string
+from gallium.obj.utils import LazyString, stringify
+
+
+@to_string
+@dataclass
+class Pet:
+    name: str
+    tags: List[str] = field(default_factory=list)
+
+
+@to_string(max_items=2, max_string=4, max_depth=1, as_repr=True)
+class Node:
+    name: str
+    children: list
+    parent: Optional['Node']
+
+    def __init__(self, name: str, children: list):
+        self.name = name
+        self.children = children
+
+
+@to_string
+class Counter:
+    x: int
+
+    def __init__(self, x: int):
+        self.x = x
+        self.y = x * 2
+        self._hidden = 0
+        self.callback = print
+
+    @property
+    def double(self):
+        return self.x * 2
+
+
+@to_string
+@dataclass
+class Hook:
+    name: str
+    hook: Optional[Callable] = None
+
+
+class ToStringTest(TestCase):
+    def test_to_string(self):
+        pet = Pet('Panda', ['a', 'b'])
+
+        self.assertEqual(stringify(pet), str(pet))
+        self.assertEqual(f'{__name__}.Pet(name=Panda, tags=[\'a\', \'b\'])', str(pet))
+
+    def test_to_string_with_limits(self):
+        root = Node('root-node', [Node('leaf', []), 'abcdefgh', [1, [2]]])
+
+        # The unset attribute (parent) is omitted.
+        self.assertEqual(f"{__name__}.Node(children=[{__name__}.Node(...), 'abcd...', ...], name=root...)", str(root))
+        self.assertEqual(f"[{__name__}.Node(children=[], name=leaf)]", repr([root.children[0]]))
+
+    def test_to_string_with_undeclared_attributes(self):
+        counter = Counter(1)
+
+        self.assertEqual(stringify(counter), str(counter))
+        self.assertEqual(f'{__name__}.Counter(double=2, x=1, y=2)', str(counter))
+
+        del counter.y
+
+        self.assertEqual(f'{__name__}.Counter(double=2, x=1)', str(counter))
+
+    def test_to_string_with_callable_attributes(self):
+        for hook in [Hook('a', print), Hook('b'), Hook('c', lambda: None)]:
+            with self.subTest(hook=hook.name):
+                self.assertEqual(stringify(hook), str(hook))
+
+        self.assertEqual(f'{__name__}.Hook(name=a)', str(Hook('a', print)))
+        self.assertEqual(f'{__name__}.Hook(hook=None, name=b)', str(Hook('b')))
+
+    def test_lazy_string(self):
+        calls = []
+        message = LazyString(lambda: calls.append(1) or 'formatted')
+
+        self.assertEqual([], calls)
+        self.assertEqual('formatted formatted', f'{message} {message}')
+        self.assertEqual([1], calls)
+        self.assertEqual('a=1', str(LazyString('a={}', 1)))
@@ -0,0 +1,237 @@
+import array
+import datetime
+import io
+import json
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, List, Optional
+from unittest import TestCase
+from unittest.mock import patch
+
+from gallium.obj.cbor import dumps as dump_cbor
+from gallium.obj.encoder import BufferPlugIn, CircularReferenceError, CYCLE_RAISE, CYCLE_REFERENCE, CYCLE_TRUNCATE, \
+    ObjectEncoder, PlugIn
+
+
+class Color(Enum):
+    RED = 'red'
+    BLUE = 'blue'
+
+
+@dataclass
+class Pet:
+    name: str
+    color: Color
+
+
+@dataclass
+class Owner:
+    name: str
+    born_at: datetime.datetime
+    pets: List[Pet]
+    nickname: Optional[str] = None
+
+
+class Point:
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+
+
+class PointPlugIn(PlugIn):
+    handled_types = (Point,)
+
+    def encode(self, obj: Point) -> Any:
+        return [obj.x, obj.y]
+
+
+class DynamicPlugIn(PlugIn):
+    def __init__(self):
+        self.calls = 0
+
+    def can_handle(self, obj: Any) -> bool:
+        self.calls += 1
+        return isinstance(obj, Point) and obj.x < 0
+
+    def encode(self, obj: Point) -> Any:
+        return 'negative'
+
+
+class ObjectEncoderTest(TestCase):
+    def setUp(self):
+        self.owner = Owner(name='Juti',
+                           born_at=datetime.datetime(2000, 1, 2, 3, 4, 5),
+                           pets=[Pet('Panda', Color.RED), Pet('Koala', Color.BLUE)])
+        self.expected_owner = dict(name='Juti',
+                                   born_at='2000-01-02T03:04:05',
+                                   pets=[dict(name='Panda', color='red'), dict(name='Koala', color='blue')],
+                                   nickname=None)
+
+    def test_encode(self):
+        self.assertEqual(self.expected_owner, ObjectEncoder.build().encode(self.owner))
+        self.assertEqual([1, 'a', None, [2.5, True]], ObjectEncoder.build().encode((1, 'a', None, [2.5, True])))
+
+    def test_encode_with_plug_ins_in_registration_order(self):
+        dynamic_plug_in = DynamicPlugIn()
+        encoder = ObjectEncoder.build().register(dynamic_plug_in).register(PointPlugIn())
+
+        self.assertEqual(['negative', [1, 2]], encoder.encode([Point(-1, 2), Point(1, 2)]))
+
+    def test_encode_primitives_without_plug_ins(self):
+        dynamic_plug_in = DynamicPlugIn()
+        encoder = ObjectEncoder.build().register(dynamic_plug_in)
+
+        self.assertEqual(list(range(100)), encoder.encode(list(range(100))))
+        # Only the list goes through the dynamic plug-in.
+        self.assertEqual(1, dynamic_plug_in.calls)
+
+    def test_encode_dataclass_without_intermediate_copy(self):
+        with patch('dataclasses.asdict') as asdict:
+            self.assertEqual(self.expected_owner, ObjectEncoder.build().encode(self.owner))
+
+        asdict.assert_not_called()
+
+    def test_iter_encode(self):
+        encoder = ObjectEncoder.build()
+
+        def generate_owners():
+            yield self.owner
+            yield {1: (Point(1, 2) for _ in range(2)), 'empty': [], 'dict': {}}
+
+        self.assertEqual([self.expected_owner, {'1': [[1, 2], [1, 2]], 'empty': [], 'dict': {}}],
+                         json.loads(''.join(encoder.register(PointPlugIn()).iter_encode(generate_owners()))))
+
+    def test_iter_encode_subclasses_of_primitives(self):
+        class Name(str):
+            pass
+
+        class Count(int):
+            pass
+
+        class Ratio(float):
+            pass
+
+        encoder = ObjectEncoder.build()
+        value = {'n': Name('abc'), 'c': Count(2), 'r': Ratio(0.5), 'l': [Name('de')]}
+        output = io.StringIO()
+
+        encoder.dump([Name('ab'), value], output, format='jsonl')
+
+        self.assertEqual(encoder.encode(value), json.loads(''.join(encoder.iter_encode(value))))
+        self.assertEqual('"abc"', ''.join(encoder.iter_encode(Name('abc'))))
+        self.assertEqual(['ab', encoder.encode(value)], [json.loads(line) for line in output.getvalue().splitlines()])
+
+    def test_dump_json_lines(self):
+        output = io.StringIO()
+
+        ObjectEncoder.build().dump((Pet(name, Color.RED) for name in ['Panda', 'Koala']), output, 'jsonl')
+
+        self.assertEqual('{"name": "Panda", "color": "red"}\n{"name": "Koala", "color": "red"}\n', output.getvalue())
+
+    def test_encode_buffers(self):
+        data = bytes(range(8))
+
+        self.assertEqual(dict(data='AAECAwQFBgc=', view='AgME', numbers=[1.5, 2.5]),
+                         ObjectEncoder.build().encode(dict(data=data,
+                                                           view=memoryview(bytearray(data))[2:5],
+                                                           numbers=array.array('d', [1.5, 2.5]))))
+        self.assertEqual('0001020304050607', ObjectEncoder().register(BufferPlugIn(BufferPlugIn.HEX)).encode(data))
+
+        raw_output = ObjectEncoder().register(BufferPlugIn(BufferPlugIn.RAW)).encode(data)
+
+        self.assertIsInstance(raw_output, memoryview)
+        self.assertIs(data, raw_output.obj)
+
+    def test_encode_with_memo(self):
+        encoder = ObjectEncoder.build(memoize=True)
+        pet = Pet('Panda', Color.RED)
+
+        output = encoder.encode([Owner('A', self.owner.born_at, [pet]), Owner('B', self.owner.born_at, [pet])])
+
+        self.assertIs(output[0]['pets'][0], output[1]['pets'][0])
+        self.assertGreater(encoder.stats.hit_rate, 0)
+
+    def test_encode_with_cycle_policy(self):
+        looped = dict(name='loop')
+        looped['self'] = looped
+
+        with self.assertRaises(CircularReferenceError):
+            ObjectEncoder.build(cycle_policy=CYCLE_RAISE).encode(looped)
+
+        self.assertEqual(dict(name='loop', self=None), ObjectEncoder.build(cycle_policy=CYCLE_TRUNCATE).encode(looped))
+        self.assertEqual(['$ref'], list(ObjectEncoder.build(cycle_policy=CYCLE_REFERENCE).encode(looped)['self']))
+        self.assertEqual([dict(name='loop', self=None)],
+                         ObjectEncoder.build(memoize=True, cycle_policy=CYCLE_TRUNCATE).encode([looped]))
+
+    def test_dump_with_cycle_policy(self):
+        looped = dict(name='loop')
+        looped['self'] = looped
+        encoder = ObjectEncoder.build(memoize=True, cycle_policy=CYCLE_REFERENCE)
+        expected_output = encoder.encode(looped)
+
+        self.assertEqual(expected_output, json.loads(''.join(encoder.iter_encode(looped))))
+
+        for format in ('json', 'jsonl'):
+            output = io.StringIO()
+            encoder.dump(looped, output, format=format)
+            self.assertEqual(expected_output, json.loads(output.getvalue()))
+
+        self.assertEqual(dump_cbor(expected_output, encoder), dump_cbor(looped, encoder))
+        self.assertEqual('[{"name": "loop", "self": null}, {"name": "loop", "self": null}]',
+                         ''.join(ObjectEncoder.build(cycle_policy=CYCLE_TRUNCATE).iter_encode([looped, looped])))
+
+        with self.assertRaises(CircularReferenceError):
+            dump_cbor([looped], ObjectEncoder.build(cycle_policy=CYCLE_RAISE))
+
+    def test_encode_parallel(self):
+        encoder = ObjectEncoder.build()
+        owners = [self.owner] * 10
+
+        for executor in ('thread', 'process'):
+            self.assertEqual([self.expected_owner] * 10,
+                             encoder.encode_parallel(owners, workers=2, chunk_size=3, threshold=5, executor=executor))
+
+        self.assertEqual({str(i): self.expected_owner for i in range(10)},
+                         encoder.encode_parallel({str(i): self.owner for i in range(10)}, workers=2, threshold=5))
+
+    def test_encode_parallel_below_threshold(self):
+        class DictPlugIn(PlugIn):
+            handled_types = (dict,)
+
+            def encode(self, obj: dict) -> Any:
+                return sorted(obj)
+
+        encoder = ObjectEncoder.build().register(DictPlugIn())
+
+        for value in [Pet('Panda', Color.RED), [Pet('Panda', Color.RED)], {'x': 1}]:
+            with self.subTest(value=value):
+                self.assertEqual(encoder.encode(value), encoder.encode_parallel(value))
+
+    def test_dump_cbor(self):
+        self.assertEqual('1903e8', dump_cbor(1000).hex())
+        self.assertEqual('3903e7', dump_cbor(-1000).hex())
+        self.assertEqual('c249010000000000000000', dump_cbor(18446744073709551616).hex())
+        self.assertEqual('fb3ff199999999999a', dump_cbor(1.1).hex())
+        self.assertEqual('f4f5f6', (dump_cbor(False) + dump_cbor(True) + dump_cbor(None)).hex())
+        self.assertEqual('83010203', dump_cbor((1, 2, 3)).hex())
+        self.assertEqual('a1616101', dump_cbor({'a': 1}).hex())
+        self.assertEqual('9f0102ff', dump_cbor(i for i in [1, 2]).hex())
+        self.assertEqual('4401020304', dump_cbor(memoryview(bytes([0, 1, 2, 3, 4]))[1:]).hex())
+        self.assertEqual('c074' + b'2013-03-21T20:04:00Z'.hex(), dump_cbor(datetime.datetime(2013, 3, 21, 20, 4)).hex())
+        self.assertEqual('c078' + '19' + b'2013-03-21T20:04:00+09:00'.hex(),
+                         dump_cbor(datetime.datetime(2013, 3, 21, 20, 4,
+                                                     tzinfo=datetime.timezone(datetime.timedelta(hours=9)))).hex())
+        self.assertEqual('d903ec6a' + b'2013-03-21'.hex(), dump_cbor(datetime.date(2013, 3, 21)).hex())
+        self.assertEqual('63726564', dump_cbor(Color.RED).hex())
+
+        with self.assertRaises(TypeError):
+            dump_cbor(Point(1, 2))
+
+    def test_dump_cbor_with_plug_ins(self):
+        output = io.BytesIO()
+        encoder = ObjectEncoder.build().register(PointPlugIn())
+
+        encoder.dump([Pet('Panda', Color.RED), Point(1, 2)], output, 'cbor', buffer_size=4)
+
+        self.assertEqual('82' + 'a2' + '646e616d65' + '6550616e6461' + '65636f6c6f72' + '63726564' + '820102',
+                         output.getvalue().hex())
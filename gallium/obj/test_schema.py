@@ -0,0 +1,58 @@
+import gc
+import weakref
+from dataclasses import dataclass
+from typing import Optional
+from unittest import TestCase
+
+from gallium.obj.builder import ObjectBuilder
+from gallium.obj.schema import IncompatibleBuildableClassError, SchemaRegistry, registry
+
+
+@dataclass
+class Parent:
+    name: str
+
+
+@dataclass
+class Child(Parent):
+    age: Optional[int] = None
+
+
+class SchemaRegistryTest(TestCase):
+    def test_get(self):
+        schema_registry = SchemaRegistry()
+
+        self.assertEqual(('name',), schema_registry.get(Parent).attribute_names)
+        # The subclass has its own schema.
+        self.assertEqual(('name', 'age'), schema_registry.get(Child).attribute_names)
+        self.assertEqual((True, (int,)), (schema_registry.get(Child).attributes[1].optional,
+                                          schema_registry.get(Child).attributes[1].types))
+        self.assertEqual((2, 2, 2), (schema_registry.stats.hits,
+                                     schema_registry.stats.misses,
+                                     schema_registry.stats.size))
+
+        with self.assertRaises(IncompatibleBuildableClassError):
+            schema_registry.get(int)
+
+    def test_warm_and_invalidate(self):
+        schema_registry = SchemaRegistry().warm([Parent, Child])
+
+        self.assertEqual(2, schema_registry.stats.size)
+        self.assertEqual(1, schema_registry.invalidate(Parent).stats.size)
+        self.assertEqual(0, schema_registry.invalidate().stats.size)
+
+    def test_weak_reference(self):
+        @dataclass
+        class Temporary:
+            name: str
+
+        ObjectBuilder.for_class(Temporary)().name('panda').build()
+
+        size = registry.stats.size
+        temporary_class_ref = weakref.ref(Temporary)
+
+        del Temporary
+        gc.collect()
+
+        self.assertIsNone(temporary_class_ref())
+        self.assertEqual(size - 1, registry.stats.size)
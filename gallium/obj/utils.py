@@ -1,7 +1,15 @@
-from typing import Type, Tuple
+import threading
+from dataclasses import fields
+from typing import Any, Callable, Dict, List, Optional, Type, Tuple
 
 NONE_TYPE = type(None)
 
+_ELLIPSIS = '...'
+_CONTAINER_TYPES = (list, tuple, set, frozenset, dict)
+
+# The depth of the nested objects being formatted by the compiled formatters, per thread
+_formatting = threading.local()
+
 
 def stringify(obj):
     attrs = [
@@ -13,6 +21,251 @@ def stringify(obj):
     return f'{type(obj).__module__}.{type(obj).__name__}({", ".join(attrs)})'
 
 
+def get_public_attribute_names(cls: Type) -> Tuple[str, ...]:
+    """ Get the names of the public attributes declared by the class and its parents
+
+        The names come from the data class fields (shown in ``repr``), the annotations and ``__slots__``, in the
+        alphabetical order like :func:`dir`.
+    """
+    names = set()
+
+    for base in reversed(cls.__mro__):
+        if is_dataclass_class(base):
+            names.update(field.name for field in fields(base) if field.repr)
+
+        names.update(base.__dict__.get('__annotations__', dict()).keys())
+
+        slots = base.__dict__.get('__slots__', tuple())
+        names.update([slots] if isinstance(slots, str) else slots)
+
+    return tuple(sorted(name for name in names if name[0] != '_'))
+
+
+def _get_public_class_attribute_names(cls: Type) -> Tuple[str, ...]:
+    """ Get the names of the public non-callable attributes of the class, e.g., the properties and the constants """
+    names = list()
+
+    for name in dir(cls):
+        if name[0] == '_':
+            continue
+
+        try:
+            value = getattr(cls, name)
+        except AttributeError:
+            continue
+
+        if isinstance(value, property) or not callable(value):
+            names.append(name)
+
+    return tuple(names)
+
+
+def shorten(value: Any,
+            max_items: Optional[int] = None,
+            max_string: Optional[int] = None,
+            max_depth: Optional[int] = None,
+            depth: int = 0) -> str:
+    """ Format the value like :func:`repr` with the long strings and sequences truncated
+
+        :param value: The value to format
+        :param int max_items: The maximum number of the items of a sequence, set or mapping to show
+        :param int max_string: The maximum length of a string to show
+        :param int max_depth: The maximum depth of the nested sequences, sets and mappings to show
+        :param int depth: The current depth
+    """
+    value_type = type(value)
+
+    if value_type is str:
+        return repr(value[:max_string] + _ELLIPSIS if max_string is not None and len(value) > max_string else value)
+
+    if value_type in _CONTAINER_TYPES:
+        if max_depth is not None and depth >= max_depth:
+            return _ELLIPSIS
+
+        items = value.items() if value_type is dict else value
+        formatted_items = list()
+
+        for i, item in enumerate(items):
+            if max_items is not None and i >= max_items:
+                formatted_items.append(_ELLIPSIS)
+                break
+
+            formatted_items.append(
+                f'{shorten(item[0], max_items, max_string, max_depth, depth + 1)}: '
+                f'{shorten(item[1], max_items, max_string, max_depth, depth + 1)}'
+                if value_type is dict
+                else shorten(item, max_items, max_string, max_depth, depth + 1)
+            )
+
+        if value_type is list:
+            return f'[{", ".join(formatted_items)}]'
+        elif value_type is tuple:
+            return f'({", ".join(formatted_items)}{"," if len(formatted_items) == 1 else ""})'
+        elif value_type is dict:
+            return f'{{{", ".join(formatted_items)}}}'
+        elif not formatted_items:
+            return f'{value_type.__name__}()'
+        else:
+            return f'{{{", ".join(formatted_items)}}}' if value_type is set \
+                else f'frozenset({{{", ".join(formatted_items)}}})'
+
+    return repr(value)
+
+
+def compile_formatter(cls: Type,
+                      max_items: Optional[int] = None,
+                      max_string: Optional[int] = None,
+                      max_depth: Optional[int] = None) -> Callable[[Any], str]:
+    """ Generate the function formatting the instances of the class like :func:`stringify`
+
+        If the class declares no public attributes (see :func:`get_public_attribute_names`), :func:`stringify` is
+        returned. Otherwise, the declared attributes, the non-callable class attributes (e.g., properties) and the
+        public instance attributes which are not declared are shown, like :func:`stringify`. The attributes which are
+        not set or of which the values are callable are omitted.
+
+        :param int max_items: The maximum number of the items of a sequence, set or mapping to show
+        :param int max_string: The maximum length of a string to show
+        :param int max_depth: The maximum depth of the nested objects, sequences, sets and mappings to show. The nested
+                              objects beyond the depth are shown as ``module.Class(...)``.
+    """
+    declared_names = get_public_attribute_names(cls)
+
+    if not declared_names:
+        return stringify
+
+    # The data class fields hidden from repr are neither shown as the class attributes nor as the instance attributes.
+    hidden_names = {
+        field.name
+        for base in cls.__mro__
+        if is_dataclass_class(base)
+        for field in fields(base)
+        if not field.repr
+    }
+    names = tuple(sorted(set(declared_names).union(_get_public_class_attribute_names(cls)).difference(hidden_names)))
+    known_names = frozenset(names).union(hidden_names)
+    class_name = f'{cls.__module__}.{cls.__name__}'
+    limited = max_items is not None or max_string is not None or max_depth is not None
+
+    def format_value(value: Any) -> Any:
+        value_type = type(value)
+
+        if value_type is str:
+            return value[:max_string] + _ELLIPSIS if max_string is not None and len(value) > max_string else value
+
+        if value_type in _CONTAINER_TYPES:
+            return shorten(value, max_items, max_string, max_depth)
+
+        return value
+
+    def get_extra_names(obj_dict: Dict[str, Any]) -> List[str]:
+        """ Get the names of the public instance attributes which are not declared """
+        return [
+            name
+            for name, value in obj_dict.items()
+            if name[0] != '_' and name not in known_names and not callable(value)
+        ]
+
+    def format_dynamically(obj: Any) -> str:
+        """ Format the object of which some attributes are not set, not declared or callable """
+        attrs = list()
+
+        for name in sorted(names + tuple(get_extra_names(getattr(obj, '__dict__', dict())))):
+            try:
+                value = getattr(obj, name)
+            except AttributeError:
+                continue
+
+            if not callable(value):
+                attrs.append(f'{name}={format_value(value) if limited else value}')
+
+        return f'{class_name}({", ".join(attrs)})'
+
+    namespace: Dict[str, Any] = dict(formatting=_formatting,
+                                     format_value=format_value,
+                                     format_dynamically=format_dynamically,
+                                     get_extra_names=get_extra_names,
+                                     known_names=known_names)
+    attrs = ', '.join(
+        f'{name}={{format_value(v{i})}}' if limited else f'{name}={{v{i}}}'
+        for i, name in enumerate(names)
+    )
+
+    lines = ['def format_object(self):']
+
+    if max_depth is not None:
+        lines.extend([
+            '    depth = getattr(formatting, "depth", 0)',
+            f'    if depth >= {max_depth}:',
+            f'        return {class_name + "(...)"!r}',
+            '    formatting.depth = depth + 1',
+            '    try:',
+        ])
+        indent = '        '
+    else:
+        indent = '    '
+
+    # NOTE: The undeclared attributes are rare, so the names of the instance attributes are first compared as a whole.
+    lines.extend([
+        f'{indent}obj_dict = getattr(self, "__dict__", None)',
+        f'{indent}if obj_dict and not known_names.issuperset(obj_dict) and get_extra_names(obj_dict):',
+        f'{indent}    return format_dynamically(self)',
+    ])
+
+    lines.append(f'{indent}try:')
+    lines.extend(f'{indent}    v{i} = self.{name}' for i, name in enumerate(names))
+    lines.extend([
+        f'{indent}except AttributeError:',
+        f'{indent}    return format_dynamically(self)',
+        # The callable values are omitted like stringify does.
+        f'{indent}if {" or ".join(f"callable(v{i})" for i in range(len(names)))}:',
+        f'{indent}    return format_dynamically(self)',
+        f'{indent}return f{class_name + "(" + attrs + ")"!r}',
+    ])
+
+    if max_depth is not None:
+        lines.extend([
+            '    finally:',
+            '        formatting.depth = depth',
+        ])
+
+    exec('\n'.join(lines), namespace)
+
+    return namespace['format_object']
+
+
+class LazyString:
+    """ String formatted on demand
+
+        This is for the messages of which the formatting is costly, e.g., in the logging calls which may be filtered
+        out. The message is only formatted (once) when it is converted to a string.
+
+        .. code-block:: python
+
+            log.debug(LazyString('Received {}', payload))
+    """
+    __slots__ = ('__template', '__args', '__kwargs', '__value')
+
+    def __init__(self, template: Any, *args, **kwargs):
+        """
+        :param template: The template for :meth:`str.format`, or a callable returning the string
+        """
+        self.__template = template
+        self.__args = args
+        self.__kwargs = kwargs
+        self.__value: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.__value is None:
+            self.__value = self.__template(*self.__args, **self.__kwargs) \
+                if callable(self.__template) \
+                else self.__template.format(*self.__args, **self.__kwargs)
+
+        return self.__value
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
 def is_optional(annotation: Type):
     if hasattr(annotation, "__args__"):
         unioned_types = getattr(annotation, "__args__")